@@ -0,0 +1,259 @@
+import heapq
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone
+
+DAYS_ORDER = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+CHART_TOP_COUNT = 10
+
+
+class RepoAggregates:
+    """Результат одного прохода по репозиториям снимка."""
+
+    __slots__ = (
+        'total_repos', 'total_stars', 'total_forks', 'total_watchers',
+        'top_repos', 'languages', 'monthly_activity', 'weekly_pattern',
+        'repos_by_year', 'repo_types', 'active_repos_last_year',
+        'active_stars', 'starred_repos', 'first_repos',
+    )
+
+
+class RepoAccumulator:
+    """Агрегаты, накапливаемые по порциям репозиториев (например, по страницам).
+
+    Память не зависит от числа репозиториев, кроме ``starred_repos``: если
+    ``starred_limit`` не задан, туда попадают все репозитории со звездами,
+    иначе — только ``starred_limit`` самых звездных (в исходном порядке).
+    """
+
+    def __init__(self, top_count=CHART_TOP_COUNT, now=None, starred_limit=None):
+        self.top_count = top_count
+        self.starred_limit = starred_limit
+        self.one_year_ago = (now or datetime.now(timezone.utc)) - timedelta(days=365)
+        self.total_repos = self.total_stars = self.total_forks = self.total_watchers = 0
+        self.top_heap = []
+        self.languages = Counter()
+        self.monthly_activity = defaultdict(int)
+        self.weekly = [0] * 7
+        self.repos_by_year = defaultdict(int)
+        self.repo_types = {'source': 0, 'fork': 0}
+        self.active_repos = self.active_stars = 0
+        self.starred = []
+        self.first_repos = []
+
+    def add(self, repos):
+        top_heap = self.top_heap
+        top_count = self.top_count
+        languages = self.languages
+        monthly_activity = self.monthly_activity
+        weekly = self.weekly
+        repos_by_year = self.repos_by_year
+        repo_types = self.repo_types
+        one_year_ago = self.one_year_ago
+        starred = self.starred
+        starred_limit = self.starred_limit
+        first_repos = self.first_repos
+        total_stars = total_forks = total_watchers = active_repos = active_stars = 0
+
+        for index, repo in enumerate(repos, start=self.total_repos):
+            stars = repo.stars
+            total_stars += stars
+            total_forks += repo.forks
+            total_watchers += repo.watchers
+
+            entry = (stars, -index, repo)
+            if len(top_heap) < top_count:
+                heapq.heappush(top_heap, entry)
+            elif entry > top_heap[0]:
+                heapq.heapreplace(top_heap, entry)
+
+            if repo.language:
+                languages[repo.language] += 1
+
+            if repo.fork:
+                repo_types['fork'] += 1
+            else:
+                repo_types['source'] += 1
+
+            updated_at = repo.updated_at
+            if updated_at > one_year_ago:
+                active_repos += 1
+                active_stars += stars
+                monthly_activity[updated_at.strftime('%Y-%m')] += 1
+                weekly[updated_at.weekday()] += 1
+
+            repos_by_year[repo.created_at.year] += 1
+
+            if stars > 0:
+                if starred_limit is None:
+                    starred.append(repo)
+                elif len(starred) < starred_limit:
+                    heapq.heappush(starred, entry)
+                elif entry > starred[0]:
+                    heapq.heapreplace(starred, entry)
+            if index < CHART_TOP_COUNT:
+                first_repos.append(repo)
+
+            self.total_repos = index + 1
+
+        self.total_stars += total_stars
+        self.total_forks += total_forks
+        self.total_watchers += total_watchers
+        self.active_repos += active_repos
+        self.active_stars += active_stars
+
+    def result(self):
+        result = RepoAggregates()
+        result.total_repos = self.total_repos
+        result.total_stars = self.total_stars
+        result.total_forks = self.total_forks
+        result.total_watchers = self.total_watchers
+        result.top_repos = [entry[2] for entry in sorted(self.top_heap, reverse=True)]
+        result.languages = self.languages
+        result.monthly_activity = dict(sorted(self.monthly_activity.items()))
+        result.weekly_pattern = dict(zip(DAYS_ORDER, self.weekly))
+        result.repos_by_year = dict(sorted(self.repos_by_year.items()))
+        result.repo_types = self.repo_types
+        result.active_repos_last_year = self.active_repos
+        result.active_stars = self.active_stars
+        if self.starred_limit is None:
+            result.starred_repos = self.starred
+        else:
+            result.starred_repos = [entry[2] for entry in sorted(self.starred, key=lambda e: -e[1])]
+        result.first_repos = self.first_repos
+        return result
+
+
+def aggregate(repos, top_count=CHART_TOP_COUNT, now=None):
+    """Считает все агрегаты по репозиториям за один проход.
+
+    Топ по звездам собирается кучей размера ``top_count``; при равенстве
+    звезд порядок совпадает с исходным, как у стабильной сортировки.
+    """
+    accumulator = RepoAccumulator(top_count, now)
+    accumulator.add(repos)
+    return accumulator.result()
+
+
+# Логарифмические корзины распределений: значения меньше EXACT_BINS хранятся
+# точно, дальше по BINS_PER_OCTAVE корзин на каждое удвоение (до 2**32)
+EXACT_BINS = 16
+BINS_PER_OCTAVE = 8
+LOG_BINS = EXACT_BINS + BINS_PER_OCTAVE * 28
+AGE_MAX_YEARS = 30
+PERCENTILES = (50, 75, 90, 99)
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise RuntimeError('Для полной статистики установите пакет numpy')
+    return numpy
+
+
+class RepoDistribution:
+    """Распределения звезд, форков и возраста репозиториев в памяти фиксированного размера.
+
+    Каждая порция репозиториев превращается в массивы numpy и раскладывается
+    по корзинам одним ``bincount``; хранятся только гистограммы, суммы и
+    максимумы. Перцентили считаются по гистограммам: до 16 точно, выше — с
+    погрешностью в пределах корзины (около 9%).
+    """
+
+    def __init__(self, now=None):
+        np = self._np = _numpy()
+        self.now = (now or datetime.now(timezone.utc)).timestamp()
+        self.count = 0
+        self.hists = {
+            'stars': np.zeros(LOG_BINS, dtype=np.int64),
+            'forks': np.zeros(LOG_BINS, dtype=np.int64),
+        }
+        self.sums = {'stars': 0, 'forks': 0}
+        self.maxima = {'stars': 0, 'forks': 0}
+        self.ages = np.zeros(AGE_MAX_YEARS + 1, dtype=np.int64)
+        self.age_sum = 0.0
+
+    def add(self, repos):
+        n = len(repos)
+        if not n:
+            return
+        np = self._np
+        columns = {
+            'stars': np.fromiter((repo.stars for repo in repos), dtype=np.int64, count=n),
+            'forks': np.fromiter((repo.forks for repo in repos), dtype=np.int64, count=n),
+        }
+        for name, values in columns.items():
+            self.hists[name] += np.bincount(_log_bins(np, values), minlength=LOG_BINS)
+            self.sums[name] += int(values.sum())
+            self.maxima[name] = max(self.maxima[name], int(values.max()))
+
+        created = np.fromiter((repo.created_at.timestamp() for repo in repos), dtype=np.float64, count=n)
+        years = (self.now - created) / (365.25 * 24 * 3600)
+        self.age_sum += float(years.sum())
+        buckets = np.clip(years.astype(np.int64), 0, AGE_MAX_YEARS)
+        self.ages += np.bincount(buckets, minlength=AGE_MAX_YEARS + 1)
+        self.count += n
+
+    def result(self):
+        ages = self.ages.tolist()
+        last = max((i for i, count in enumerate(ages) if count), default=-1)
+        return {
+            'repos_analyzed': self.count,
+            'stars': self._summary('stars'),
+            'forks': self._summary('forks'),
+            'age_years': dict(
+                {f'p{q}': value for q, value in zip(PERCENTILES, self._percentiles(self.ages))},
+                mean=round(self.age_sum / self.count, 2) if self.count else 0,
+                histogram={
+                    'labels': [f'{AGE_MAX_YEARS}+' if i == AGE_MAX_YEARS else str(i) for i in range(last + 1)],
+                    'counts': ages[:last + 1],
+                }
+            ),
+        }
+
+    def _summary(self, name):
+        hist = self.hists[name]
+        maximum = self.maxima[name]
+        summary = {f'p{q}': min(_bin_value(b), maximum) for q, b in zip(PERCENTILES, self._percentiles(hist))}
+        summary['mean'] = round(self.sums[name] / self.count, 2) if self.count else 0
+        summary['max'] = maximum
+        summary['histogram'] = _octave_histogram(self._np, hist)
+        return summary
+
+    def _percentiles(self, hist):
+        """Номера корзин, в которые попадают перцентили PERCENTILES."""
+        if not self.count:
+            return [0] * len(PERCENTILES)
+        np = self._np
+        ranks = np.ceil(np.array(PERCENTILES) / 100 * self.count)
+        return np.searchsorted(np.cumsum(hist), ranks).tolist()
+
+
+def _log_bins(np, values):
+    bins = values.copy()
+    large = values >= EXACT_BINS
+    bins[large] = EXACT_BINS + ((np.log2(values[large]) - 4) * BINS_PER_OCTAVE).astype(np.int64)
+    return np.minimum(bins, LOG_BINS - 1)
+
+
+def _bin_value(index):
+    """Представитель корзины: точное значение или ее геометрическая середина."""
+    if index < EXACT_BINS:
+        return index
+    return round(2 ** (4 + (index - EXACT_BINS + 0.5) / BINS_PER_OCTAVE))
+
+
+def _octave_histogram(np, hist):
+    """Сворачивает корзины в интервалы 0, 1, 2–3, 4–7, ... до последнего непустого."""
+    counts = [int(hist[0]), int(hist[1])]
+    labels = ['0', '1']
+    for octave in range(1, 4):
+        low = 2 ** octave
+        counts.append(int(hist[low:2 * low].sum()))
+        labels.append(f'{low}–{2 * low - 1}')
+    octaves = hist[EXACT_BINS:].reshape(-1, BINS_PER_OCTAVE).sum(axis=1).tolist()
+    for octave, count in enumerate(octaves, start=4):
+        counts.append(count)
+        labels.append(f'{2 ** octave}–{2 ** (octave + 1) - 1}')
+    last = max((i for i, count in enumerate(counts) if count), default=0)
+    return {'labels': labels[:last + 1], 'counts': counts[:last + 1]}
@@ -1,11 +1,82 @@
-from flask import Flask, render_template, request, jsonify
+import json
+from datetime import datetime, timezone
+from time import perf_counter, time
+from flask import Flask, Response, g, render_template, request, jsonify
 from github_api import GitHubStats
 from config import Config
+from http_cache import build_representation, negotiate_encoding
+from history import HISTORY_METRICS
+from leaderboard import LEADERBOARD_METRICS
+from models import is_valid_login
+from jobs import JobQueueFull
+import metrics
 
 app = Flask(__name__)
 app.config.from_object(Config)
 
-github_stats = GitHubStats(token=Config.GITHUB_TOKEN)
+github_stats = GitHubStats(tokens=Config.GITHUB_TOKENS)
+
+STATS_SECTIONS = ('profile', 'repositories', 'languages', 'activity', 'language_bytes', 'charts')
+
+
+def _cache_samples(field):
+    value = github_stats.cache.stats().get(field)
+    return [] if value is None else [((), value)]
+
+
+def _rate_limit_samples(field):
+    return [
+        ((slot['token'], resource), budget[field])
+        for slot in github_stats.client.tokens.status()
+        for resource, budget in slot['resources'].items()
+        if budget[field] is not None
+    ]
+
+
+for _name, _cls, _field, _doc in (
+    ('ghstats_cache_entries', metrics.Gauge, 'entries', 'Entries in the stats cache'),
+    ('ghstats_cache_bytes', metrics.Gauge, 'bytes', 'Approximate size of the stats cache'),
+    ('ghstats_cache_hits_total', metrics.Counter, 'hits', 'Stats cache hits'),
+    ('ghstats_cache_misses_total', metrics.Counter, 'misses', 'Stats cache misses'),
+    ('ghstats_cache_evictions_total', metrics.Counter, 'evictions', 'Stats cache evictions'),
+):
+    metrics.REGISTRY.register(_cls(_name, _doc, collect=lambda field=_field: _cache_samples(field)))
+
+metrics.REGISTRY.register(metrics.Gauge(
+    'ghstats_github_rate_limit_remaining', 'Remaining GitHub rate limit per token',
+    ('token', 'resource'), collect=lambda: _rate_limit_samples('remaining')
+))
+metrics.REGISTRY.register(metrics.Gauge(
+    'ghstats_github_rate_limit', 'GitHub rate limit per token',
+    ('token', 'resource'), collect=lambda: _rate_limit_samples('limit')
+))
+
+
+@app.before_request
+def start_timings():
+    g.started_at = perf_counter()
+    g.timings = metrics.Timings()
+    g.timings_token = metrics.bind(g.timings)
+
+
+@app.after_request
+def finish_timings(response):
+    elapsed = perf_counter() - g.started_at
+    metrics.HTTP_REQUEST_SECONDS.observe(
+        elapsed, endpoint=request.endpoint or 'unknown', status=response.status_code
+    )
+    if Config.SERVER_TIMING:
+        timing = g.timings.server_timing()
+        total = f'total;dur={elapsed * 1000:.1f}'
+        response.headers['Server-Timing'] = f'{timing}, {total}' if timing else total
+    return response
+
+
+@app.teardown_request
+def reset_timings(error=None):
+    token = g.pop('timings_token', None)
+    if token is not None:
+        metrics.unbind(token)
 
 
 @app.route('/')
@@ -18,21 +89,241 @@ def get_stats(username):
     if not username:
         return jsonify({'success': False, 'error': 'Username не может быть пустым'}), 400
     
+    job_response = _maybe_start_job(username)
+    if job_response is not None:
+        return job_response
+    
+    encoding = negotiate_encoding(request.accept_encodings)
     try:
-        stats = github_stats.get_user_stats(username)
+        # Сначала без секций: если готовое сжатое тело в кэше, данные не декодируются.
+        # Несжатое тело не кэшируется: оно в разы больше упакованной статистики
+        stats, fetched_at = github_stats.get_user_stats_entry(username, sections=())
+        fresh = fetched_at is not None and not stats.get('stale')
+        representation = _cached_representation(username, encoding, fetched_at) if fresh and encoding else None
+        if representation is None and stats['success']:
+            stats, fetched_at = github_stats.get_user_stats_entry(username)
+            fresh = fetched_at is not None and not stats.get('stale')
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+    
+    if representation is None:
+        representation = build_representation(app.json.dumps(stats).encode(), encoding)
+        if fresh and representation['encoding']:
+            _store_representation(username, representation, fetched_at)
+    max_age = max(0, int(Config.CACHE_TIMEOUT - (time() - fetched_at))) if fresh else 0
+    
+    if request.if_none_match.contains(representation['etag']):
+        response = Response(status=304)
+    else:
+        response = Response(representation['body'], mimetype='application/json')
+        if representation['encoding']:
+            response.headers['Content-Encoding'] = representation['encoding']
+    response.set_etag(representation['etag'])
+    response.cache_control.max_age = max_age
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def _cached_representation(username, encoding, fetched_at):
+    """Сжатое тело ответа из кэша, если оно собрано из тех же данных."""
+    cached = github_stats.cache.get(f'user_http_{username.lower()}_{encoding}')
+    if cached and cached['fetched_at'] == fetched_at:
+        return cached
+    return None
+
+
+def _store_representation(username, representation, fetched_at):
+    github_stats.cache.set(
+        f'user_http_{username.lower()}_{representation["encoding"]}',
+        dict(representation, fetched_at=fetched_at),
+        ttl=Config.CACHE_STALE_TIMEOUT
+    )
+
+
+@app.route('/api/stats/<username>/full')
+def get_full_stats(username):
+    job_response = _maybe_start_job(username, full=True)
+    if job_response is not None:
+        return job_response
+    
+    try:
+        stats = github_stats.get_full_stats(username)
         return jsonify(stats)
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+def _maybe_start_job(username, full=False):
+    """Ответ 202 с задачей, если загрузки нет в кэше и она дорогая или клиент просит async."""
+    prefers_async = (request.args.get('async') in ('1', 'true')
+                     or 'respond-async' in request.headers.get('Prefer', ''))
+    try:
+        if github_stats.is_cached(username, full):
+            return None
+        if not prefers_async and not github_stats.needs_job(username, full):
+            return None
+        job = github_stats.submit_job(username, full)
+    except JobQueueFull:
+        response = jsonify({'success': False, 'error': 'Слишком много задач в очереди, повторите позже'})
+        response.headers['Retry-After'] = '5'
+        return response, 503
+    
+    response = jsonify({'success': True, 'job': github_stats.get_job(job['id']) or job})
+    response.headers['Location'] = f'/api/jobs/{job["id"]}'
+    return response, 202
+
+
+@app.route('/api/jobs/<job_id>')
+def get_job(job_id):
+    try:
+        job = github_stats.get_job(job_id)
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+    
+    if job is None:
+        return jsonify({'success': False, 'error': 'Задача не найдена или устарела'}), 404
+    response = jsonify({'success': True, 'job': job})
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+
+@app.route('/api/stats/<username>/stream')
+def stream_user_stats(username):
+    def generate():
+        for event, data in _stream_events(username):
+            yield f'event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n'
+    
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+
+def _stream_events(username):
+    """События потока; дорогая загрузка вместо потока ставится в задачу (событие job)."""
+    try:
+        if not github_stats.is_cached(username) and github_stats.needs_job(username):
+            job = github_stats.submit_job(username)
+            yield 'job', github_stats.get_job(job['id']) or job
+            return
+    except JobQueueFull:
+        yield 'error', {'error': 'Слишком много задач в очереди, повторите позже'}
+        return
+    yield from github_stats.iter_user_stats(username)
+
+
+def _invalid_logins(invalid):
+    """Ответ 400: имена, которые не могут быть логинами GitHub, в API не уходят."""
+    names = [json.dumps(u, ensure_ascii=False) for u in invalid]
+    return jsonify({
+        'success': False,
+        'error': f'Некорректные логины GitHub: {", ".join(names)}',
+        'invalid': invalid
+    }), 400
+
+
+@app.route('/api/stats/batch', methods=['POST'])
+def get_stats_batch():
+    payload = request.get_json(silent=True) or {}
+    usernames = payload.get('usernames')
+    fields = payload.get('fields') or [s for s in STATS_SECTIONS if s != 'charts']
+    
+    if not isinstance(usernames, list) or not usernames:
+        return jsonify({'success': False, 'error': 'Передайте непустой список usernames'}), 400
+    if len(usernames) > Config.BATCH_MAX_USERS:
+        return jsonify({
+            'success': False,
+            'error': f'Не более {Config.BATCH_MAX_USERS} пользователей за запрос'
+        }), 400
+    if not isinstance(fields, list) or not all(isinstance(field, str) for field in fields):
+        return jsonify({'success': False, 'error': 'fields должен быть списком строк'}), 400
+    unknown = [field for field in fields if field not in STATS_SECTIONS]
+    if unknown:
+        return jsonify({'success': False, 'error': f'Неизвестные поля: {", ".join(unknown)}'}), 400
+    
+    invalid = [u for u in usernames if not isinstance(u, str) or (u.strip() and not is_valid_login(u.strip()))]
+    if invalid:
+        return _invalid_logins(invalid)
+    usernames = list(dict.fromkeys(u.strip() for u in usernames if u.strip()))
+    
+    def generate():
+        for username, result in github_stats.iter_many_stats(usernames, sections=fields):
+            line = {'username': username, 'success': result['success']}
+            if result['success']:
+                line['data'] = {field: result['data'][field] for field in fields if field in result['data']}
+                if result.get('stale'):
+                    line['stale'] = True
+                    line['age'] = result['age']
+            else:
+                line['error'] = result['error']
+            yield json.dumps(line, ensure_ascii=False) + '\n'
+    
+    return Response(generate(), mimetype='application/x-ndjson')
+
+
+@app.route('/api/stats/<username>/charts/<name>')
+def get_chart(username, name):
+    try:
+        figure_json = github_stats.get_chart(username, name)
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+    
+    if figure_json is None:
+        return jsonify({'success': False, 'error': f'График {name} не найден'}), 404
+    
+    return Response(figure_json, mimetype='application/json')
+
+
+@app.route('/api/history/<username>')
+def get_history(username):
+    metrics_param = request.args.get('metrics')
+    names = [name.strip() for name in metrics_param.split(',') if name.strip()] if metrics_param else HISTORY_METRICS
+    unknown = [name for name in names if name not in HISTORY_METRICS]
+    if unknown:
+        return jsonify({'success': False, 'error': f'Неизвестные метрики: {", ".join(unknown)}'}), 400
+    
+    try:
+        since = _parse_date(request.args.get('from'))
+        until = _parse_date(request.args.get('to'), end_of_day=True)
+        days = request.args.get('days', type=int)
+    except ValueError:
+        return jsonify({'success': False, 'error': 'Даты указываются в формате ГГГГ-ММ-ДД'}), 400
+    if days:
+        since = max(since or 0, int(time()) - days * 24 * 3600)
+    
+    result = github_stats.get_history(username, since, until, names)
+    return jsonify(result), 200 if result['success'] else 404
+
+
+def _parse_date(value, end_of_day=False):
+    if not value:
+        return None
+    date = datetime.strptime(value, '%Y-%m-%d').replace(tzinfo=timezone.utc)
+    return int(date.timestamp()) + (24 * 3600 - 1 if end_of_day else 0)
+
+
+@app.route('/api/leaderboard')
+def get_leaderboard():
+    metric = request.args.get('metric', 'stars')
+    if metric not in LEADERBOARD_METRICS:
+        return jsonify({
+            'success': False,
+            'error': f'Неизвестная метрика: {metric}. Доступны: {", ".join(LEADERBOARD_METRICS)}'
+        }), 400
+    limit = request.args.get('limit', 50, type=int)
+    limit = max(1, min(limit, Config.LEADERBOARD_MAX_LIMIT))
+    language = request.args.get('language', '').strip() or None
+    
+    return jsonify(github_stats.get_leaderboard(metric, language, limit))
+
+
 @app.route('/api/compare/<username1>/<username2>')
 def compare_users(username1, username2):
     if not username1 or not username2:
         return jsonify({'success': False, 'error': 'Оба username обязательны'}), 400
     
     try:
-        stats1 = github_stats.get_user_stats(username1)
-        stats2 = github_stats.get_user_stats(username2)
+        stats1, stats2 = github_stats.get_many_stats([username1, username2])
         
         if not stats1['success'] or not stats2['success']:
             return jsonify({
@@ -52,6 +343,47 @@ def compare_users(username1, username2):
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+@app.route('/api/compare')
+def compare_many_users():
+    usernames = []
+    for username in request.args.get('users', '').split(','):
+        username = username.strip()
+        if username and username.lower() not in (u.lower() for u in usernames):
+            usernames.append(username)
+    
+    invalid = [username for username in usernames if not is_valid_login(username)]
+    if invalid:
+        return _invalid_logins(invalid)
+    if len(usernames) < 2:
+        return jsonify({'success': False, 'error': 'Укажите минимум двух пользователей: ?users=a,b'}), 400
+    if len(usernames) > Config.COMPARE_MAX_USERS:
+        return jsonify({
+            'success': False,
+            'error': f'Можно сравнить не более {Config.COMPARE_MAX_USERS} пользователей'
+        }), 400
+    
+    try:
+        results = github_stats.get_many_stats(usernames)
+        
+        failed = {username: result['error'] for username, result in zip(usernames, results) if not result['success']}
+        if failed:
+            return jsonify({
+                'success': False,
+                'error': 'Ошибка получения данных: ' + ', '.join(failed),
+                'errors': failed
+            }), 400
+        
+        users = [result['data'] for result in results]
+        
+        return jsonify({
+            'success': True,
+            'users': users,
+            'comparison': github_stats.compare_users(*users)
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
 @app.route('/api/cache/clear', methods=['POST'])
 def clear_cache():
     try:
@@ -61,12 +393,23 @@ def clear_cache():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+@app.route('/api/cache/stats')
+def cache_stats():
+    return jsonify({'success': True, 'cache': github_stats.cache.stats()})
+
+
+@app.route('/metrics')
+def prometheus_metrics():
+    return Response(metrics.REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+
 @app.route('/api/health')
 def health_check():
     return jsonify({
         'status': 'healthy',
         'service': 'GitHub Stats Dashboard',
-        'version': '2.0.0'
+        'version': '2.0.0',
+        'rate_limits': github_stats.client.tokens.status()
     })
 
 
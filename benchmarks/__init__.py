@@ -0,0 +1 @@
+"""Офлайн-бенчмарки GitHubStats против локального фейкового GitHub API."""
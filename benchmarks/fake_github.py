@@ -0,0 +1,225 @@
+"""Локальный фейковый GitHub API для бенчмарков.
+
+Отдает фикстуры через REST (``/users/<login>``, ``/users/<login>/repos``
+с сортировкой, пагинацией по заголовку Link и ETag / 304,
+``/repos/<owner>/<repo>/languages``) и GraphQL
+(``repositoryOwner`` с курсором и ``orderBy``). Задержка ``latency`` добавляется к
+каждому ответу, чтобы имитировать сеть до api.github.com.
+"""
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlparse
+
+from benchmarks.fixtures import LANGUAGES
+
+SORT_FIELDS = {
+    'pushed': ('pushed_at', True),
+    'updated': ('updated_at', True),
+    'created': ('created_at', True),
+    'full_name': ('full_name', False),
+}
+
+# Поле orderBy в GraphQL -> поле фикстуры; порядок тот же, что у REST
+GRAPHQL_SORT_FIELDS = {
+    'PUSHED_AT': 'pushed_at',
+    'UPDATED_AT': 'updated_at',
+    'CREATED_AT': 'created_at',
+    'NAME': 'full_name',
+}
+
+
+class FakeGitHub:
+
+    def __init__(self, fixtures, latency=0.0, host='127.0.0.1', port=0):
+        self.fixtures = {login.lower(): fixture for login, fixture in fixtures.items()}
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def reset_calls(self):
+        with self._lock:
+            calls, self.calls = self.calls, 0
+        return calls
+
+    def _count(self):
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                fake._count()
+                url = urlparse(self.path)
+                parts = url.path.strip('/').split('/')
+                fixture = fake.fixtures.get(parts[1].lower()) if len(parts) > 1 and parts[0] == 'users' else None
+
+                repo = fake._repo(parts[1], parts[2]) if len(parts) == 4 and parts[0] == 'repos' else None
+
+                if fixture and len(parts) == 2:
+                    self._send_json(fixture['user'])
+                elif fixture and len(parts) == 3 and parts[2] == 'repos':
+                    self._send_repos(url.path, parse_qs(url.query), fixture['repos'])
+                elif repo and parts[3] == 'languages':
+                    self._send_json(repo.get('languages') or _synthetic_languages(repo))
+                else:
+                    self._send_json({'message': 'Not Found'}, status=404)
+
+            def do_POST(self):
+                fake._count()
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                self._send_json(fake._graphql(body['variables']))
+
+            def _send_repos(self, path, query, repos):
+                sort = query.get('sort', ['full_name'])[0]
+                field, reverse = SORT_FIELDS.get(sort, SORT_FIELDS['full_name'])
+                repos = sorted(repos, key=lambda repo: repo[field], reverse=reverse)
+
+                per_page = int(query.get('per_page', ['30'])[0])
+                page = int(query.get('page', ['1'])[0])
+                last = max(1, -(-len(repos) // per_page))
+
+                links = []
+                for rel, number in (('next', page + 1), ('last', last)):
+                    if page < last:
+                        params = urlencode({'per_page': per_page, 'sort': sort, 'page': number})
+                        links.append(f'<http://{self.headers["Host"]}{path}?{params}>; rel="{rel}"')
+
+                start = (page - 1) * per_page
+                headers = {'Link': ', '.join(links)} if links else {}
+                self._send_json(repos[start:start + per_page], headers=headers)
+
+            def _send_json(self, payload, status=200, headers=None):
+                data = json.dumps(payload).encode()
+                etag = f'"{hashlib.md5(data).hexdigest()}"'
+                if status == 200 and self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+
+                self.send_response(status)
+                # Лимит не ограничивает бенчмарк, но пул токенов видит заголовки
+                self.send_header('X-RateLimit-Limit', '1000000')
+                self.send_header('X-RateLimit-Remaining', '1000000')
+                self.send_header('X-RateLimit-Reset', str(int(time.time()) + 3600))
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                if status == 200:
+                    self.send_header('ETag', etag)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
+
+    def _repo(self, owner, name):
+        fixture = self.fixtures.get(owner.lower())
+        if fixture is None:
+            return None
+        with self._lock:
+            if 'repo_index' not in fixture:
+                fixture['repo_index'] = {repo['name'].lower(): repo for repo in fixture['repos']}
+        return fixture['repo_index'].get(name.lower())
+
+    def _graphql(self, variables):
+        fixture = self.fixtures.get(variables['login'].lower())
+        if fixture is None:
+            return {
+                'data': {'repositoryOwner': None},
+                'errors': [{'type': 'NOT_FOUND', 'message': f'Could not resolve {variables["login"]}'}],
+            }
+
+        user = fixture['user']
+        repos = fixture['repos']
+        order = variables.get('orderBy')
+        if order:
+            repos = sorted(
+                repos,
+                key=lambda repo: repo[GRAPHQL_SORT_FIELDS[order['field']]],
+                reverse=order['direction'] == 'DESC'
+            )
+        start = int(variables.get('after') or 0)
+        end = start + variables['first']
+        is_org = user['type'] == 'Organization'
+
+        owner = {
+            '__typename': user['type'],
+            'login': user['login'],
+            'avatarUrl': user['avatar_url'],
+            'url': user['html_url'],
+            'name': user.get('name'),
+            'location': user.get('location'),
+            'email': user.get('email') or '',
+            'websiteUrl': user.get('blog') or None,
+            'createdAt': user['created_at'],
+            'repositories': {
+                'totalCount': len(repos),
+                'pageInfo': {'hasNextPage': end < len(repos), 'endCursor': str(end)},
+                'nodes': [{
+                    'name': repo['name'],
+                    'description': repo.get('description'),
+                    'url': repo['html_url'],
+                    'isFork': repo['fork'],
+                    'createdAt': repo['created_at'],
+                    'updatedAt': repo['updated_at'],
+                    'pushedAt': repo['pushed_at'],
+                    'stargazerCount': repo['stargazers_count'],
+                    'forkCount': repo['forks_count'],
+                    'primaryLanguage': {'name': repo['language']} if repo.get('language') else None,
+                } for repo in repos[start:end]],
+            },
+        }
+        if is_org:
+            owner['description'] = user.get('bio')
+        else:
+            owner.update({
+                'bio': user.get('bio'),
+                'company': user.get('company'),
+                'followers': {'totalCount': user['followers']},
+                'following': {'totalCount': user['following']},
+                'gists': {'totalCount': user['public_gists']},
+            })
+        return {'data': {'repositoryOwner': owner}}
+
+
+def _synthetic_languages(repo):
+    """Байты по языкам: основной язык репозитория и до двух случайных."""
+    rng = random.Random(repo['name'])
+    languages = {}
+    if repo.get('language'):
+        languages[repo['language']] = rng.randint(10_000, 500_000)
+    for language in rng.sample([name for name in LANGUAGES if name], rng.randint(0, 2)):
+        languages.setdefault(language, rng.randint(100, 100_000))
+    return languages
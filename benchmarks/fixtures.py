@@ -0,0 +1,136 @@
+"""Фикстуры для фейкового GitHub: синтетические или записанные с настоящего API.
+
+Фикстура — словарь ``{'user': <ответ /users/x>, 'repos': [<ответы /users/x/repos>]}``
+в формате REST API. Синтетические фикстуры детерминированы: одинаковый
+логин дает одинаковые данные, даты отсчитываются от текущего момента.
+
+Запись настоящего пользователя (нужен GITHUB_TOKEN для больших аккаунтов)::
+
+    python -m benchmarks.fixtures record torvalds --out benchmarks/recorded
+"""
+import argparse
+import json
+import os
+import random
+from datetime import datetime, timedelta, timezone
+
+LANGUAGES = ('Python', 'JavaScript', 'Go', 'Rust', 'C', 'TypeScript', 'Java', None)
+
+# Логин -> (число репозиториев, организация ли)
+SYNTHETIC = {
+    'bench-empty': (0, False),
+    'bench-small': (10, False),
+    'bench-medium': (100, False),
+    'bench-large': (1200, False),
+    'bench-org-medium': (100, True),
+    'bench-org-large': (1500, True),
+}
+
+# Организация для замера полной статистики; в остальные замеры не входит
+FULL_ORG_LOGIN = 'bench-org-huge'
+
+
+def _iso(value):
+    return value.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def synthetic_fixture(login, repo_count, organization=False, now=None):
+    rng = random.Random(login)
+    now = now or datetime.now(timezone.utc)
+    user = {
+        'login': login,
+        'type': 'Organization' if organization else 'User',
+        'name': login.replace('-', ' ').title(),
+        'bio': None if organization else 'Synthetic benchmark user',
+        'avatar_url': f'https://avatars.example/{login}',
+        'html_url': f'https://github.com/{login}',
+        'public_repos': repo_count,
+        'created_at': _iso(now - timedelta(days=3000)),
+        'location': 'Benchmark',
+        'blog': '',
+        'email': None,
+        'company': None,
+        'followers': rng.randint(0, 5000),
+        'following': rng.randint(0, 200),
+        'public_gists': rng.randint(0, 50),
+    }
+    if organization:
+        user['public_members_count'] = rng.randint(1, 300)
+
+    repos = []
+    for index in range(repo_count):
+        created = now - timedelta(days=rng.randint(0, 3000))
+        updated = created + (now - created) * rng.random()
+        stars = int(rng.paretovariate(1.2)) - 1
+        repos.append({
+            'name': f'{login}-repo-{index}',
+            'full_name': f'{login}/{login}-repo-{index}',
+            'description': None if index % 3 else f'Repository number {index}',
+            'stargazers_count': stars,
+            'watchers_count': stars,
+            'forks_count': stars // rng.randint(2, 10),
+            'language': rng.choice(LANGUAGES),
+            'html_url': f'https://github.com/{login}/{login}-repo-{index}',
+            'fork': rng.random() < 0.2,
+            'created_at': _iso(created),
+            'updated_at': _iso(updated),
+            'pushed_at': _iso(updated),
+        })
+    return {'user': user, 'repos': repos}
+
+
+def synthetic_fixtures(now=None):
+    return {
+        login: synthetic_fixture(login, count, organization, now)
+        for login, (count, organization) in SYNTHETIC.items()
+    }
+
+
+def load_fixtures(directory):
+    """Загружает записанные фикстуры ``<login>.json`` из каталога."""
+    fixtures = {}
+    for filename in sorted(os.listdir(directory)):
+        if filename.endswith('.json'):
+            with open(os.path.join(directory, filename), encoding='utf-8') as f:
+                fixture = json.load(f)
+            fixtures[fixture['user']['login']] = fixture
+    return fixtures
+
+
+def record(login, directory, token=None):
+    """Сохраняет профиль и все публичные репозитории пользователя с GitHub."""
+    from github_client import GitHubClient
+
+    client = GitHubClient(tokens=[token] if token else [])
+    user = client.get(f'/users/{login}').data
+    repos = []
+    page = 1
+    while True:
+        response = client.get(f'/users/{login}/repos', params={'per_page': 100, 'page': page})
+        repos.extend(response.data)
+        if 'next' not in response.links:
+            break
+        page += 1
+
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f'{user["login"]}.json')
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'user': user, 'repos': repos}, f, ensure_ascii=False)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Запись фикстур для бенчмарков')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    record_parser = subparsers.add_parser('record', help='записать пользователей с api.github.com')
+    record_parser.add_argument('logins', nargs='+')
+    record_parser.add_argument('--out', default=os.path.join(os.path.dirname(__file__), 'recorded'))
+    args = parser.parse_args()
+
+    token = os.getenv('GITHUB_TOKEN')
+    for login in args.logins:
+        print(record(login, args.out, token))
+
+
+if __name__ == '__main__':
+    main()
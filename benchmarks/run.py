@@ -0,0 +1,400 @@
+"""Бенчмарки GitHubStats против локального фейкового GitHub API.
+
+Запуск из корня репозитория::
+
+    python -m benchmarks.run --latency 0.05 --output results.json
+    python -m benchmarks.run --baseline results.json
+
+Измеряются холодный старт (импорт и первый /api/health в новом процессе;
+код выхода 1, если медиана больше ``--startup-budget-ms``), холодный
+промах (пустой кэш и хранилище delta, все запросы к API), обновление
+из хранилища для ``--fetch-backend delta`` (кэш пуст, хранилище
+заполнено), пропускная способность при
+попадании в кэш, задержка /api/compare и процессорное время
+``_generate_charts``, а также полная статистика организации с
+``--full-org-repos`` репозиториями: задержка /api/stats/<login>/full и
+пиковая память агрегации (tracemalloc) потоково и списком. Результаты пишутся в JSON, ``--baseline``
+печатает изменение медиан относительно прошлого запуска.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+from datetime import datetime, timezone
+from time import perf_counter, process_time
+
+from config import Config
+from benchmarks.fake_github import FakeGitHub
+from benchmarks.fixtures import (
+    FULL_ORG_LOGIN, SYNTHETIC, load_fixtures, synthetic_fixture, synthetic_fixtures
+)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Холодный старт: импорт приложения и первый /api/health в чистом интерпретаторе
+STARTUP_SCRIPT = """
+import json, resource, sys, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+status = app.app.test_client().get('/api/health').status_code
+ready = time.perf_counter()
+modules, plotly_loaded = len(sys.modules), 'plotly' in sys.modules
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+import charts
+charts._load_plotly()
+print(json.dumps({
+    'import_s': imported - start,
+    'total_s': ready - start,
+    'first_chart_import_s': time.perf_counter() - ready,
+    'status': status,
+    'modules': modules,
+    'plotly_loaded': plotly_loaded,
+    'max_rss_kb': rss,
+}))
+"""
+
+COMPARE_PAIRS = (
+    ('bench-small', 'bench-medium'),
+    ('bench-medium', 'bench-org-medium'),
+    ('bench-large', 'bench-org-large'),
+)
+
+
+def summarize(samples):
+    ordered = sorted(samples)
+    return {
+        'n': len(ordered),
+        'mean_ms': round(statistics.mean(ordered) * 1000, 3),
+        'median_ms': round(statistics.median(ordered) * 1000, 3),
+        'p95_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 3),
+        'min_ms': round(ordered[0] * 1000, 3),
+        'max_ms': round(ordered[-1] * 1000, 3),
+    }
+
+
+def _timed_get(client, path, headers=None):
+    start = perf_counter()
+    response = client.get(path, headers=headers)
+    elapsed = perf_counter() - start
+    payload = response.get_json(silent=True) if response.status_code == 200 else None
+    if response.status_code != 200 or (payload is not None and not payload.get('success')):
+        raise RuntimeError(f'{path}: {response.status_code} {response.get_data(as_text=True)[:200]}')
+    return elapsed
+
+
+def bench_startup(repeat, budget_ms):
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.check_output(
+            [sys.executable, '-c', STARTUP_SCRIPT], cwd=ROOT, text=True,
+            env=dict(os.environ, HISTORY_PATH=Config.HISTORY_PATH)
+        )
+        run = json.loads(output.strip().splitlines()[-1])
+        if run['status'] != 200:
+            raise RuntimeError(f'/api/health: {run["status"]}')
+        runs.append(run)
+    total = summarize([run['total_s'] for run in runs])
+    return {
+        'import': summarize([run['import_s'] for run in runs]),
+        'first_health': total,
+        'first_chart_import': summarize([run['first_chart_import_s'] for run in runs]),
+        'modules': runs[-1]['modules'],
+        'plotly_loaded': runs[-1]['plotly_loaded'],
+        'max_rss_kb': max(run['max_rss_kb'] for run in runs),
+        'budget_ms': budget_ms,
+        'within_budget': total['median_ms'] <= budget_ms,
+    }
+
+
+def _clear(stats):
+    """Пустой кэш и, у бэкенда delta, пустое хранилище репозиториев."""
+    stats.cache.clear()
+    store = getattr(stats.fetcher, 'store', None)
+    if store is not None:
+        store.clear()
+
+
+def bench_cold_miss(client, stats, fake, logins, repeat):
+    results = {}
+    for login in logins:
+        samples = []
+        calls = 0
+        for _ in range(repeat):
+            _clear(stats)
+            fake.reset_calls()
+            samples.append(_timed_get(client, f'/api/stats/{login}'))
+            calls = fake.reset_calls()
+        results[login] = dict(summarize(samples), github_calls=calls)
+    return results
+
+
+def bench_store_refresh(client, stats, fake, logins, repeat):
+    """Загрузка бэкендом delta при пустом кэше, но заполненном хранилище."""
+    results = {}
+    for login in logins:
+        _clear(stats)
+        _timed_get(client, f'/api/stats/{login}')
+        samples = []
+        calls = 0
+        for _ in range(repeat):
+            stats.cache.clear()
+            fake.reset_calls()
+            samples.append(_timed_get(client, f'/api/stats/{login}'))
+            calls = fake.reset_calls()
+        results[login] = dict(summarize(samples), github_calls=calls)
+    return results
+
+
+def bench_cache_hits(client, stats, logins, requests):
+    results = {}
+    headers = {'Accept-Encoding': 'gzip'}
+    for login in logins:
+        _clear(stats)
+        _timed_get(client, f'/api/stats/{login}')
+        samples = [_timed_get(client, f'/api/stats/{login}', headers) for _ in range(requests)]
+        results[login] = dict(summarize(samples), requests_per_second=round(len(samples) / sum(samples), 1))
+    return results
+
+
+def bench_compare(client, stats, pairs, repeat):
+    results = {}
+    for first, second in pairs:
+        path = f'/api/compare/{first}/{second}'
+        cold = []
+        for _ in range(repeat):
+            _clear(stats)
+            cold.append(_timed_get(client, path))
+        warm = [_timed_get(client, path) for _ in range(repeat)]
+        results[f'{first}/{second}'] = {'cold': summarize(cold), 'warm': summarize(warm)}
+    return results
+
+
+def bench_charts(stats, fixtures, logins, repeat, max_repos):
+    from models import ProfileSnapshot, RepoSnapshot, UserSnapshot
+
+    results = {}
+    for login in logins:
+        fixture = fixtures[login]
+        snapshot = UserSnapshot(
+            profile=ProfileSnapshot.from_json(fixture['user']),
+            repos=tuple(RepoSnapshot.from_json(repo) for repo in fixture['repos'][:max_repos])
+        )
+        _, chart_data = stats._aggregate_sections(snapshot)
+        stats._generate_charts(chart_data)
+
+        wall = []
+        cpu = []
+        for _ in range(repeat):
+            wall_start, cpu_start = perf_counter(), process_time()
+            stats._generate_charts(chart_data)
+            wall.append(perf_counter() - wall_start)
+            cpu.append(process_time() - cpu_start)
+        results[login] = {
+            'charts': len(chart_data),
+            'wall': summarize(wall),
+            'cpu': summarize(cpu),
+        }
+    return results
+
+
+def bench_full_org(client, stats, fake, fixture, repeat):
+    login = fixture['user']['login']
+    samples = []
+    calls = 0
+    for _ in range(repeat):
+        _clear(stats)
+        fake.reset_calls()
+        samples.append(_timed_get(client, f'/api/stats/{login}/full'))
+        calls = fake.reset_calls()
+
+    repos = fixture['repos']
+    memory = {}
+    for count in sorted({min(1000, len(repos)), len(repos)}):
+        memory[str(count)] = {
+            'streaming': _aggregation_cost(repos[:count], streaming=True),
+            'list': _aggregation_cost(repos[:count], streaming=False),
+        }
+    return {'repos': len(repos), 'latency': dict(summarize(samples), github_calls=calls), 'memory': memory}
+
+
+def _aggregation_cost(items, streaming, page_size=100):
+    """Пиковая память и процессорное время агрегации без сети.
+
+    Потоково: страницы по ``page_size`` превращаются в снимки и сразу
+    агрегируются. Списком: сначала все снимки, потом ``aggregate``, как в
+    обычном режиме.
+    """
+    from aggregation import RepoAccumulator, RepoDistribution, aggregate
+    from models import RepoSnapshot
+
+    def run_streaming():
+        accumulator = RepoAccumulator(starred_limit=Config.FULL_STATS_SCATTER_REPOS)
+        distribution = RepoDistribution()
+        for offset in range(0, len(items), page_size):
+            page = [RepoSnapshot.from_json(item) for item in items[offset:offset + page_size]]
+            accumulator.add(page)
+            distribution.add(page)
+        accumulator.result()
+        distribution.result()
+
+    def run_list():
+        aggregate([RepoSnapshot.from_json(item) for item in items])
+
+    fn = run_streaming if streaming else run_list
+    # Время — без tracemalloc: трассировка замедляет каждое выделение памяти
+    start = process_time()
+    fn()
+    cpu = process_time() - start
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {'peak_kb': round(peak / 1024, 1), 'cpu_ms': round(cpu * 1000, 3)}
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _medians(node, prefix=''):
+    """Плоский словарь ``путь -> median_ms`` для сравнения с прошлым запуском."""
+    if isinstance(node, dict) and 'median_ms' in node:
+        yield prefix, node['median_ms']
+    elif isinstance(node, dict):
+        for key, value in node.items():
+            yield from _medians(value, f'{prefix}.{key}' if prefix else key)
+
+
+def print_comparison(current, baseline):
+    old = dict(_medians(baseline['results']))
+    print(f'\nСравнение с {baseline["meta"].get("commit") or "baseline"} (медианы, мс):')
+    for path, value in _medians(current['results']):
+        if path in old and old[path]:
+            change = (value - old[path]) / old[path] * 100
+            print(f'  {path:<60} {old[path]:>10.2f} -> {value:>10.2f}  {change:+6.1f}%')
+
+
+def run(args):
+    fixtures = synthetic_fixtures()
+    if args.fixtures:
+        fixtures.update(load_fixtures(args.fixtures))
+
+    full_org = synthetic_fixture(FULL_ORG_LOGIN, args.full_org_repos, organization=True) \
+        if args.full_org_repos else None
+    fake = FakeGitHub(dict(fixtures, **{FULL_ORG_LOGIN: full_org}) if full_org else fixtures,
+                      latency=args.latency).start()
+    Config.GITHUB_API_URL = fake.url
+    Config.GITHUB_GRAPHQL_URL = f'{fake.url}/graphql'
+    Config.GITHUB_TOKENS = ['benchmark-token']
+    Config.CACHE_BACKEND = 'memory'
+    Config.FETCH_BACKEND = args.fetch_backend
+    Config.CHARTS_MODE = args.charts_mode
+    # Замеряется сама загрузка, а не постановка фоновой задачи
+    Config.JOB_REPO_THRESHOLD = sys.maxsize
+    # История и хранилище delta синтетических пользователей не должны попасть в рабочий каталог
+    work_dir = tempfile.TemporaryDirectory(prefix='benchmark-')
+    Config.HISTORY_PATH = os.path.join(work_dir.name, 'history')
+    Config.REPO_STORE_PATH = os.path.join(work_dir.name, 'repos.sqlite3')
+    if args.max_repos:
+        Config.MAX_REPOS = args.max_repos
+
+    # Импорт после настройки Config: app создает GitHubStats при загрузке
+    import app as dashboard
+
+    import charts
+
+    client = dashboard.app.test_client()
+    stats = dashboard.github_stats
+    # Импорт plotly при первом графике измеряется в startup, не в cold_miss
+    charts._load_plotly()
+    logins = [login for login in fixtures if not args.only or login in args.only]
+
+    try:
+        results = {
+            'startup': bench_startup(args.repeat, args.startup_budget_ms),
+            'cold_miss': bench_cold_miss(client, stats, fake, logins, args.repeat),
+            'cache_hit': bench_cache_hits(client, stats, logins, args.hit_requests),
+            'compare': bench_compare(
+                client, stats,
+                [pair for pair in COMPARE_PAIRS if set(pair) <= set(logins)],
+                args.repeat
+            ),
+            'generate_charts': bench_charts(stats, fixtures, logins, args.repeat, Config.MAX_REPOS),
+        }
+        if Config.FETCH_BACKEND == 'delta':
+            results['store_refresh'] = bench_store_refresh(client, stats, fake, logins, args.repeat)
+        if full_org:
+            results['full_org'] = bench_full_org(client, stats, fake, full_org, args.repeat)
+    finally:
+        fake.stop()
+        work_dir.cleanup()
+
+    return {
+        'meta': {
+            'commit': _git_commit(),
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'latency_s': args.latency,
+            'max_repos': Config.MAX_REPOS,
+            'fetch_backend': Config.FETCH_BACKEND,
+            'charts_mode': Config.CHARTS_MODE,
+            'fixtures': {login: len(fixtures[login]['repos']) for login in logins},
+        },
+        'results': results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Офлайн-бенчмарки GitHub Stats Dashboard')
+    parser.add_argument('--latency', type=float, default=0.05, help='задержка ответа фейкового API, с')
+    parser.add_argument('--repeat', type=int, default=5, help='повторов для холодных замеров')
+    parser.add_argument('--hit-requests', type=int, default=500, help='запросов при замере попаданий')
+    parser.add_argument('--max-repos', type=int, default=None, help='переопределить MAX_REPOS')
+    parser.add_argument('--fetch-backend', default=Config.FETCH_BACKEND, choices=('rest', 'graphql', 'delta'))
+    parser.add_argument('--charts-mode', default=Config.CHARTS_MODE, choices=('inline', 'lazy'))
+    parser.add_argument('--fixtures', help='каталог с записанными фикстурами <login>.json')
+    parser.add_argument('--only', nargs='+', help=f'только эти логины (по умолчанию: {", ".join(SYNTHETIC)})')
+    parser.add_argument('--startup-budget-ms', type=float, default=500,
+                        help='бюджет холодного старта (импорт + первый /api/health), мс')
+    parser.add_argument('--full-org-repos', type=int, default=10000,
+                        help='репозиториев в организации для замера полной статистики (0 — пропустить)')
+    parser.add_argument('--output', default='benchmark-results.json')
+    parser.add_argument('--baseline', help='JSON прошлого запуска для сравнения')
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f'Результаты записаны в {args.output}')
+
+    startup = report['results']['startup']
+    print(f'Холодный старт: {startup["first_health"]["median_ms"]:.0f} мс '
+          f'(бюджет {startup["budget_ms"]:.0f} мс), plotly загружен: {startup["plotly_loaded"]}')
+    full_org = report['results'].get('full_org')
+    if full_org:
+        print(f'Полная статистика, {full_org["repos"]} репозиториев: '
+              f'{full_org["latency"]["median_ms"]:.0f} мс, {full_org["latency"]["github_calls"]} запросов к API')
+        for count, cost in full_org['memory'].items():
+            print(f'  агрегация {count}: потоково {cost["streaming"]["peak_kb"]:.0f} КБ, '
+                  f'списком {cost["list"]["peak_kb"]:.0f} КБ')
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            print_comparison(report, json.load(f))
+    return 0 if startup['within_budget'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,33 +1,382 @@
-from datetime import datetime, timedelta
-from threading import Lock
+import pickle
+import sqlite3
+import sys
+from collections import OrderedDict
+from threading import Event, Lock, local
+from time import monotonic, time
+
+
+def estimate_size(value):
+    """Приблизительный размер значения в байтах (рекурсивно по контейнерам)."""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(estimate_size(item) for item in value)
+    return size
 
 
 class SimpleCache:
-    def __init__(self, ttl_seconds=3600):
-        self._cache = {}
+    """In-memory LRU кэш с TTL и ограничением по числу записей и объему.
+
+    Время жизни считается по монотонным часам; просроченные записи
+    вычищаются не реже раза в ``purge_interval`` секунд.
+    """
+
+    def __init__(self, ttl_seconds=3600, max_entries=None, max_bytes=None, purge_interval=60):
+        self._cache = OrderedDict()
         self._lock = Lock()
+        self._bytes = 0
         self.ttl = ttl_seconds
-    
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.purge_interval = purge_interval
+        self._next_purge = monotonic() + purge_interval
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
     def get(self, key):
         with self._lock:
-            if key in self._cache:
-                data, timestamp = self._cache[key]
-                if datetime.now() - timestamp < timedelta(seconds=self.ttl):
+            now = monotonic()
+            self._maybe_purge(now)
+            entry = self._cache.get(key)
+            if entry is not None:
+                data, expires_at, _ = entry
+                if now < expires_at:
+                    self._cache.move_to_end(key)
+                    self.hits += 1
                     return data
-                else:
-                    del self._cache[key]
+                self._remove(key)
+                self.expirations += 1
+            self.misses += 1
             return None
-    
-    def set(self, key, value):
+
+    def set(self, key, value, ttl=None):
+        size = estimate_size(value)
         with self._lock:
-            self._cache[key] = (value, datetime.now())
-    
+            now = monotonic()
+            self._maybe_purge(now)
+            if key in self._cache:
+                self._remove(key)
+            if self.max_bytes is not None and size > self.max_bytes:
+                return
+            expires_at = now + (self.ttl if ttl is None else ttl)
+            self._cache[key] = (value, expires_at, size)
+            self._bytes += size
+            self._evict()
+
     def clear(self):
         with self._lock:
             self._cache.clear()
-    
+            self._bytes = 0
+
     def delete(self, key):
         with self._lock:
             if key in self._cache:
-                del self._cache[key]
+                self._remove(key)
+
+    def items(self, prefix):
+        """Живые записи с ключом на ``prefix``, без учета в hits/misses."""
+        now = monotonic()
+        with self._lock:
+            return [
+                (key, data) for key, (data, expires_at, _) in self._cache.items()
+                if key.startswith(prefix) and now < expires_at
+            ]
+
+    def stats(self):
+        with self._lock:
+            return {
+                'backend': 'memory',
+                'entries': len(self._cache),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
+
+    def _remove(self, key):
+        _, _, size = self._cache.pop(key)
+        self._bytes -= size
+
+    def _evict(self):
+        while self._cache and (
+            (self.max_entries is not None and len(self._cache) > self.max_entries)
+            or (self.max_bytes is not None and self._bytes > self.max_bytes)
+        ):
+            _, (_, _, size) = self._cache.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
+
+    def _maybe_purge(self, now):
+        if now < self._next_purge:
+            return
+        self._next_purge = now + self.purge_interval
+        expired = [key for key, (_, expires_at, _) in self._cache.items() if expires_at <= now]
+        for key in expired:
+            self._remove(key)
+        self.expirations += len(expired)
+
+
+class SQLiteCache:
+    """Кэш в файле SQLite, общий для всех воркеров и переживающий рестарт.
+
+    Значения хранятся в pickle. Срок жизни считается по ``time.time()``,
+    так как монотонные часы разных процессов несравнимы. При превышении
+    лимитов первыми вытесняются записи, которые раньше всех истекают.
+    """
+
+    def __init__(self, path, ttl_seconds=3600, max_entries=None, max_bytes=None, purge_interval=60):
+        self.path = path
+        self.ttl = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.purge_interval = purge_interval
+        self._local = local()
+        self._lock = Lock()
+        self._next_purge = monotonic() + purge_interval
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        with self._connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS cache ('
+                'key TEXT PRIMARY KEY, value BLOB NOT NULL, '
+                'expires_at REAL NOT NULL, size INTEGER NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS cache_expires_at ON cache (expires_at)')
+
+    def get(self, key):
+        now = time()
+        self._maybe_purge(now)
+        row = self._connect().execute(
+            'SELECT value, expires_at FROM cache WHERE key = ?', (key,)
+        ).fetchone()
+        if row is not None:
+            if now < row[1]:
+                self._count('hits')
+                return pickle.loads(row[0])
+            self.delete(key)
+            self._count('expirations')
+        self._count('misses')
+        return None
+
+    def set(self, key, value, ttl=None):
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if self.max_bytes is not None and len(blob) > self.max_bytes:
+            self.delete(key)
+            return
+        now = time()
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO cache (key, value, expires_at, size) VALUES (?, ?, ?, ?)',
+                (key, blob, expires_at, len(blob))
+            )
+            self._evict(conn)
+        self._maybe_purge(now)
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute('DELETE FROM cache')
+
+    def delete(self, key):
+        with self._connect() as conn:
+            conn.execute('DELETE FROM cache WHERE key = ?', (key,))
+
+    def items(self, prefix):
+        rows = self._connect().execute(
+            'SELECT key, value FROM cache WHERE substr(key, 1, ?) = ? AND expires_at > ?',
+            (len(prefix), prefix, time())
+        ).fetchall()
+        return [(key, pickle.loads(value)) for key, value in rows]
+
+    def stats(self):
+        entries, size = self._connect().execute(
+            'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache'
+        ).fetchone()
+        return {
+            'backend': 'sqlite',
+            'entries': entries,
+            'bytes': size,
+            'max_entries': self.max_entries,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+        }
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _count(self, counter, amount=1):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + amount)
+
+    def _evict(self, conn):
+        evicted = 0
+        if self.max_entries is not None:
+            evicted += conn.execute(
+                'DELETE FROM cache WHERE key IN ('
+                'SELECT key FROM cache ORDER BY expires_at DESC LIMIT -1 OFFSET ?)',
+                (self.max_entries,)
+            ).rowcount
+        if self.max_bytes is not None:
+            evicted += conn.execute(
+                'DELETE FROM cache WHERE key IN ('
+                'SELECT key FROM (SELECT key, SUM(size) OVER (ORDER BY expires_at DESC) AS total '
+                'FROM cache) WHERE total > ?)',
+                (self.max_bytes,)
+            ).rowcount
+        if evicted:
+            self._count('evictions', evicted)
+
+    def _maybe_purge(self, now):
+        with self._lock:
+            if monotonic() < self._next_purge:
+                return
+            self._next_purge = monotonic() + self.purge_interval
+        with self._connect() as conn:
+            purged = conn.execute('DELETE FROM cache WHERE expires_at <= ?', (now,)).rowcount
+        self._count('expirations', purged)
+
+
+class RedisCache:
+    """Кэш в Redis (или совместимом по протоколу хранилище).
+
+    Срок жизни и вытеснение обеспечивает сам сервер (TTL ключей и
+    ``maxmemory-policy``); все ключи приложения живут под ``prefix``.
+    """
+
+    def __init__(self, url, ttl_seconds=3600, prefix='ghstats:'):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError('Для CACHE_BACKEND=redis установите пакет redis') from e
+        self._client = redis.Redis.from_url(url)
+        self._lock = Lock()
+        self.ttl = ttl_seconds
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        blob = self._client.get(self.prefix + key)
+        with self._lock:
+            if blob is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return pickle.loads(blob)
+
+    def set(self, key, value, ttl=None):
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        expires = max(1, int(self.ttl if ttl is None else ttl))
+        self._client.set(self.prefix + key, blob, ex=expires)
+
+    def clear(self):
+        keys = list(self._client.scan_iter(match=self.prefix + '*', count=500))
+        for start in range(0, len(keys), 500):
+            self._client.delete(*keys[start:start + 500])
+
+    def delete(self, key):
+        self._client.delete(self.prefix + key)
+
+    def items(self, prefix):
+        keys = list(self._client.scan_iter(match=self.prefix + prefix + '*', count=500))
+        items = []
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            for key, blob in zip(chunk, self._client.mget(chunk)):
+                # Ключ мог истечь между SCAN и MGET
+                if blob is not None:
+                    items.append((key.decode()[len(self.prefix):], pickle.loads(blob)))
+        return items
+
+    def stats(self):
+        return {
+            'backend': 'redis',
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+
+def create_cache(backend='memory', ttl_seconds=3600, max_entries=None, max_bytes=None,
+                 purge_interval=60, path=None, url=None):
+    if backend == 'memory':
+        return SimpleCache(
+            ttl_seconds=ttl_seconds,
+            max_entries=max_entries,
+            max_bytes=max_bytes,
+            purge_interval=purge_interval
+        )
+    if backend == 'sqlite':
+        return SQLiteCache(
+            path,
+            ttl_seconds=ttl_seconds,
+            max_entries=max_entries,
+            max_bytes=max_bytes,
+            purge_interval=purge_interval
+        )
+    if backend == 'redis':
+        return RedisCache(url, ttl_seconds=ttl_seconds)
+    raise ValueError(f'Unknown cache backend: {backend}')
+
+
+class _Call:
+    __slots__ = ('event', 'result', 'error')
+
+    def __init__(self):
+        self.event = Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Объединяет одновременные вызовы с одинаковым ключом в один.
+
+    Первый вызов выполняет функцию, остальные ждут его результата
+    (или исключения) не дольше ``timeout`` секунд.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._calls = {}
+
+    def do(self, key, fn, timeout=None):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            if not call.event.wait(timeout):
+                raise TimeoutError(f'Timed out waiting for in-flight call {key!r}')
+            if call.error is not None:
+                raise call.error
+            return call.result
 
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
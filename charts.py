@@ -0,0 +1,273 @@
+from aggregation import CHART_TOP_COUNT
+
+# plotly (а с plotly.express и pandas) импортируется при первом построении
+# графика, а не при старте воркера; см. _load_plotly
+go = None
+px = None
+
+CHART_NAMES = (
+    'languages_pie', 'top_repos_bar', 'activity_timeline', 'stars_vs_forks',
+    'repos_by_year', 'stars_forks_grouped', 'weekly_activity', 'repo_types_pie',
+)
+
+DARK_LAYOUT = dict(
+    template='plotly_dark',
+    paper_bgcolor='rgba(0,0,0,0)',
+    plot_bgcolor='rgba(0,0,0,0)',
+    font=dict(color='white', size=12),
+)
+
+
+def build_chart_data(agg):
+    """Компактные данные графиков: только списки чисел и подписей, без Plotly."""
+    data = {}
+
+    if agg.languages:
+        data['languages_pie'] = {
+            'labels': list(agg.languages.keys()),
+            'values': list(agg.languages.values()),
+        }
+
+    top_repos = agg.top_repos[:CHART_TOP_COUNT]
+    if top_repos:
+        data['top_repos_bar'] = {
+            'names': [repo.name for repo in top_repos],
+            'stars': [repo.stars for repo in top_repos],
+        }
+
+    if agg.monthly_activity:
+        data['activity_timeline'] = {
+            'months': list(agg.monthly_activity.keys()),
+            'counts': list(agg.monthly_activity.values()),
+        }
+
+    repos_with_stars = agg.starred_repos or agg.first_repos
+    if repos_with_stars:
+        data['stars_vs_forks'] = {
+            'names': [repo.name for repo in repos_with_stars],
+            'stars': [repo.stars for repo in repos_with_stars],
+            'forks': [repo.forks for repo in repos_with_stars],
+        }
+
+    if agg.total_repos:
+        data['repos_by_year'] = {
+            'years': [str(year) for year in agg.repos_by_year],
+            'counts': list(agg.repos_by_year.values()),
+        }
+        data['stars_forks_grouped'] = {
+            'names': [repo.name[:20] for repo in top_repos],
+            'stars': [repo.stars for repo in top_repos],
+            'forks': [repo.forks for repo in top_repos],
+        }
+
+    if sum(agg.weekly_pattern.values()) > 0:
+        data['weekly_activity'] = {'counts': list(agg.weekly_pattern.values())}
+
+    if sum(agg.repo_types.values()) > 0:
+        data['repo_types_pie'] = {'values': list(agg.repo_types.values())}
+
+    return data
+
+
+def _load_plotly():
+    global go, px
+    if go is None:
+        import plotly.express
+        import plotly.graph_objects
+        px = plotly.express
+        go = plotly.graph_objects
+
+
+def build_figure(name, data):
+    _load_plotly()
+    return _FIGURE_BUILDERS[name](data)
+
+
+def render_html(fig):
+    return fig.to_html(full_html=False, include_plotlyjs='cdn')
+
+
+def render_json(fig):
+    return fig.to_json()
+
+
+def _languages_pie(data):
+    fig = px.pie(
+        values=data['values'],
+        names=data['labels'],
+        title='Распределение языков программирования',
+        hole=0.4,
+        color_discrete_sequence=px.colors.qualitative.Set3
+    )
+    fig.update_layout(**DARK_LAYOUT)
+    return fig
+
+
+def _top_repos_bar(data):
+    repo_stars = data['stars']
+
+    if sum(repo_stars) == 0:
+        colors = ['#5865f2'] * len(repo_stars)
+    else:
+        colors = repo_stars
+
+    fig = go.Figure(data=[
+        go.Bar(
+            x=repo_stars,
+            y=data['names'],
+            orientation='h',
+            marker=dict(
+                color=colors,
+                colorscale='Viridis',
+                showscale=(sum(repo_stars) > 0)
+            ),
+            text=repo_stars,
+            textposition='auto'
+        )
+    ])
+    fig.update_layout(
+        title='Топ 10 репозиториев по звездам',
+        xaxis_title='Количество звезд',
+        yaxis_title='Репозиторий',
+        **DARK_LAYOUT,
+        height=400
+    )
+    return fig
+
+
+def _activity_timeline(data):
+    fig = go.Figure(data=[
+        go.Scatter(
+            x=data['months'],
+            y=data['counts'],
+            mode='lines+markers',
+            line=dict(color='#00d4ff', width=3),
+            marker=dict(size=8, color='#00d4ff'),
+            fill='tozeroy',
+            fillcolor='rgba(0, 212, 255, 0.3)'
+        )
+    ])
+    fig.update_layout(
+        title='Активность обновления репозиториев (последний год)',
+        xaxis_title='Месяц',
+        yaxis_title='Количество обновлений',
+        **DARK_LAYOUT,
+        height=350
+    )
+    return fig
+
+
+def _stars_vs_forks(data):
+    stars = data['stars']
+    fig = go.Figure(data=[
+        go.Scatter(
+            x=stars,
+            y=data['forks'],
+            mode='markers',
+            marker=dict(
+                size=[min(s + 5, 30) for s in stars],
+                color=stars,
+                colorscale='Plasma',
+                showscale=True,
+                colorbar=dict(title="Звезды")
+            ),
+            text=data['names'],
+            hovertemplate='<b>%{text}</b><br>Звезды: %{x}<br>Форки: %{y}<extra></extra>'
+        )
+    ])
+    fig.update_layout(
+        title='Звезды vs Форки',
+        xaxis_title='Звезды',
+        yaxis_title='Форки',
+        **DARK_LAYOUT,
+        height=400
+    )
+    return fig
+
+
+def _repos_by_year(data):
+    counts = data['counts']
+    fig = go.Figure(data=[
+        go.Bar(
+            x=data['years'],
+            y=counts,
+            marker=dict(
+                color=counts,
+                colorscale='Blues',
+                showscale=False
+            ),
+            text=counts,
+            textposition='auto'
+        )
+    ])
+    fig.update_layout(
+        title='Репозитории по годам создания',
+        xaxis_title='Год',
+        yaxis_title='Количество репозиториев',
+        **DARK_LAYOUT,
+        height=350
+    )
+    return fig
+
+
+def _stars_forks_grouped(data):
+    fig = go.Figure(data=[
+        go.Bar(name='Звезды', x=data['names'], y=data['stars'], marker_color='#ffd700'),
+        go.Bar(name='Форки', x=data['names'], y=data['forks'], marker_color='#5865f2')
+    ])
+    fig.update_layout(
+        title='Топ 10: Звезды и Форки',
+        xaxis_title='Репозиторий',
+        yaxis_title='Количество',
+        barmode='group',
+        **DARK_LAYOUT,
+        height=400
+    )
+    return fig
+
+
+def _weekly_activity(data):
+    days_ru = ['Пн', 'Вт', 'Ср', 'Чт', 'Пт', 'Сб', 'Вс']
+    counts = data['counts']
+    fig = go.Figure(data=[
+        go.Bar(
+            x=days_ru,
+            y=counts,
+            marker=dict(
+                color=['#5865f2' if i < 5 else '#43b581' for i in range(7)],
+            ),
+            text=counts,
+            textposition='auto'
+        )
+    ])
+    fig.update_layout(
+        title='Активность по дням недели',
+        xaxis_title='День недели',
+        yaxis_title='Обновлений репозиториев',
+        **DARK_LAYOUT,
+        height=350
+    )
+    return fig
+
+
+def _repo_types_pie(data):
+    fig = px.pie(
+        values=data['values'],
+        names=['Собственные', 'Форки'],
+        title='Типы репозиториев',
+        color_discrete_sequence=['#5865f2', '#43b581']
+    )
+    fig.update_layout(**DARK_LAYOUT)
+    return fig
+
+
+_FIGURE_BUILDERS = {
+    'languages_pie': _languages_pie,
+    'top_repos_bar': _top_repos_bar,
+    'activity_timeline': _activity_timeline,
+    'stars_vs_forks': _stars_vs_forks,
+    'repos_by_year': _repos_by_year,
+    'stars_forks_grouped': _stars_forks_grouped,
+    'weekly_activity': _weekly_activity,
+    'repo_types_pie': _repo_types_pie,
+}
@@ -8,6 +8,92 @@ class Config:
     SECRET_KEY = os.getenv('SECRET_KEY', 'your-secret-key-here-change-in-production')
     DEBUG = os.getenv('DEBUG', 'True') == 'True'
     GITHUB_TOKEN = os.getenv('GITHUB_TOKEN', None)
+    # Несколько токенов через запятую; запросы распределяются по остатку лимита
+    GITHUB_TOKENS = [t.strip() for t in os.getenv('GITHUB_TOKENS', '').split(',') if t.strip()] \
+        or ([GITHUB_TOKEN] if GITHUB_TOKEN else [])
+    # Сколько секунд ждать сброса лимита, если все токены исчерпаны
+    RATE_LIMIT_MAX_WAIT = 5
+    GITHUB_API_URL = os.getenv('GITHUB_API_URL', 'https://api.github.com')
+    GITHUB_GRAPHQL_URL = os.getenv('GITHUB_GRAPHQL_URL', None)
+    # rest — REST API с условными запросами, graphql — один запрос GraphQL (нужен токен),
+    # delta — локальная копия репозиториев в SQLite, обновляемая по изменениям
+    FETCH_BACKEND = os.getenv('FETCH_BACKEND', 'rest')
+    REPO_STORE_PATH = os.getenv('REPO_STORE_PATH', 'repos.sqlite3')
+    # Сколько репозиториев владельца хранить и размер страницы при поиске изменений
+    REPO_STORE_MAX_REPOS = int(os.getenv('REPO_STORE_MAX_REPOS', 1000))
+    DELTA_PAGE_SIZE = 10
+    GITHUB_TIMEOUT = 15
+    HTTP_POOL_SIZE = 32
+    # Данные свежие CACHE_TIMEOUT секунд; до CACHE_STALE_TIMEOUT отдаются
+    # устаревшими, пока фоновый пул обновляет их
     CACHE_TIMEOUT = 3600
+    CACHE_STALE_TIMEOUT = int(os.getenv('CACHE_STALE_TIMEOUT', 24 * 3600))
+    REFRESH_WORKERS = 4
+    REFRESH_QUEUE_MAX = 32
+    # memory — кэш внутри процесса, sqlite — общий файл, redis — внешний сервер
+    CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'memory')
+    CACHE_PATH = os.getenv('CACHE_PATH', 'cache.sqlite3')
+    CACHE_REDIS_URL = os.getenv('CACHE_REDIS_URL', 'redis://localhost:6379/0')
+    CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', 1000))
+    CACHE_MAX_BYTES = int(os.getenv('CACHE_MAX_BYTES', 128 * 1024 * 1024))
+    CACHE_PURGE_INTERVAL = 60
+    # Результаты статистики хранятся в кэше упакованными (packed_stats);
+    # секции больше CACHE_COMPRESS_MIN_SIZE байт сжимаются zlib
+    CACHE_COMPRESS_MIN_SIZE = 1024
+    CACHE_COMPRESS_LEVEL = 6
+    # Сколько хранить ETag / Last-Modified и данные для условных запросов
+    REVALIDATE_TTL = 24 * 3600
+    # Сколько секунд ждать уже идущую загрузку того же пользователя
+    INFLIGHT_TIMEOUT = 60
     MAX_REPOS = 100
+    # Порядок, в котором GitHub отдает репозитории: created, updated, pushed,
+    # full_name. От него зависит, какие MAX_REPOS репозиториев попадут в статистику
+    REPOS_SORT = os.getenv('REPOS_SORT', 'pushed')
+    FETCH_WORKERS = 4
+    # Полная статистика (/api/stats/<username>/full) обходит все страницы
+    # репозиториев, но не больше FULL_STATS_MAX_REPOS; на графике звезд и
+    # форков остаются FULL_STATS_SCATTER_REPOS самых звездных
+    FULL_STATS_MAX_REPOS = int(os.getenv('FULL_STATS_MAX_REPOS', 20000))
+    FULL_STATS_SCATTER_REPOS = 200
+    FULL_STATS_TIMEOUT = 300
+    # Побайтовая разбивка языков (секция language_bytes): запрос на каждый
+    # репозиторий, LANGUAGE_WORKERS параллельно, ответы кэшируются по pushed_at.
+    # Что не успело за LANGUAGE_BUDGET секунд, отдается частично и догружается в фоне
+    LANGUAGE_BYTES = os.getenv('LANGUAGE_BYTES', 'False') == 'True'
+    LANGUAGE_WORKERS = 8
+    LANGUAGE_BUDGET = float(os.getenv('LANGUAGE_BUDGET', 3.0))
+    LANGUAGE_CACHE_TTL = 7 * 24 * 3600
+    # Разбивки хранятся в своем кэше в памяти, по записи на репозиторий
+    LANGUAGE_CACHE_MAX_ENTRIES = int(os.getenv('LANGUAGE_CACHE_MAX_ENTRIES', 20000))
+    # Фоновые задачи: загрузки, где придется обработать не меньше
+    # JOB_REPO_THRESHOLD репозиториев (или с ?async=1), отвечают 202 и id
+    # задачи, которую строят JOB_WORKERS потоков; в очереди до JOB_QUEUE_MAX
+    JOB_REPO_THRESHOLD = int(os.getenv('JOB_REPO_THRESHOLD', 500))
+    JOB_WORKERS = int(os.getenv('JOB_WORKERS', 2))
+    JOB_QUEUE_MAX = 16
+    JOB_TTL = 600
+    COMPARE_MAX_USERS = 20
+    COMPARE_WORKERS = 8
+    BATCH_MAX_USERS = 500
+    BATCH_WORKERS = 8
     TOP_REPOS_COUNT = 10
+    LEADERBOARD_MAX_LIMIT = 100
+    # Сколько пользователей держит рейтинг в памяти; давно не обновлявшиеся вытесняются
+    LEADERBOARD_MAX_USERS = int(os.getenv('LEADERBOARD_MAX_USERS', 50000))
+    # Как часто рейтинг пересобирается из записей общего кэша (одинаков у всех воркеров)
+    LEADERBOARD_SYNC_INTERVAL = int(os.getenv('LEADERBOARD_SYNC_INTERVAL', 30))
+    # Каталог истории метрик пользователей (пусто — не вести историю); все точки
+    # хранятся HISTORY_RAW_DAYS дней, до HISTORY_DAILY_DAYS — по одной за день,
+    # дальше — по одной за неделю
+    HISTORY_PATH = os.getenv('HISTORY_PATH', '')
+    HISTORY_RAW_DAYS = 30
+    HISTORY_DAILY_DAYS = 365
+    # Ответы /api/stats больше COMPRESS_MIN_SIZE байт сжимаются gzip или brotli
+    # (если установлен пакет brotli); сжатые байты хранятся в кэше
+    COMPRESS_MIN_SIZE = 1024
+    GZIP_LEVEL = 6
+    BROTLI_QUALITY = 5
+    # Заголовок Server-Timing с длительностью этапов (GitHub, агрегация, графики)
+    SERVER_TIMING = os.getenv('SERVER_TIMING', 'False') == 'True'
+    # 'inline' — HTML графиков в ответе /api/stats, 'lazy' — JSON по запросу
+    CHARTS_MODE = os.getenv('CHARTS_MODE', 'inline')
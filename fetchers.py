@@ -0,0 +1,429 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from threading import Lock
+from urllib.parse import parse_qs, urlparse
+from config import Config
+from github_client import GitHubAPIError
+from models import FetchState, ProfileSnapshot, RepoSnapshot, UserSnapshot, parse_datetime
+from repo_store import RepoStore, repo_row
+
+MAX_PAGE_SIZE = 100
+
+
+class RestFetcher:
+    """Загружает профиль и репозитории через REST API.
+
+    Если передано состояние прошлой загрузки, каждый запрос делается
+    условным; на 304 переиспользуются ранее сохраненные данные.
+    """
+
+    def __init__(self, client, max_repos=None):
+        self.client = client
+        self.max_repos = max_repos or Config.MAX_REPOS
+        self.page_size = min(MAX_PAGE_SIZE, self.max_repos)
+        self._pool = None
+        self._pool_lock = Lock()
+
+    def fetch(self, username, previous=None, on_profile=None):
+        etag, last_modified = previous.user_validator if previous else (None, None)
+        response = self.client.get(f'/users/{username}', etag=etag, last_modified=last_modified)
+
+        if response.not_modified:
+            profile = previous.snapshot.profile
+        else:
+            profile = ProfileSnapshot.from_json(response.data)
+        user_validator = (response.etag or etag, response.last_modified or last_modified)
+        if on_profile:
+            on_profile(profile)
+
+        repos, pages, repos_changed = self._fetch_repos(profile.login, previous)
+
+        return FetchState(
+            snapshot=UserSnapshot(profile=profile, repos=repos),
+            user_validator=user_validator,
+            pages=pages,
+            not_modified=response.not_modified and not repos_changed,
+        )
+
+    def _fetch_repos(self, login, previous):
+        """Загружает не больше ``max_repos`` репозиториев.
+
+        Первая страница запрашивается сразу; число страниц берется из ссылки
+        ``rel="last"`` заголовка Link, и остальные нужные страницы грузятся
+        параллельно.
+        """
+        previous_pages = previous.pages if previous else ()
+        previous_repos = previous.snapshot.repos if previous else ()
+        params = {'per_page': self.page_size}
+        if Config.REPOS_SORT:
+            params['sort'] = Config.REPOS_SORT
+
+        first = self._fetch_page(login, 1, params, previous_pages)
+        wanted = -(-self.max_repos // self.page_size)
+        last_page = min(wanted, first[1][3])
+
+        results = [first]
+        if last_page > 1:
+            results.extend(self._map(
+                lambda page: self._fetch_page(login, page, params, previous_pages),
+                range(2, last_page + 1)
+            ))
+
+        previous_offsets = [0]
+        for stored in previous_pages:
+            previous_offsets.append(previous_offsets[-1] + stored[2])
+
+        repos = []
+        pages = []
+        changed = len(results) != len(previous_pages)
+        for page, (page_repos, validator) in enumerate(results, start=1):
+            if page_repos is None:
+                start = previous_offsets[page - 1]
+                page_repos = previous_repos[start:start + validator[2]]
+            else:
+                changed = True
+            repos.extend(page_repos)
+            pages.append(validator)
+
+        return tuple(repos[:self.max_repos]), tuple(pages), changed
+
+    def _fetch_page(self, login, page, params, previous_pages):
+        """Возвращает ``(repos, validator)``; ``repos`` равно None на 304."""
+        stored = previous_pages[page - 1] if page <= len(previous_pages) else None
+        etag, last_modified = stored[:2] if stored else (None, None)
+        response = self.client.get(
+            f'/users/{login}/repos',
+            params=dict(params, page=page),
+            etag=etag,
+            last_modified=last_modified
+        )
+
+        if response.not_modified:
+            _, _, count, last_page = stored
+            page_repos = None
+        else:
+            page_repos = [RepoSnapshot.from_json(item) for item in response.data]
+            count = len(page_repos)
+            last_page = _page_number(response.links.get('last'), default=page)
+
+        validator = (response.etag or etag, response.last_modified or last_modified, count, last_page)
+        return page_repos, validator
+
+    def stream(self, username, max_repos):
+        """Профиль и генератор страниц всех репозиториев (не больше ``max_repos``).
+
+        В отличие от ``fetch`` репозитории не собираются в один список:
+        страницы грузятся окнами по FETCH_WORKERS, следующее окно качается,
+        пока обрабатывается текущее, поэтому в памяти не больше двух окон.
+        """
+        profile = ProfileSnapshot.from_json(self.client.get(f'/users/{username}').data)
+        return profile, self._iter_pages(profile.login, max_repos)
+
+    def _iter_pages(self, login, max_repos):
+        params = {'per_page': MAX_PAGE_SIZE}
+        if Config.REPOS_SORT:
+            params['sort'] = Config.REPOS_SORT
+
+        def fetch_page(page):
+            return self._fetch_page(login, page, params, ())[0]
+
+        first, validator = self._fetch_page(login, 1, params, ())
+        last_page = min(-(-max_repos // MAX_PAGE_SIZE), validator[3])
+        remaining = max_repos - len(first)
+        yield first[:max_repos]
+
+        step = Config.FETCH_WORKERS
+        windows = [range(start, min(start + step, last_page + 1)) for start in range(2, last_page + 1, step)]
+        pending = self._submit(fetch_page, windows[0]) if windows else []
+        for index in range(len(windows)):
+            futures = pending
+            pending = self._submit(fetch_page, windows[index + 1]) if index + 1 < len(windows) else []
+            for future in futures:
+                if remaining <= 0:
+                    return
+                page_repos = future.result()[:remaining]
+                remaining -= len(page_repos)
+                yield page_repos
+
+    def _map(self, fn, items):
+        return [future.result() for future in self._submit(fn, items)]
+
+    def _submit(self, fn, items):
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=Config.FETCH_WORKERS,
+                    thread_name_prefix='repo-pages'
+                )
+        # Контекст копируется, чтобы тайминги страниц попали в текущий запрос
+        return [self._pool.submit(copy_context().run, fn, item) for item in items]
+
+
+class DeltaFetcher(RestFetcher):
+    """Синхронизирует репозитории с локальным RepoStore по изменениям.
+
+    Список репозиториев запрашивается в порядке ``updated`` маленькими
+    страницами и читается до первого репозитория, который не изменился с
+    прошлой синхронизации; изменения сливаются в хранилище. Если первая
+    страница не изменилась (304), дальше ничего не запрашивается. Если
+    сохраненных репозиториев больше ``public_repos`` профиля (удаление,
+    переименование) или в списке не нашлось ни одного неизмененного, список
+    загружается заново целиком. Меньше — нормально: ``public_repos``
+    учитывает и репозитории, которых нет в списке.
+    """
+
+    def __init__(self, client, store, max_repos=None, page_size=None, max_stored=None):
+        super().__init__(client, max_repos)
+        self.store = store
+        self.delta_page_size = min(MAX_PAGE_SIZE, page_size or Config.DELTA_PAGE_SIZE)
+        self.max_stored = max_stored or Config.REPO_STORE_MAX_REPOS
+
+    def fetch(self, username, previous=None, on_profile=None):
+        etag, last_modified = previous.user_validator if previous else (None, None)
+        response = self.client.get(f'/users/{username}', etag=etag, last_modified=last_modified)
+
+        if response.not_modified:
+            profile = previous.snapshot.profile
+        else:
+            profile = ProfileSnapshot.from_json(response.data)
+        if on_profile:
+            on_profile(profile)
+
+        changed = self._sync(profile)
+
+        return FetchState(
+            snapshot=UserSnapshot(
+                profile=profile,
+                repos=self.store.load(profile.login, Config.REPOS_SORT, self.max_repos)
+            ),
+            user_validator=(response.etag or etag, response.last_modified or last_modified),
+            pages=(),
+            not_modified=response.not_modified and not changed,
+        )
+
+    def _sync(self, profile):
+        """Обновляет хранилище; возвращает True, если репозитории изменились."""
+        login = profile.login
+        expected = min(profile.public_repos, self.max_stored)
+        state = self.store.sync_state(login)
+        if state is None:
+            self._full_sync(login)
+            return True
+
+        known = self.store.updated_at(login)
+        changed, head_etag, anchored = self._fetch_changed(login, known, state[1])
+        if changed is None:
+            if len(known) <= expected:
+                return False
+        elif not anchored:
+            # Список прочитан до конца или до лимита хранилища — это и есть новое содержимое
+            self.store.merge(login, changed[:self.max_stored], head_etag, replace=True)
+            return bool(changed or known)
+        else:
+            self.store.merge(login, changed, head_etag, max_repos=self.max_stored)
+            if self.store.count(login) <= expected:
+                return bool(changed)
+
+        self._full_sync(login)
+        return True
+
+    def _fetch_changed(self, login, known, head_etag):
+        """Изменившиеся с прошлой синхронизации репозитории.
+
+        Возвращает ``(rows, head_etag, anchored)``; ``rows`` равно None, если
+        первая страница не изменилась, ``anchored`` — нашелся ли в списке
+        неизмененный репозиторий (иначе ``rows`` — весь список).
+        """
+        rows = []
+        page = 1
+        while True:
+            response = self.client.get(
+                f'/users/{login}/repos',
+                params={'sort': 'updated', 'per_page': self.delta_page_size, 'page': page},
+                etag=head_etag if page == 1 else None
+            )
+            if response.not_modified:
+                return None, head_etag, True
+            if page == 1:
+                head_etag = response.etag
+
+            for item in response.data:
+                if known.get(item['name']) == item.get('updated_at'):
+                    return rows, head_etag, True
+                rows.append(repo_row(item))
+
+            if 'next' not in response.links or len(rows) >= self.max_stored:
+                return rows, head_etag, False
+            page += 1
+
+    def _full_sync(self, login):
+        params = {'sort': 'updated', 'per_page': MAX_PAGE_SIZE}
+        head_etag = None
+        if self.delta_page_size != MAX_PAGE_SIZE:
+            # Валидатор первой маленькой страницы: следующая дельта обойдется 304.
+            # Запрашивается до списка, чтобы изменения между ними не потерялись
+            head_etag = self.client.get(
+                f'/users/{login}/repos',
+                params={'sort': 'updated', 'per_page': self.delta_page_size, 'page': 1}
+            ).etag
+        first = self.client.get(f'/users/{login}/repos', params=dict(params, page=1))
+        if self.delta_page_size == MAX_PAGE_SIZE:
+            head_etag = first.etag
+        last_page = min(
+            _page_number(first.links.get('last'), default=1),
+            -(-self.max_stored // MAX_PAGE_SIZE)
+        )
+
+        pages = [first.data]
+        if last_page > 1:
+            pages.extend(self._map(
+                lambda page: self.client.get(f'/users/{login}/repos', params=dict(params, page=page)).data,
+                range(2, last_page + 1)
+            ))
+
+        rows = [repo_row(item) for page in pages for item in page][:self.max_stored]
+        self.store.merge(login, rows, head_etag, replace=True)
+
+
+def _page_number(link, default):
+    if not link:
+        return default
+    query = parse_qs(urlparse(link['url']).query)
+    return int(query.get('page', [default])[0])
+
+
+GRAPHQL_ORDER = {
+    'pushed': {'field': 'PUSHED_AT', 'direction': 'DESC'},
+    'updated': {'field': 'UPDATED_AT', 'direction': 'DESC'},
+    'created': {'field': 'CREATED_AT', 'direction': 'DESC'},
+    'full_name': {'field': 'NAME', 'direction': 'ASC'},
+}
+
+OWNER_QUERY = """
+query($login: String!, $first: Int!, $after: String, $orderBy: RepositoryOrder) {
+  repositoryOwner(login: $login) {
+    __typename
+    login
+    avatarUrl
+    url
+    ... on User {
+      name bio company location email websiteUrl createdAt
+      followers { totalCount }
+      following { totalCount }
+      gists(privacy: PUBLIC) { totalCount }
+    }
+    ... on Organization {
+      name description location email websiteUrl createdAt
+    }
+    repositories(first: $first, after: $after, privacy: PUBLIC,
+                 ownerAffiliations: OWNER, orderBy: $orderBy) {
+      totalCount
+      pageInfo { hasNextPage endCursor }
+      nodes {
+        name description url isFork createdAt updatedAt pushedAt
+        stargazerCount forkCount
+        primaryLanguage { name }
+      }
+    }
+  }
+}
+"""
+
+
+class GraphQLFetcher:
+    """Загружает профиль и первые ``max_repos`` репозиториев запросом GraphQL.
+
+    Профиль и до 100 репозиториев приходят за один запрос; следующие
+    страницы догружаются по курсору. Результат — тот же FetchState, что у
+    RestFetcher, но без валидаторов: GraphQL не поддерживает условные запросы.
+    """
+
+    def __init__(self, client, max_repos=None):
+        self.client = client
+        self.max_repos = max_repos or Config.MAX_REPOS
+        self.page_size = min(MAX_PAGE_SIZE, self.max_repos)
+
+    def fetch(self, username, previous=None, on_profile=None):
+        variables = {
+            'login': username,
+            'first': self.page_size,
+            'after': None,
+            'orderBy': GRAPHQL_ORDER.get(Config.REPOS_SORT),
+        }
+        profile = None
+        repos = []
+
+        while True:
+            data = self.client.graphql(OWNER_QUERY, variables)['repositoryOwner']
+            if data is None:
+                raise GitHubAPIError(404, 'Not Found')
+            if profile is None:
+                profile = _profile_from_graphql(data)
+                if on_profile:
+                    on_profile(profile)
+
+            connection = data['repositories']
+            repos.extend(_repo_from_graphql(node) for node in connection['nodes'])
+
+            page_info = connection['pageInfo']
+            if len(repos) >= self.max_repos or not page_info['hasNextPage']:
+                break
+            variables['after'] = page_info['endCursor']
+            variables['first'] = min(MAX_PAGE_SIZE, self.max_repos - len(repos))
+
+        return FetchState(
+            snapshot=UserSnapshot(profile=profile, repos=tuple(repos[:self.max_repos])),
+            user_validator=(None, None),
+            pages=(),
+            not_modified=False,
+        )
+
+
+def _profile_from_graphql(owner):
+    is_org = owner['__typename'] == 'Organization'
+    return ProfileSnapshot(
+        login=owner['login'],
+        name=owner.get('name'),
+        bio=owner.get('description') if is_org else owner.get('bio'),
+        avatar_url=owner['avatarUrl'],
+        html_url=owner['url'],
+        public_repos=owner['repositories']['totalCount'],
+        created_at=parse_datetime(owner.get('createdAt')),
+        location=owner.get('location'),
+        blog=owner.get('websiteUrl'),
+        is_organization=is_org,
+        email=owner.get('email') or None,
+        public_members=0,
+        followers=0 if is_org else owner['followers']['totalCount'],
+        following=0 if is_org else owner['following']['totalCount'],
+        public_gists=0 if is_org else owner['gists']['totalCount'],
+        company=None if is_org else owner.get('company'),
+    )
+
+
+def _repo_from_graphql(node):
+    stars = node['stargazerCount']
+    return RepoSnapshot(
+        name=node['name'],
+        description=node.get('description'),
+        stars=stars,
+        forks=node['forkCount'],
+        # В REST watchers_count исторически равен числу звезд
+        watchers=stars,
+        language=(node.get('primaryLanguage') or {}).get('name'),
+        html_url=node['url'],
+        fork=node['isFork'],
+        created_at=parse_datetime(node['createdAt']),
+        updated_at=parse_datetime(node['updatedAt']),
+        pushed_at=parse_datetime(node.get('pushedAt')),
+    )
+
+
+def create_fetcher(backend, client):
+    if backend == 'rest':
+        return RestFetcher(client)
+    if backend == 'graphql':
+        return GraphQLFetcher(client)
+    if backend == 'delta':
+        return DeltaFetcher(client, RepoStore(Config.REPO_STORE_PATH))
+    raise ValueError(f'Unknown fetch backend: {backend}')
@@ -1,113 +1,630 @@
-from github import Github, GithubException
-from collections import Counter, defaultdict
-from datetime import datetime, timedelta, timezone
-import plotly.graph_objects as go
-import plotly.express as px
+import pickle
+import zlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextvars import copy_context
+from queue import Queue
+from threading import Lock, Thread
+from time import perf_counter, time
+import requests
 from config import Config
-from cache import SimpleCache
+from cache import SingleFlight, create_cache
+from github_client import GitHubAPIError, GitHubClient, RateLimitExceeded
+from fetchers import RestFetcher, create_fetcher
+from models import FetchState
+from aggregation import aggregate, CHART_TOP_COUNT, RepoAccumulator, RepoDistribution
+from leaderboard import Leaderboard, leaderboard_record
+from packed_stats import PackedStats
+from repo_languages import RepoLanguages
+from jobs import JobManager
+from history import HISTORY_METRICS, HistoryStore, format_timestamp, history_values, trend
+import charts
+import metrics
+
+SECTION_NAMES = ('profile', 'repositories', 'languages', 'activity')
+# Секции, которые есть в результате только при включенной настройке
+OPTIONAL_SECTION_NAMES = ('language_bytes',)
+
+
+# Секции, по которым строится рейтинг (см. leaderboard_values)
+LEADERBOARD_SECTIONS = ('profile', 'repositories', 'languages')
+
+
+def _noop(*args):
+    pass
+
+
+def _unpack(result, sections=None):
+    """Результат из кэша: упакованный декодируется, старый словарь — как есть."""
+    if isinstance(result, PackedStats):
+        return {'success': True, 'data': result.sections(sections)}
+    return result
+
+
+def _unpack_revalidation(entry):
+    """Запись revalidate_* с распакованным снимком, секциями и данными графиков."""
+    if entry is None or 'sections' in entry:
+        # Записи, сохраненные до упаковки, хранят все как есть
+        return entry
+    fetch = entry['fetch']
+    aggregated = entry['aggregated'].sections()
+    return {
+        'fetch': FetchState(
+            snapshot=pickle.loads(zlib.decompress(entry['snapshot'])),
+            user_validator=fetch.user_validator,
+            pages=fetch.pages,
+            not_modified=fetch.not_modified
+        ),
+        'sections': aggregated['sections'],
+        'chart_data': aggregated['chart_data'],
+        'fetched_at': entry['fetched_at'],
+    }
 
 
 class GitHubStats:
     
-    def __init__(self, token=None):
-        self.github = Github(token) if token else Github()
-        self.user = None
-        self.repos = []
-        self.cache = SimpleCache(ttl_seconds=Config.CACHE_TIMEOUT)
-        
-    def get_user_stats(self, username):
-        cache_key = f'user_stats_{username}'
-        cached_data = self.cache.get(cache_key)
-        
-        if cached_data:
-            return cached_data
-        
+    def __init__(self, token=None, tokens=None):
+        self.client = GitHubClient(tokens=tokens or ([token] if token else []))
+        self.fetcher = create_fetcher(Config.FETCH_BACKEND, self.client)
+        self.cache = create_cache(
+            Config.CACHE_BACKEND,
+            ttl_seconds=Config.CACHE_TIMEOUT,
+            max_entries=Config.CACHE_MAX_ENTRIES,
+            max_bytes=Config.CACHE_MAX_BYTES,
+            purge_interval=Config.CACHE_PURGE_INTERVAL,
+            path=Config.CACHE_PATH,
+            url=Config.CACHE_REDIS_URL
+        )
+        self.history = HistoryStore(
+            Config.HISTORY_PATH,
+            raw_days=Config.HISTORY_RAW_DAYS,
+            daily_days=Config.HISTORY_DAILY_DAYS
+        ) if Config.HISTORY_PATH else None
+        self.leaderboard = Leaderboard(max_users=Config.LEADERBOARD_MAX_USERS)
+        self.repo_languages = RepoLanguages(
+            self.client,
+            create_cache(
+                'memory',
+                ttl_seconds=Config.LANGUAGE_CACHE_TTL,
+                max_entries=Config.LANGUAGE_CACHE_MAX_ENTRIES
+            ),
+            workers=Config.LANGUAGE_WORKERS,
+            ttl=Config.LANGUAGE_CACHE_TTL
+        ) if Config.LANGUAGE_BYTES else None
+        self.jobs = JobManager(
+            self.cache,
+            workers=Config.JOB_WORKERS,
+            max_pending=Config.JOB_QUEUE_MAX,
+            ttl=Config.JOB_TTL
+        )
+        self._inflight = SingleFlight()
+        self._refresh_lock = Lock()
+        self._refreshing = set()
+        self._refresh_pool = None
+        self._full_fetcher = None
+        self._leaderboard_lock = Lock()
+        self._leaderboard_synced_at = 0
+        
+    def get_user_stats(self, username, sections=None):
+        return self.get_user_stats_entry(username, sections)[0]
+    
+    def get_user_stats_entry(self, username, sections=None):
+        """Возвращает ``(result, fetched_at)``.
+        
+        ``fetched_at`` — время загрузки данных из GitHub, по нему считается
+        оставшийся срок свежести; None, если результат не попал в кэш.
+        ``sections`` — какие секции ``data`` нужны (None — все); из кэша
+        декодируются только они.
+        """
+        cache_key = f'user_stats_{username.lower()}'
+        entry = self.cache.get(cache_key)
+        
+        if entry:
+            age = time() - entry['fetched_at']
+            if age < Config.CACHE_TIMEOUT:
+                # Записи, сохраненные в кэш без записи рейтинга
+                if username not in self.leaderboard:
+                    self._update_leaderboard(_unpack(entry['result'], LEADERBOARD_SECTIONS)['data'], entry['fetched_at'])
+                return _unpack(entry['result'], sections), entry['fetched_at']
+            self._schedule_refresh(username)
+            return dict(_unpack(entry['result'], sections), stale=True, age=int(age)), entry['fetched_at']
+        
+        result = self._load_user_stats(username)
+        if not result['success'] or result.get('stale'):
+            return result, None
+        entry = self.cache.get(cache_key)
+        return (_unpack(entry['result'], sections), entry['fetched_at']) if entry else (result, None)
+    
+    def _schedule_refresh(self, username):
+        key = username.lower()
+        with self._refresh_lock:
+            if key in self._refreshing or len(self._refreshing) >= Config.REFRESH_QUEUE_MAX:
+                return False
+            if self._refresh_pool is None:
+                self._refresh_pool = ThreadPoolExecutor(
+                    max_workers=Config.REFRESH_WORKERS,
+                    thread_name_prefix='stats-refresh'
+                )
+            self._refreshing.add(key)
+        self._refresh_pool.submit(self._refresh, username)
+        return True
+    
+    def _refresh(self, username):
+        try:
+            self._load_user_stats(username)
+        finally:
+            with self._refresh_lock:
+                self._refreshing.discard(username.lower())
+    
+    def iter_user_stats(self, username):
+        """Выдает события ``(name, data)`` по мере готовности частей статистики.
+        
+        Порядок: ``profile``, ``repositories``, ``languages``, ``activity``,
+        затем ``chart`` на каждый график (или один ``charts`` в ленивом
+        режиме) и ``done``; при ошибке — ``error``.
+        """
+        if self.cache.get(f'user_stats_{username.lower()}'):
+            yield from self._result_events(self.get_user_stats(username), set())
+            return
+        
+        events = Queue()
+        
+        def run():
+            result = {'success': False, 'error': 'Неожиданная ошибка'}
+            try:
+                result = self._load_user_stats(username, progress=lambda *event: events.put(event))
+            finally:
+                events.put(('result', result))
+        
+        Thread(target=run, name='stats-stream', daemon=True).start()
+        sent = set()
+        while True:
+            name, data = events.get()
+            if name == 'result':
+                yield from self._result_events(data, sent)
+                return
+            sent.add(data['name'] if name == 'chart' else name)
+            yield name, data
+    
+    def _result_events(self, result, sent):
+        """События готового результата, которые еще не были отправлены."""
+        if not result['success']:
+            yield 'error', {'error': result['error']}
+            return
+        
+        data = result['data']
+        for name in SECTION_NAMES + OPTIONAL_SECTION_NAMES:
+            if name in data and name not in sent:
+                yield name, data[name]
+        if data.get('charts_mode') == 'lazy':
+            if 'charts' not in sent:
+                yield 'charts', {'charts_mode': 'lazy', 'chart_names': data['chart_names']}
+        else:
+            for name, html in data['charts'].items():
+                if name not in sent:
+                    yield 'chart', {'name': name, 'html': html}
+        yield 'done', {'stale': result.get('stale', False), 'age': result.get('age', 0)}
+    
+    def _load_user_stats(self, username, progress=None):
         try:
-            self.user = self.github.get_user(username)
-            self.repos = list(self.user.get_repos())[:Config.MAX_REPOS]
+            return self._inflight.do(
+                username.lower(),
+                lambda: self._build_user_stats(username, progress or _noop),
+                timeout=Config.INFLIGHT_TIMEOUT
+            )
+        except TimeoutError:
+            return {'success': False, 'error': 'Превышено время ожидания данных GitHub'}
+    
+    def _build_user_stats(self, username, progress=_noop):
+        with metrics.track() as timings:
+            try:
+                return self._build_user_stats_tracked(username, progress)
+            finally:
+                metrics.GITHUB_CALLS_PER_LOAD.observe(timings.calls)
+    
+    def _build_user_stats_tracked(self, username, progress):
+        key = username.lower()
+        try:
+            revalidate_key = f'revalidate_{key}'
+            previous = _unpack_revalidation(self.cache.get(revalidate_key))
+            with metrics.stage_timer('fetch'):
+                state = self.fetcher.fetch(
+                    username,
+                    previous['fetch'] if previous else None,
+                    on_profile=lambda profile: progress('profile', self._get_profile_info(profile))
+                )
             
-            stats = {
-                'profile': self._get_profile_info(),
-                'repositories': self._get_repositories_stats(),
-                'languages': self._get_languages_stats(),
-                'activity': self._get_activity_stats(),
-                'charts': self._generate_charts()
+            if state.not_modified and previous:
+                sections, chart_data = previous['sections'], previous['chart_data']
+            else:
+                with metrics.stage_timer('aggregate'):
+                    sections, chart_data = self._aggregate_sections(state.snapshot)
+            for name in SECTION_NAMES[1:]:
+                progress(name, sections[name])
+            if self.repo_languages is not None:
+                with metrics.stage_timer('languages'):
+                    sections, chart_data = self._add_language_bytes(state.snapshot, sections, chart_data)
+                progress('language_bytes', sections['language_bytes'])
+            
+            fetched_at = time()
+            self._record_history(key, sections, fetched_at)
+            self._update_leaderboard(sections, fetched_at)
+            self.cache.set(revalidate_key, self._pack_revalidation(state, sections, chart_data, fetched_at),
+                           ttl=Config.REVALIDATE_TTL)
+            
+            packed = None
+            if state.not_modified and previous and sections == previous['sections']:
+                packed = self._previous_result(key)
+            if packed is None:
+                result = self._compose_result(key, sections, chart_data, progress)
+                packed = self._pack(result['data'])
+            else:
+                result = _unpack(packed)
+            self.cache.set(f'user_stats_{key}', {
+                'result': packed,
+                'fetched_at': fetched_at
+            }, ttl=Config.CACHE_STALE_TIMEOUT)
+            return result
+            
+        except RateLimitExceeded as e:
+            stale = self._stale_result(key)
+            if stale:
+                return stale
+            return {'success': False, 'error': f'Ошибка GitHub API: {str(e)}'}
+        except GitHubAPIError as e:
+            return {'success': False, 'error': f'Ошибка GitHub API: {str(e)}'}
+        except Exception as e:
+            return {'success': False, 'error': f'Неожиданная ошибка: {str(e)}'}
+    
+    def _record_history(self, key, sections, fetched_at):
+        if self.history is None:
+            return
+        try:
+            self.history.append(key, history_values(sections), fetched_at)
+        except OSError:
+            # История не должна ломать выдачу статистики
+            pass
+    
+    def get_history(self, username, since=None, until=None, metrics=HISTORY_METRICS):
+        """Ряды метрик и тренды из локальной истории, без запросов к GitHub."""
+        if self.history is None:
+            return {'success': False, 'error': 'История метрик отключена'}
+        data = self.history.query(username, since, until, metrics)
+        if data is None:
+            return {'success': False, 'error': f'История для {username} не найдена'}
+        
+        timestamps = data['timestamps']
+        return {
+            'success': True,
+            'data': {
+                'login': username,
+                'points': len(timestamps),
+                'series': dict(
+                    {name: data[name].tolist() for name in metrics},
+                    timestamps=[format_timestamp(t) for t in timestamps]
+                ),
+                'trend': {name: trend(timestamps, data[name]) for name in metrics}
             }
+        }
+    
+    def get_full_stats(self, username, progress=None):
+        """Статистика по всем репозиториям (до FULL_STATS_MAX_REPOS) с распределениями.
+        
+        Страницы репозиториев агрегируются по мере загрузки и сразу
+        отбрасываются, поэтому память не растет с числом репозиториев.
+        Загрузка всегда идет через REST: страницы GraphQL нельзя качать
+        параллельно.
+        """
+        key = username.lower()
+        entry = self.cache.get(f'user_full_{key}')
+        if entry:
+            return _unpack(entry)
+        try:
+            return self._inflight.do(
+                f'full:{key}',
+                lambda: self._build_full_stats(username, progress or _noop),
+                timeout=Config.FULL_STATS_TIMEOUT
+            )
+        except TimeoutError:
+            return {'success': False, 'error': 'Превышено время ожидания данных GitHub'}
+    
+    def _build_full_stats(self, username, progress=_noop):
+        with metrics.track() as timings:
+            try:
+                return self._build_full_stats_tracked(username, progress)
+            finally:
+                metrics.GITHUB_CALLS_PER_LOAD.observe(timings.calls)
+    
+    def _build_full_stats_tracked(self, username, progress):
+        key = username.lower()
+        if self._full_fetcher is None:
+            self._full_fetcher = RestFetcher(self.client, max_repos=Config.FULL_STATS_MAX_REPOS)
+        try:
+            started = perf_counter()
+            aggregate_seconds = 0.0
+            profile, pages = self._full_fetcher.stream(username, Config.FULL_STATS_MAX_REPOS)
+            progress('profile', self._get_profile_info(profile))
+            accumulator = RepoAccumulator(
+                top_count=max(Config.TOP_REPOS_COUNT, CHART_TOP_COUNT),
+                starred_limit=Config.FULL_STATS_SCATTER_REPOS
+            )
+            distribution = RepoDistribution()
+            for page in pages:
+                page_started = perf_counter()
+                accumulator.add(page)
+                distribution.add(page)
+                aggregate_seconds += perf_counter() - page_started
+                progress('pages', {'repos_analyzed': accumulator.total_repos})
+            # Загрузка и агрегация чередуются, поэтому этапы считаются вручную
+            for stage, seconds in (('fetch', perf_counter() - started - aggregate_seconds),
+                                   ('aggregate', aggregate_seconds)):
+                metrics.STAGE_SECONDS.observe(seconds, stage=stage)
+                metrics.record(stage, seconds)
             
+            agg = accumulator.result()
+            stats = {
+                'profile': self._get_profile_info(profile),
+                'repositories': self._get_repositories_stats(agg),
+                'languages': self._get_languages_stats(agg),
+                'activity': self._get_activity_stats(agg),
+                'distribution': dict(
+                    distribution.result(),
+                    truncated=profile.public_repos > agg.total_repos
+                ),
+            }
+            stats['charts'] = self._generate_charts(charts.build_chart_data(agg))
             result = {'success': True, 'data': stats}
-            self.cache.set(cache_key, result)
+            self.cache.set(f'user_full_{key}', self._pack(stats), ttl=Config.CACHE_TIMEOUT)
             return result
-            
-        except GithubException as e:
+        
+        except GitHubAPIError as e:
             return {'success': False, 'error': f'Ошибка GitHub API: {str(e)}'}
         except Exception as e:
             return {'success': False, 'error': f'Неожиданная ошибка: {str(e)}'}
     
-    def _get_profile_info(self):
-        is_org = self.user.type == 'Organization'
+    def is_cached(self, username, full=False):
+        return self.cache.get(f'user_{"full" if full else "stats"}_{username.lower()}') is not None
+    
+    def needs_job(self, username, full=False):
+        """Дорогая ли загрузка: по числу репозиториев, которые придется обработать."""
+        limit = Config.FULL_STATS_MAX_REPOS if full else Config.MAX_REPOS
+        if limit < Config.JOB_REPO_THRESHOLD:
+            return False
+        return min(self._estimate_repos(username), limit) >= Config.JOB_REPO_THRESHOLD
+    
+    def _estimate_repos(self, username):
+        key = username.lower()
+        previous = self.cache.get(f'revalidate_{key}')
+        if previous:
+            if 'public_repos' in previous:
+                return previous['public_repos']
+            return previous['fetch'].snapshot.profile.public_repos
+        count = self.cache.get(f'user_repo_count_{key}')
+        if count is None:
+            try:
+                count = self.client.get(f'/users/{username}').data.get('public_repos', 0)
+            except (GitHubAPIError, requests.RequestException):
+                # Ошибку покажет обычная загрузка
+                return 0
+            self.cache.set(f'user_repo_count_{key}', count, ttl=Config.CACHE_TIMEOUT)
+        return count
+    
+    def submit_job(self, username, full=False):
+        """Ставит загрузку в фоновую очередь; результат попадет в обычный кэш."""
+        key = username.lower()
+        if full:
+            fn = lambda progress: self.get_full_stats(username, progress)
+        else:
+            fn = lambda progress: self._load_user_stats(username, progress)
+        kind = 'full' if full else 'stats'
+        return self.jobs.submit(f'{kind}:{key}', fn, kind=kind, username=username)
+    
+    def get_job(self, job_id):
+        """Состояние задачи; у выполненной — и результат из кэша.
+        
+        Опрос никогда не запускает загрузку: если результат уже вытеснен
+        из кэша, задача отдается со статусом ``expired``.
+        """
+        state = self.jobs.get(job_id)
+        if state is None:
+            return None
+        state = dict(state, elapsed=round((state.get('finished_at') or time()) - state['created_at'], 3))
+        if state['status'] == 'done':
+            result = self._job_result(state)
+            if result is None:
+                state.update(status='expired', error='Результат задачи больше не в кэше, запустите загрузку заново')
+            else:
+                state['result'] = result
+        return state
+    
+    def _job_result(self, state):
+        key = state['username'].lower()
+        if state['kind'] == 'full':
+            entry = self.cache.get(f'user_full_{key}')
+            return _unpack(entry) if entry else None
+        entry = self.cache.get(f'user_stats_{key}')
+        if not entry:
+            return None
+        age = time() - entry['fetched_at']
+        if age < Config.CACHE_TIMEOUT:
+            return _unpack(entry['result'])
+        return dict(_unpack(entry['result']), stale=True, age=int(age))
+    
+    def get_leaderboard(self, metric, language=None, limit=50):
+        """Рейтинг пользователей, статистика которых уже загружалась."""
+        synced_at = self._sync_leaderboard()
+        total, leaders = self.leaderboard.top(metric, language, limit)
+        return {
+            'success': True,
+            'data': {
+                'metric': metric,
+                'language': self.leaderboard.language_name(language) if language else None,
+                'total': total,
+                'leaders': leaders,
+                'synced_at': format_timestamp(synced_at)
+            }
+        }
+    
+    def _update_leaderboard(self, sections, fetched_at):
+        record = leaderboard_record(sections, fetched_at)
+        # Через общий кэш (sqlite, redis) запись попадет в рейтинг остальных воркеров
+        self.cache.set(f'leaderboard_{record["login"].lower()}', record, ttl=Config.CACHE_STALE_TIMEOUT)
+        self.leaderboard.update(record)
+    
+    def _sync_leaderboard(self):
+        """Пересобирает рейтинг из записей кэша не чаще LEADERBOARD_SYNC_INTERVAL.
+
+        Так рейтинг одинаков у всех воркеров, переживает перезапуск и
+        теряет пользователей, чьи записи вытеснены из кэша.
+        """
+        with self._leaderboard_lock:
+            now = time()
+            if now - self._leaderboard_synced_at >= Config.LEADERBOARD_SYNC_INTERVAL:
+                records = [record for _, record in self.cache.items('leaderboard_')]
+                self.leaderboard.rebuild(records, since=now)
+                self._leaderboard_synced_at = now
+            return self._leaderboard_synced_at
+    
+    def _compose_result(self, key, sections, chart_data, progress=_noop):
+        stats = dict(sections)
+        if Config.CHARTS_MODE == 'lazy':
+            self.cache.set(f'user_charts_{key}', chart_data, ttl=Config.CACHE_STALE_TIMEOUT)
+            for name in charts.CHART_NAMES:
+                self.cache.delete(f'user_chart_{key}_{name}')
+            stats['charts_mode'] = 'lazy'
+            stats['chart_names'] = list(chart_data)
+            stats['charts'] = {}
+            progress('charts', {'charts_mode': 'lazy', 'chart_names': stats['chart_names']})
+        else:
+            stats['charts'] = self._generate_charts(chart_data, progress)
+        return {'success': True, 'data': stats}
+    
+    def _pack(self, data):
+        return PackedStats.pack(
+            data,
+            compress_min_size=Config.CACHE_COMPRESS_MIN_SIZE,
+            level=Config.CACHE_COMPRESS_LEVEL
+        )
+    
+    def _previous_result(self, key):
+        """Прошлый упакованный результат с готовыми графиками, если данные не менялись.
+
+        Нужен только во встроенном режиме: там графики отрисовываются заново
+        на каждую загрузку, а в ленивом сборка результата и так дешевая.
+        """
+        if Config.CHARTS_MODE == 'lazy':
+            return None
+        entry = self.cache.get(f'user_stats_{key}')
+        if entry and isinstance(entry['result'], PackedStats) and 'charts_mode' not in entry['result'].names():
+            return entry['result']
+        return None
+    
+    def _pack_revalidation(self, state, sections, chart_data, fetched_at):
+        """Запись для условных запросов: живыми остаются только валидаторы.
+
+        Снимок нужен фетчеру лишь при следующем обновлении, секции и данные
+        графиков — только при 304, поэтому они хранятся упакованными.
+        """
+        return {
+            'fetch': FetchState(
+                snapshot=None,
+                user_validator=state.user_validator,
+                pages=state.pages,
+                not_modified=state.not_modified
+            ),
+            'snapshot': zlib.compress(
+                pickle.dumps(state.snapshot, pickle.HIGHEST_PROTOCOL),
+                Config.CACHE_COMPRESS_LEVEL
+            ),
+            'public_repos': state.snapshot.profile.public_repos,
+            'aggregated': self._pack({'sections': sections, 'chart_data': chart_data}),
+            'fetched_at': fetched_at
+        }
+    
+    def _stale_result(self, key):
+        """Последние известные данные, когда лимит запросов GitHub исчерпан."""
+        entry = self.cache.get(f'user_stats_{key}')
+        if entry:
+            return dict(_unpack(entry['result']), stale=True, age=int(time() - entry['fetched_at']))
+        
+        previous = _unpack_revalidation(self.cache.get(f'revalidate_{key}'))
+        if previous:
+            result = self._compose_result(key, previous['sections'], previous['chart_data'])
+            return dict(result, stale=True, age=int(time() - previous['fetched_at']))
+        return None
+    
+    def _aggregate_sections(self, snapshot):
+        agg = aggregate(snapshot.repos, top_count=max(Config.TOP_REPOS_COUNT, CHART_TOP_COUNT))
+        sections = {
+            'profile': self._get_profile_info(snapshot.profile),
+            'repositories': self._get_repositories_stats(agg),
+            'languages': self._get_languages_stats(agg),
+            'activity': self._get_activity_stats(agg),
+        }
+        return sections, charts.build_chart_data(agg)
+    
+    def _add_language_bytes(self, snapshot, sections, chart_data):
+        """Добавляет побайтовую разбивку языков; круговая диаграмма строится по ней."""
+        breakdown = self.repo_languages.breakdown(
+            snapshot.profile.login, snapshot.repos, budget=Config.LANGUAGE_BUDGET
+        )
+        sections = dict(sections, language_bytes=breakdown)
+        if breakdown['languages']:
+            chart_data = dict(chart_data, languages_pie={
+                'labels': [item['language'] for item in breakdown['languages']],
+                'values': [item['bytes'] for item in breakdown['languages']],
+            })
+        return sections, chart_data
+    
+    def _get_profile_info(self, user):
+        is_org = user.is_organization
         
         profile = {
-            'login': self.user.login,
-            'name': self.user.name or self.user.login,
-            'bio': self.user.bio or 'Нет описания',
-            'avatar_url': self.user.avatar_url,
-            'html_url': self.user.html_url,
-            'public_repos': self.user.public_repos,
-            'created_at': self.user.created_at.strftime('%d.%m.%Y'),
-            'location': self.user.location or 'Не указано',
-            'blog': self.user.blog or 'Нет',
+            'login': user.login,
+            'name': user.name or user.login,
+            'bio': user.bio or 'Нет описания',
+            'avatar_url': user.avatar_url,
+            'html_url': user.html_url,
+            'public_repos': user.public_repos,
+            'created_at': user.created_at.strftime('%d.%m.%Y'),
+            'location': user.location or 'Не указано',
+            'blog': user.blog or 'Нет',
             'type': 'organization' if is_org else 'user',
             'is_organization': is_org
         }
         
         if is_org:
-            profile['email'] = self.user.email or 'Не указано'
-            profile['public_members'] = getattr(self.user, 'public_members_count', 0) if hasattr(self.user, 'public_members_count') else 0
+            profile['email'] = user.email or 'Не указано'
+            profile['public_members'] = user.public_members
         else:
-            profile['followers'] = self.user.followers
-            profile['following'] = self.user.following
-            profile['public_gists'] = self.user.public_gists
-            profile['company'] = self.user.company or 'Не указано'
+            profile['followers'] = user.followers
+            profile['following'] = user.following
+            profile['public_gists'] = user.public_gists
+            profile['company'] = user.company or 'Не указано'
         
         return profile
     
-    def _get_repositories_stats(self):
-        total_stars = sum(repo.stargazers_count for repo in self.repos)
-        total_forks = sum(repo.forks_count for repo in self.repos)
-        total_watchers = sum(repo.watchers_count for repo in self.repos)
-        
-        top_repos = sorted(
-            self.repos,
-            key=lambda r: r.stargazers_count,
-            reverse=True
-        )[:Config.TOP_REPOS_COUNT]
-        
+    def _get_repositories_stats(self, agg):
         top_repos_list = [{
             'name': repo.name,
             'description': repo.description or 'Нет описания',
-            'stars': repo.stargazers_count,
-            'forks': repo.forks_count,
+            'stars': repo.stars,
+            'forks': repo.forks,
             'language': repo.language or 'Unknown',
             'url': repo.html_url,
             'updated_at': repo.updated_at.strftime('%d.%m.%Y')
-        } for repo in top_repos]
+        } for repo in agg.top_repos[:Config.TOP_REPOS_COUNT]]
         
         return {
-            'total_repos': len(self.repos),
-            'total_stars': total_stars,
-            'total_forks': total_forks,
-            'total_watchers': total_watchers,
+            'total_repos': agg.total_repos,
+            'total_stars': agg.total_stars,
+            'total_forks': agg.total_forks,
+            'total_watchers': agg.total_watchers,
             'top_repos': top_repos_list,
-            'avg_stars': round(total_stars / len(self.repos), 2) if self.repos else 0,
+            'avg_stars': round(agg.total_stars / agg.total_repos, 2) if agg.total_repos else 0,
         }
     
-    def _get_languages_stats(self):
-        languages = Counter()
-        
-        for repo in self.repos:
-            if repo.language:
-                languages[repo.language] += 1
-        
+    def _get_languages_stats(self, agg):
+        languages = agg.languages
         total = sum(languages.values())
         
         languages_data = [{
@@ -118,321 +635,110 @@ class GitHubStats:
         
         return {
             'total_languages': len(languages),
-            'languages': languages_data
+            'languages': languages_data,
+            # Все языки, по убыванию числа репозиториев: по ним строится рейтинг
+            'all_languages': [lang for lang, _ in languages.most_common()]
         }
     
-    def _get_activity_stats(self):
-        recent_updates = []
-        one_year_ago = datetime.now(timezone.utc) - timedelta(days=365)
-        
-        repo_types = {'source': 0, 'fork': 0}
-        recent_repos = []
-        
-        for repo in self.repos:
-            if repo.fork:
-                repo_types['fork'] += 1
-            else:
-                repo_types['source'] += 1
-                
-            if repo.updated_at > one_year_ago:
-                recent_updates.append(repo.updated_at)
-                recent_repos.append(repo)
-        
-        monthly_activity = defaultdict(int)
-        for date in recent_updates:
-            month_key = date.strftime('%Y-%m')
-            monthly_activity[month_key] += 1
-        
-        weekly_pattern = defaultdict(int)
-        for date in recent_updates:
-            day_of_week = date.strftime('%A')
-            weekly_pattern[day_of_week] += 1
-        
-        days_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-        sorted_weekly = {day: weekly_pattern.get(day, 0) for day in days_order}
-        
-        avg_stars_per_repo = sum(r.stargazers_count for r in recent_repos) / len(recent_repos) if recent_repos else 0
+    def _get_activity_stats(self, agg):
+        repo_types = agg.repo_types
+        active = agg.active_repos_last_year
+        avg_stars_per_repo = agg.active_stars / active if active else 0
         
         return {
-            'active_repos_last_year': len(recent_updates),
-            'monthly_activity': dict(sorted(monthly_activity.items())),
-            'repo_types': repo_types,
-            'weekly_pattern': sorted_weekly,
+            'active_repos_last_year': active,
+            'monthly_activity': dict(agg.monthly_activity),
+            'repo_types': dict(repo_types),
+            'weekly_pattern': dict(agg.weekly_pattern),
             'avg_stars_active': round(avg_stars_per_repo, 2),
             'total_source_repos': repo_types['source'],
             'total_fork_repos': repo_types['fork']
         }
     
-    def _generate_charts(self):
-        charts = {}
-        
-        languages = Counter()
-        for repo in self.repos:
-            if repo.language:
-                languages[repo.language] += 1
-        
-        if languages:
-            fig_languages = px.pie(
-                values=list(languages.values()),
-                names=list(languages.keys()),
-                title='Распределение языков программирования',
-                hole=0.4,
-                color_discrete_sequence=px.colors.qualitative.Set3
-            )
-            fig_languages.update_layout(
-                template='plotly_dark',
-                paper_bgcolor='rgba(0,0,0,0)',
-                plot_bgcolor='rgba(0,0,0,0)',
-                font=dict(color='white', size=12)
-            )
-            charts['languages_pie'] = fig_languages.to_html(full_html=False, include_plotlyjs='cdn')
-        
-        top_repos = sorted(self.repos, key=lambda r: r.stargazers_count, reverse=True)[:10]
-        if top_repos and len(top_repos) > 0:
-            repo_names = [repo.name for repo in top_repos]
-            repo_stars = [repo.stargazers_count for repo in top_repos]
-            
-            if sum(repo_stars) == 0:
-                colors = ['#5865f2'] * len(repo_stars)
+    def _generate_charts(self, chart_data, progress=_noop):
+        rendered = {}
+        for name, data in chart_data.items():
+            with metrics.chart_timer(name):
+                rendered[name] = charts.render_html(charts.build_figure(name, data))
+            progress('chart', {'name': name, 'html': rendered[name]})
+        return rendered
+    
+    def get_chart(self, username, name):
+        if name not in charts.CHART_NAMES:
+            return None
+        
+        figure_key = f'user_chart_{username.lower()}_{name}'
+        figure_json = self.cache.get(figure_key)
+        if figure_json:
+            return figure_json
+        
+        charts_key = f'user_charts_{username.lower()}'
+        chart_data = self.cache.get(charts_key)
+        if chart_data is None:
+            result = self._load_user_stats(username)
+            if not result['success']:
+                raise LookupError(result['error'])
+            chart_data = self.cache.get(charts_key) or {}
+        
+        if name not in chart_data:
+            return None
+        
+        with metrics.chart_timer(name):
+            figure_json = charts.render_json(charts.build_figure(name, chart_data[name]))
+        self.cache.set(figure_key, figure_json)
+        return figure_json
+    
+    def get_many_stats(self, usernames):
+        if len(usernames) <= 1:
+            return [self.get_user_stats(username) for username in usernames]
+        workers = min(Config.COMPARE_WORKERS, len(usernames))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='stats-compare') as pool:
+            futures = [pool.submit(copy_context().run, self.get_user_stats, u) for u in usernames]
+            return [future.result() for future in futures]
+    
+    def iter_many_stats(self, usernames, workers=None, sections=None):
+        """Выдает пары (username, result) по мере готовности, а не по порядку."""
+        workers = min(workers or Config.BATCH_WORKERS, len(usernames)) or 1
+        pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='stats-batch')
+        try:
+            futures = {
+                pool.submit(self.get_user_stats, username, sections): username
+                for username in usernames
+            }
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+    
+    COMPARE_METRICS = (
+        ('followers', 'profile', 'followers'),
+        ('repos', 'repositories', 'total_repos'),
+        ('stars', 'repositories', 'total_stars'),
+        ('forks', 'repositories', 'total_forks'),
+        ('languages', 'languages', 'total_languages'),
+    )
+    
+    @classmethod
+    def compare_users(cls, *users_data):
+        comparison = {}
+        
+        for metric, section, field in cls.COMPARE_METRICS:
+            if metric == 'followers':
+                values = [data['profile'].get('followers', data['profile'].get('public_members', 0))
+                          for data in users_data]
             else:
-                colors = repo_stars
+                values = [data[section][field] for data in users_data]
             
-            fig_repos = go.Figure(data=[
-                go.Bar(
-                    x=repo_stars,
-                    y=repo_names,
-                    orientation='h',
-                    marker=dict(
-                        color=colors,
-                        colorscale='Viridis',
-                        showscale=(sum(repo_stars) > 0)
-                    ),
-                    text=repo_stars,
-                    textposition='auto'
-                )
-            ])
-            fig_repos.update_layout(
-                title='Топ 10 репозиториев по звездам',
-                xaxis_title='Количество звезд',
-                yaxis_title='Репозиторий',
-                template='plotly_dark',
-                paper_bgcolor='rgba(0,0,0,0)',
-                plot_bgcolor='rgba(0,0,0,0)',
-                font=dict(color='white', size=12),
-                height=400
-            )
-            charts['top_repos_bar'] = fig_repos.to_html(full_html=False, include_plotlyjs='cdn')
-        
-        one_year_ago = datetime.now(timezone.utc) - timedelta(days=365)
-        monthly_activity = defaultdict(int)
-        
-        for repo in self.repos:
-            if repo.updated_at > one_year_ago:
-                month_key = repo.updated_at.strftime('%Y-%m')
-                monthly_activity[month_key] += 1
-        
-        if monthly_activity:
-            sorted_months = sorted(monthly_activity.items())
-            months = [m[0] for m in sorted_months]
-            activity = [m[1] for m in sorted_months]
-            
-            fig_activity = go.Figure(data=[
-                go.Scatter(
-                    x=months,
-                    y=activity,
-                    mode='lines+markers',
-                    line=dict(color='#00d4ff', width=3),
-                    marker=dict(size=8, color='#00d4ff'),
-                    fill='tozeroy',
-                    fillcolor='rgba(0, 212, 255, 0.3)'
-                )
-            ])
-            fig_activity.update_layout(
-                title='Активность обновления репозиториев (последний год)',
-                xaxis_title='Месяц',
-                yaxis_title='Количество обновлений',
-                template='plotly_dark',
-                paper_bgcolor='rgba(0,0,0,0)',
-                plot_bgcolor='rgba(0,0,0,0)',
-                font=dict(color='white', size=12),
-                height=350
-            )
-            charts['activity_timeline'] = fig_activity.to_html(full_html=False, include_plotlyjs='cdn')
-        
-        repos_with_stars = [r for r in self.repos if r.stargazers_count > 0]
-        if not repos_with_stars and self.repos:
-            repos_with_stars = self.repos[:10]
-        if repos_with_stars:
-            fig_scatter = go.Figure(data=[
-                go.Scatter(
-                    x=[r.stargazers_count for r in repos_with_stars],
-                    y=[r.forks_count for r in repos_with_stars],
-                    mode='markers',
-                    marker=dict(
-                        size=[min(r.stargazers_count + 5, 30) for r in repos_with_stars],
-                        color=[r.stargazers_count for r in repos_with_stars],
-                        colorscale='Plasma',
-                        showscale=True,
-                        colorbar=dict(title="Звезды")
-                    ),
-                    text=[r.name for r in repos_with_stars],
-                    hovertemplate='<b>%{text}</b><br>Звезды: %{x}<br>Форки: %{y}<extra></extra>'
-                )
-            ])
-            fig_scatter.update_layout(
-                title='Звезды vs Форки',
-                xaxis_title='Звезды',
-                yaxis_title='Форки',
-                template='plotly_dark',
-                paper_bgcolor='rgba(0,0,0,0)',
-                plot_bgcolor='rgba(0,0,0,0)',
-                font=dict(color='white', size=12),
-                height=400
-            )
-            charts['stars_vs_forks'] = fig_scatter.to_html(full_html=False, include_plotlyjs='cdn')
-        
-        if self.repos:
-            repos_by_year = defaultdict(int)
-            for repo in self.repos:
-                year = repo.created_at.year
-                repos_by_year[year] += 1
-            sorted_years = sorted(repos_by_year.items())
-            years = [str(y[0]) for y in sorted_years]
-            counts = [y[1] for y in sorted_years]
-            
-            fig_yearly = go.Figure(data=[
-                go.Bar(
-                    x=years,
-                    y=counts,
-                    marker=dict(
-                        color=counts,
-                        colorscale='Blues',
-                        showscale=False
-                    ),
-                    text=counts,
-                    textposition='auto'
-                )
-            ])
-            fig_yearly.update_layout(
-                title='Репозитории по годам создания',
-                xaxis_title='Год',
-                yaxis_title='Количество репозиториев',
-                template='plotly_dark',
-                paper_bgcolor='rgba(0,0,0,0)',
-                plot_bgcolor='rgba(0,0,0,0)',
-                font=dict(color='white', size=12),
-                height=350
-            )
-            charts['repos_by_year'] = fig_yearly.to_html(full_html=False, include_plotlyjs='cdn')
-            
-            top_10_repos = sorted(self.repos, key=lambda r: r.stargazers_count, reverse=True)[:10]
-            repo_names_short = [r.name[:20] for r in top_10_repos]
-            stars = [r.stargazers_count for r in top_10_repos]
-            forks = [r.forks_count for r in top_10_repos]
-            
-            fig_grouped = go.Figure(data=[
-                go.Bar(name='Звезды', x=repo_names_short, y=stars, marker_color='#ffd700'),
-                go.Bar(name='Форки', x=repo_names_short, y=forks, marker_color='#5865f2')
-            ])
-            fig_grouped.update_layout(
-                title='Топ 10: Звезды и Форки',
-                xaxis_title='Репозиторий',
-                yaxis_title='Количество',
-                barmode='group',
-                template='plotly_dark',
-                paper_bgcolor='rgba(0,0,0,0)',
-                plot_bgcolor='rgba(0,0,0,0)',
-                font=dict(color='white', size=12),
-                height=400
-            )
-            charts['stars_forks_grouped'] = fig_grouped.to_html(full_html=False, include_plotlyjs='cdn')
-        
-        activity_stats = self._get_activity_stats()
-        if activity_stats.get('weekly_pattern') and sum(activity_stats['weekly_pattern'].values()) > 0:
-            days = list(activity_stats['weekly_pattern'].keys())
-            days_ru = ['Пн', 'Вт', 'Ср', 'Чт', 'Пт', 'Сб', 'Вс']
-            counts = list(activity_stats['weekly_pattern'].values())
-            
-            fig_weekly = go.Figure(data=[
-                go.Bar(
-                    x=days_ru,
-                    y=counts,
-                    marker=dict(
-                        color=['#5865f2' if i < 5 else '#43b581' for i in range(7)],
-                    ),
-                    text=counts,
-                    textposition='auto'
-                )
-            ])
-            fig_weekly.update_layout(
-                title='Активность по дням недели',
-                xaxis_title='День недели',
-                yaxis_title='Обновлений репозиториев',
-                template='plotly_dark',
-                paper_bgcolor='rgba(0,0,0,0)',
-                plot_bgcolor='rgba(0,0,0,0)',
-                font=dict(color='white', size=12),
-                height=350
-            )
-            charts['weekly_activity'] = fig_weekly.to_html(full_html=False, include_plotlyjs='cdn')
-        
-        if activity_stats.get('repo_types') and sum(activity_stats['repo_types'].values()) > 0:
-            fig_types = px.pie(
-                values=list(activity_stats['repo_types'].values()),
-                names=['Собственные', 'Форки'],
-                title='Типы репозиториев',
-                color_discrete_sequence=['#5865f2', '#43b581']
-            )
-            fig_types.update_layout(
-                template='plotly_dark',
-                paper_bgcolor='rgba(0,0,0,0)',
-                plot_bgcolor='rgba(0,0,0,0)',
-                font=dict(color='white', size=12)
-            )
-            charts['repo_types_pie'] = fig_types.to_html(full_html=False, include_plotlyjs='cdn')
-        
-        return charts
-    
-    @staticmethod
-    def compare_users(user1_data, user2_data):
-        profile1 = user1_data['profile']
-        profile2 = user2_data['profile']
-        repos1 = user1_data['repositories']
-        repos2 = user2_data['repositories']
-        langs1 = user1_data['languages']
-        langs2 = user2_data['languages']
-        
-        comparison = {
-            'followers': {
-                'user1': profile1['followers'],
-                'user2': profile2['followers'],
-                'diff': profile1['followers'] - profile2['followers'],
-                'winner': 1 if profile1['followers'] > profile2['followers'] else (2 if profile2['followers'] > profile1['followers'] else 0)
-            },
-            'repos': {
-                'user1': repos1['total_repos'],
-                'user2': repos2['total_repos'],
-                'diff': repos1['total_repos'] - repos2['total_repos'],
-                'winner': 1 if repos1['total_repos'] > repos2['total_repos'] else (2 if repos2['total_repos'] > repos1['total_repos'] else 0)
-            },
-            'stars': {
-                'user1': repos1['total_stars'],
-                'user2': repos2['total_stars'],
-                'diff': repos1['total_stars'] - repos2['total_stars'],
-                'winner': 1 if repos1['total_stars'] > repos2['total_stars'] else (2 if repos2['total_stars'] > repos1['total_stars'] else 0)
-            },
-            'forks': {
-                'user1': repos1['total_forks'],
-                'user2': repos2['total_forks'],
-                'diff': repos1['total_forks'] - repos2['total_forks'],
-                'winner': 1 if repos1['total_forks'] > repos2['total_forks'] else (2 if repos2['total_forks'] > repos1['total_forks'] else 0)
-            },
-            'languages': {
-                'user1': langs1['total_languages'],
-                'user2': langs2['total_languages'],
-                'diff': langs1['total_languages'] - langs2['total_languages'],
-                'winner': 1 if langs1['total_languages'] > langs2['total_languages'] else (2 if langs2['total_languages'] > langs1['total_languages'] else 0)
+            best = max(values)
+            leaders = [i for i, value in enumerate(values) if value == best]
+            entry = {
+                'values': values,
+                'winner': leaders[0] + 1 if len(leaders) == 1 else 0,
+                'diff': best - min(values)
             }
-        }
+            if len(values) == 2:
+                entry['user1'], entry['user2'] = values
+                entry['diff'] = values[0] - values[1]
+            comparison[metric] = entry
         
         return comparison
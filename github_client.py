@@ -0,0 +1,224 @@
+from datetime import datetime, timezone
+from threading import Condition
+from time import monotonic, perf_counter, time
+import requests
+from config import Config
+import metrics
+
+
+class GitHubAPIError(Exception):
+    def __init__(self, status, message):
+        super().__init__(f'{status} {message}')
+        self.status = status
+        self.message = message
+
+
+class RateLimitExceeded(GitHubAPIError):
+    def __init__(self, reset_at):
+        reset = datetime.fromtimestamp(reset_at, timezone.utc).strftime('%H:%M:%S UTC')
+        super().__init__(429, f'Лимит запросов исчерпан для всех токенов до {reset}')
+        self.reset_at = reset_at
+
+
+class _TokenSlot:
+    """Токен и остаток его лимита по каждому ресурсу API (core, graphql, ...)."""
+
+    __slots__ = ('token', 'budgets')
+
+    def __init__(self, token):
+        self.token = token
+        self.budgets = {}
+
+    @property
+    def headers(self):
+        return {'Authorization': f'Bearer {self.token}'} if self.token else {}
+
+    @property
+    def label(self):
+        if not self.token:
+            return 'anonymous'
+        return f'…{self.token[-4:]}' if len(self.token) > 12 else '…'
+
+    def budget(self, resource, now):
+        remaining, limit, reset_at = self.budgets.get(resource, (None, None, 0))
+        if remaining is None or now >= reset_at:
+            return limit or (5000 if self.token else 60)
+        return remaining
+
+
+class TokenPool:
+    """Пул токенов GitHub с учетом остатка лимита из заголовков X-RateLimit-*.
+
+    Каждый запрос уходит токену с наибольшим остатком. Если все токены
+    исчерпаны, ``acquire`` ждет сброса лимита не дольше ``max_wait`` секунд,
+    после чего выбрасывает RateLimitExceeded.
+    """
+
+    def __init__(self, tokens, max_wait=0):
+        self._slots = [_TokenSlot(token) for token in tokens] or [_TokenSlot(None)]
+        self._cond = Condition()
+        self.max_wait = max_wait
+
+    def __len__(self):
+        return len(self._slots)
+
+    def acquire(self, resource='core'):
+        deadline = monotonic() + self.max_wait
+        with self._cond:
+            while True:
+                now = time()
+                slot = max(self._slots, key=lambda s: s.budget(resource, now))
+                budget = slot.budget(resource, now)
+                if budget > 0:
+                    _, limit, reset_at = slot.budgets.get(resource, (None, None, 0))
+                    slot.budgets[resource] = (budget - 1, limit, reset_at if now < reset_at else now + 3600)
+                    return slot
+
+                reset_at = min(s.budgets[resource][2] for s in self._slots)
+                wait = min(reset_at - now, deadline - monotonic())
+                if wait <= 0:
+                    raise RateLimitExceeded(reset_at)
+                self._cond.wait(wait)
+
+    def update(self, slot, headers, resource='core'):
+        remaining = headers.get('X-RateLimit-Remaining')
+        if remaining is None:
+            return
+        resource = headers.get('X-RateLimit-Resource', resource)
+        with self._cond:
+            slot.budgets[resource] = (
+                int(remaining),
+                int(headers.get('X-RateLimit-Limit', 0)) or None,
+                float(headers.get('X-RateLimit-Reset', time() + 3600))
+            )
+            self._cond.notify_all()
+
+    def status(self):
+        now = time()
+        with self._cond:
+            return [{
+                'token': slot.label,
+                'resources': {
+                    resource: {
+                        'remaining': slot.budget(resource, now),
+                        'limit': limit,
+                        'reset_at': datetime.fromtimestamp(reset_at, timezone.utc).isoformat()
+                    }
+                    for resource, (_, limit, reset_at) in slot.budgets.items()
+                }
+            } for slot in self._slots]
+
+
+class ApiResponse:
+    __slots__ = ('status', 'data', 'etag', 'last_modified', 'links', 'headers')
+
+    def __init__(self, status, data, etag, last_modified, links, headers):
+        self.status = status
+        self.data = data
+        self.etag = etag
+        self.last_modified = last_modified
+        self.links = links
+        self.headers = headers
+
+    @property
+    def not_modified(self):
+        return self.status == 304
+
+
+class GitHubClient:
+    """Тонкий клиент REST API GitHub поверх requests.Session.
+
+    Поддерживает условные запросы: если переданы ``etag`` или
+    ``last_modified`` прошлого ответа и данные не изменились, GitHub
+    отвечает 304 без тела, и такой ответ не расходует лимит запросов.
+    """
+
+    def __init__(self, tokens=(), base_url=None, graphql_url=None, timeout=None):
+        self.base_url = (base_url or Config.GITHUB_API_URL).rstrip('/')
+        self.graphql_url = graphql_url or Config.GITHUB_GRAPHQL_URL or f'{self.base_url}/graphql'
+        self.timeout = timeout or Config.GITHUB_TIMEOUT
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=Config.HTTP_POOL_SIZE)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({
+            'Accept': 'application/vnd.github+json',
+            'User-Agent': 'github-stats-dashboard',
+        })
+        self.tokens = TokenPool(tokens, max_wait=Config.RATE_LIMIT_MAX_WAIT)
+
+    def get(self, path, params=None, etag=None, last_modified=None):
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+
+        url = path if path.startswith('http') else f'{self.base_url}{path}'
+        response = self._request('get', 'core', url, params=params, headers=headers)
+
+        if response.status_code >= 400:
+            try:
+                message = response.json().get('message', response.reason)
+            except ValueError:
+                message = response.reason
+            raise GitHubAPIError(response.status_code, message)
+
+        return ApiResponse(
+            status=response.status_code,
+            data=None if response.status_code == 304 else response.json(),
+            etag=response.headers.get('ETag'),
+            last_modified=response.headers.get('Last-Modified'),
+            links=response.links,
+            headers=response.headers,
+        )
+
+    def graphql(self, query, variables=None):
+        response = self._request(
+            'post', 'graphql', self.graphql_url,
+            json={'query': query, 'variables': variables or {}}
+        )
+
+        try:
+            payload = response.json()
+        except ValueError:
+            raise GitHubAPIError(response.status_code, response.reason)
+
+        if response.status_code >= 400:
+            raise GitHubAPIError(response.status_code, payload.get('message', response.reason))
+
+        errors = payload.get('errors')
+        if errors:
+            status = 404 if any(error.get('type') == 'NOT_FOUND' for error in errors) else 502
+            raise GitHubAPIError(status, '; '.join(error.get('message', '') for error in errors))
+
+        return payload['data']
+
+    def _request(self, method, resource, url, headers=None, **kwargs):
+        """Выполняет запрос от имени наименее загруженного токена.
+
+        Если GitHub ответил, что лимит токена исчерпан, запрос повторяется
+        с другим токеном пула; если исчерпан и последний — RateLimitExceeded.
+        """
+        for attempt in range(len(self.tokens)):
+            slot = self.tokens.acquire(resource)
+            start = perf_counter()
+            try:
+                response = self.session.request(
+                    method, url,
+                    headers=dict(headers or {}, **slot.headers),
+                    timeout=self.timeout,
+                    **kwargs
+                )
+            except requests.RequestException:
+                metrics.observe_github_call(resource, 'error', perf_counter() - start)
+                raise
+            metrics.observe_github_call(resource, response.status_code, perf_counter() - start)
+            self.tokens.update(slot, response.headers, resource)
+            if not _rate_limited(response):
+                return response
+        raise RateLimitExceeded(int(response.headers.get('X-RateLimit-Reset') or time() + 60))
+
+
+def _rate_limited(response):
+    return response.status_code in (403, 429) and response.headers.get('X-RateLimit-Remaining') == '0'
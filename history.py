@@ -0,0 +1,208 @@
+import os
+import struct
+import tempfile
+from array import array
+from bisect import bisect_left, bisect_right
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from threading import Lock
+from time import time
+from models import is_valid_login
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: блокировка только внутри процесса
+    fcntl = None
+
+# Порядок полей записи; первым идет время снимка
+HISTORY_METRICS = (
+    'followers', 'following', 'public_repos', 'public_gists', 'public_members',
+    'total_stars', 'total_forks', 'total_watchers',
+)
+
+_FIELDS = len(HISTORY_METRICS) + 1
+_RECORD = struct.Struct(f'<{_FIELDS}I')
+
+DAY = 24 * 3600
+
+
+class HistoryStore:
+    """Компактная история метрик пользователей на диске.
+
+    Для каждого пользователя — отдельный файл, куда дописываются записи
+    фиксированного размера (время и метрики, uint32). При чтении файл
+    раскладывается в колонки ``array``, диапазон ищется бинарным поиском
+    по времени. Старые точки прореживаются: за последние ``raw_days`` дней
+    хранится все, до ``daily_days`` — последняя точка за день, дальше —
+    последняя за неделю.
+
+    Запись и прореживание файла идут под ``flock``, поэтому один каталог
+    могут делить несколько процессов (воркеры gunicorn).
+    """
+
+    def __init__(self, directory, raw_days=30, daily_days=365, min_interval=3600, compact_every=256):
+        self.directory = directory
+        self.raw_days = raw_days
+        self.daily_days = daily_days
+        self.min_interval = min_interval
+        self.compact_every = compact_every
+        self._lock = Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def append(self, login, values, timestamp=None):
+        """Дописывает точку; одинаковые точки чаще ``min_interval`` пропускаются."""
+        path = self._path(login)
+        if path is None:
+            return False
+        timestamp = int(timestamp or time())
+        record = [timestamp] + [max(0, int(values.get(name) or 0)) for name in HISTORY_METRICS]
+
+        with self._lock, self._locked(path) as f:
+            last = self._last_record(path)
+            if last is not None and last[1:] == tuple(record[1:]) and timestamp - last[0] < self.min_interval:
+                return False
+            f.write(_RECORD.pack(*record))
+            f.flush()
+            if f.tell() // _RECORD.size % self.compact_every == 0:
+                self._compact(path, timestamp)
+        return True
+
+    def query(self, login, since=None, until=None, metrics=HISTORY_METRICS):
+        """Колонки ``{'timestamps': array, metric: array}`` за ``[since, until]``."""
+        path = self._path(login)
+        if path is None or not os.path.exists(path):
+            return None
+        columns = self._read_columns(path)
+        timestamps = columns['timestamps']
+        start = 0 if since is None else bisect_left(timestamps, since)
+        end = len(timestamps) if until is None else bisect_right(timestamps, until)
+        result = {'timestamps': timestamps[start:end]}
+        for name in metrics:
+            result[name] = columns[name][start:end]
+        return result
+
+    def _path(self, login):
+        if not is_valid_login(login):
+            return None
+        return os.path.join(self.directory, f'{login.lower()}.bin')
+
+    @contextmanager
+    def _locked(self, path):
+        """Файл, открытый на дозапись под эксклюзивной ``flock``."""
+        while True:
+            f = open(path, 'ab')
+            if fcntl is None:
+                break
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                if os.fstat(f.fileno()).st_ino == os.stat(path).st_ino:
+                    break
+            except FileNotFoundError:
+                pass
+            # Пока ждали блокировку, другой процесс заменил файл прореженным
+            f.close()
+        try:
+            yield f
+        finally:
+            f.close()
+
+    def _last_record(self, path):
+        try:
+            with open(path, 'rb') as f:
+                f.seek(0, os.SEEK_END)
+                size = f.tell() - f.tell() % _RECORD.size
+                if size == 0:
+                    return None
+                f.seek(size - _RECORD.size)
+                return _RECORD.unpack(f.read(_RECORD.size))
+        except FileNotFoundError:
+            return None
+
+    def _read_columns(self, path):
+        data = array('I')
+        with open(path, 'rb') as f:
+            raw = f.read()
+        data.frombytes(raw[:len(raw) - len(raw) % _RECORD.size])
+        columns = {'timestamps': data[0::_FIELDS]}
+        for index, name in enumerate(HISTORY_METRICS, start=1):
+            columns[name] = data[index::_FIELDS]
+        return columns
+
+    def _compact(self, path, now):
+        """Прореживает старые точки и атомарно перезаписывает файл.
+
+        Вызывается под блокировкой файла; временный файл у каждого вызова свой.
+        """
+        columns = self._read_columns(path)
+        timestamps = columns['timestamps']
+        keep = []
+        for i, timestamp in enumerate(timestamps):
+            age = now - timestamp
+            if age <= self.raw_days * DAY or i == len(timestamps) - 1:
+                keep.append(i)
+                continue
+            bucket = DAY if age <= self.daily_days * DAY else 7 * DAY
+            # Оставляем последнюю точку в каждом интервале
+            if timestamps[i + 1] // bucket != timestamp // bucket:
+                keep.append(i)
+
+        if len(keep) == len(timestamps):
+            return
+        compacted = array('I')
+        for i in keep:
+            compacted.append(timestamps[i])
+            compacted.extend(columns[name][i] for name in HISTORY_METRICS)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=os.path.basename(path) + '.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                compacted.tofile(f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+
+def history_values(sections):
+    """Метрики для истории из секций статистики пользователя."""
+    profile = sections['profile']
+    repositories = sections['repositories']
+    return {
+        'followers': profile.get('followers', 0),
+        'following': profile.get('following', 0),
+        'public_repos': profile.get('public_repos', 0),
+        'public_gists': profile.get('public_gists', 0),
+        'public_members': profile.get('public_members', 0),
+        'total_stars': repositories['total_stars'],
+        'total_forks': repositories['total_forks'],
+        'total_watchers': repositories['total_watchers'],
+    }
+
+
+def trend(timestamps, values):
+    """Изменение метрики за период и наклон линейной регрессии в сутки."""
+    if not timestamps:
+        return None
+    first, last = values[0], values[-1]
+    result = {
+        'first': first,
+        'last': last,
+        'min': min(values),
+        'max': max(values),
+        'change': last - first,
+        'change_pct': round((last - first) / first * 100, 2) if first else None,
+        'per_day': 0.0,
+    }
+    n = len(timestamps)
+    if n > 1:
+        mean_t = sum(timestamps) / n
+        mean_v = sum(values) / n
+        var = sum((t - mean_t) ** 2 for t in timestamps)
+        if var:
+            cov = sum((t - mean_t) * (v - mean_v) for t, v in zip(timestamps, values))
+            result['per_day'] = round(cov / var * DAY, 4)
+    return result
+
+
+def format_timestamp(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
@@ -0,0 +1,41 @@
+import gzip
+from hashlib import sha256
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from config import Config
+
+ENCODINGS = ('br', 'gzip') if brotli else ('gzip',)
+
+
+def negotiate_encoding(accept_encodings):
+    """Лучшее из поддерживаемых сжатий по заголовку Accept-Encoding или None."""
+    return accept_encodings.best_match(ENCODINGS)
+
+
+def compress(body, encoding):
+    if encoding == 'br':
+        return brotli.compress(body, quality=Config.BROTLI_QUALITY)
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=Config.GZIP_LEVEL, mtime=0)
+    return body
+
+
+def build_representation(body, encoding):
+    """Готовое к отдаче тело: сжатые байты и строгий ETag.
+
+    Тела меньше ``COMPRESS_MIN_SIZE`` не сжимаются. ETag считается по
+    несжатому телу и помечается кодировкой, так как байты ответа для
+    разных Content-Encoding различаются.
+    """
+    if len(body) < Config.COMPRESS_MIN_SIZE:
+        encoding = None
+    digest = sha256(body).hexdigest()[:32]
+    return {
+        'etag': f'{digest}-{encoding}' if encoding else digest,
+        'encoding': encoding,
+        'body': compress(body, encoding),
+    }
@@ -0,0 +1,95 @@
+import secrets
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from time import time
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+class JobManager:
+    """Фоновые задачи с опросом состояния.
+
+    Задачи выполняются в пуле из ``workers`` потоков; принятых и еще не
+    завершенных задач не больше ``max_pending``, дальше — JobQueueFull.
+    Задача с тем же ключом, пока предыдущая не завершилась, не создается
+    заново — возвращается существующая. Состояние хранится в ``store``
+    (кэше статистики) ``ttl`` секунд: при общем кэше (sqlite, redis) задачу
+    можно опрашивать через любой воркер.
+    """
+
+    def __init__(self, store, workers=2, max_pending=16, ttl=600):
+        self.store = store
+        self.max_pending = max_pending
+        self.ttl = ttl
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='stats-jobs')
+        self._active = {}
+        self._lock = Lock()
+
+    def submit(self, key, fn, **info):
+        """Ставит ``fn(progress)`` в очередь; возвращает состояние задачи.
+
+        ``fn`` возвращает результат вида ``{'success': ..., 'error': ...}``,
+        ``progress(name, data)`` сохраняет ход выполнения.
+        """
+        with self._lock:
+            job_id = self._active.get(key)
+            state = self.get(job_id) if job_id else None
+            if state is not None:
+                return state
+            if len(self._active) >= self.max_pending:
+                raise JobQueueFull()
+            state = dict(
+                info,
+                id=secrets.token_urlsafe(12),
+                status='queued',
+                created_at=time(),
+                progress={'stage': None, 'sections': {}}
+            )
+            self._active[key] = state['id']
+            self._save(state)
+        self._pool.submit(self._run, key, state, fn)
+        return state
+
+    def get(self, job_id):
+        return self.store.get(f'job_{job_id}')
+
+    def _run(self, key, state, fn):
+        state = dict(state, status='running', started_at=time())
+        self._save(state)
+
+        def progress(name, data):
+            nonlocal state
+            state = dict(state, progress=_progress(state['progress'], name, data))
+            self._save(state)
+
+        try:
+            result = fn(progress)
+            if result['success']:
+                state = dict(state, status='done')
+            else:
+                state = dict(state, status='failed', error=result['error'])
+        except Exception as e:
+            state = dict(state, status='failed', error=f'Неожиданная ошибка: {str(e)}')
+        finally:
+            with self._lock:
+                self._active.pop(key, None)
+        self._save(dict(state, finished_at=time()))
+
+    def _save(self, state):
+        self.store.set(f'job_{state["id"]}', state, ttl=self.ttl)
+
+
+def _progress(progress, name, data):
+    """Новый ход выполнения после события ``name``; графики только считаются."""
+    progress = dict(progress, stage=name)
+    if name == 'chart':
+        progress['charts_ready'] = progress.get('charts_ready', 0) + 1
+    elif name == 'charts':
+        progress['charts_ready'] = len(data['chart_names'])
+    elif name == 'pages':
+        progress.update(data)
+    else:
+        progress['sections'] = dict(progress['sections'], **{name: data})
+    return progress
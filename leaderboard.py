@@ -0,0 +1,155 @@
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from threading import Lock
+
+LEADERBOARD_METRICS = ('stars', 'forks', 'followers', 'repos')
+
+
+def leaderboard_values(sections):
+    """Значения метрик рейтинга из секций статистики пользователя."""
+    profile = sections['profile']
+    repositories = sections['repositories']
+    return {
+        'stars': repositories['total_stars'],
+        'forks': repositories['total_forks'],
+        # У организаций вместо подписчиков — публичные участники, как в compare_users
+        'followers': profile.get('followers', profile.get('public_members', 0)),
+        'repos': profile.get('public_repos', 0),
+    }
+
+
+def leaderboard_record(sections, updated_at):
+    """Запись рейтинга пользователя; через общий кэш ее видят все воркеры."""
+    profile = sections['profile']
+    # В старых записях кэша есть только первые 10 языков
+    names = sections['languages'].get('all_languages') or [
+        item['language'] for item in sections['languages']['languages']
+    ]
+    return {
+        'login': profile['login'],
+        'values': leaderboard_values(sections),
+        'languages': {name.lower(): name for name in names},
+        'card': {
+            'login': profile['login'],
+            'name': profile.get('name'),
+            'avatar_url': profile.get('avatar_url'),
+            'type': profile.get('type'),
+        },
+        'updated_at': updated_at,
+    }
+
+
+class Leaderboard:
+    """Рейтинги всех пользователей, для которых строилась статистика.
+
+    На каждую метрику и каждую пару (метрика, язык) хранится список
+    ``(-значение, login)``, отсортированный бинарной вставкой; при новом
+    снимке пользователя его старые записи удаляются и вставляются новые.
+    Запрос рейтинга — срез начала списка, без обхода кэша и без GitHub.
+    Пользователей не больше ``max_users``: сверх этого вытесняется тот,
+    чей снимок обновлялся давнее всех. ``rebuild`` заменяет содержимое
+    записями из общего кэша, чтобы рейтинг совпадал у всех воркеров.
+    """
+
+    def __init__(self, max_users=None):
+        self.max_users = max_users
+        self._lock = Lock()
+        self._indexes = {}
+        self._users = OrderedDict()
+        self._language_names = {}
+
+    def __contains__(self, login):
+        return login.lower() in self._users
+
+    def __len__(self):
+        return len(self._users)
+
+    def update(self, record):
+        with self._lock:
+            self._remove(record['login'].lower())
+            self._add(record)
+            while self.max_users and len(self._users) > self.max_users:
+                self._remove(next(iter(self._users)))
+
+    def rebuild(self, records, since=None):
+        """Заменяет содержимое записями ``records``.
+
+        Локальные записи, обновленные не раньше ``since`` (начала чтения
+        ``records``), сохраняются, если в ``records`` их еще нет.
+        """
+        latest = {}
+        for record in records:
+            login = record['login'].lower()
+            if login not in latest or latest[login]['updated_at'] < record['updated_at']:
+                latest[login] = record
+        with self._lock:
+            if since is not None:
+                for login, user in self._users.items():
+                    if user[3] >= since and (login not in latest or latest[login]['updated_at'] < user[3]):
+                        latest[login] = self._record(login, user)
+            records = sorted(latest.values(), key=lambda record: record['updated_at'])
+            if self.max_users:
+                records = records[-self.max_users:]
+            self._indexes, self._users, self._language_names = {}, OrderedDict(), {}
+            # Вставка в конец и одна сортировка вместо бинарной вставки на каждую запись
+            for record in records:
+                self._add(record, keep_sorted=False)
+            for index in self._indexes.values():
+                index.sort()
+
+    def top(self, metric, language=None, limit=50):
+        """``(всего в рейтинге, первые limit записей с местом и значением)``."""
+        key = (metric, language.lower() if language else None)
+        with self._lock:
+            index = self._indexes.get(key, ())
+            leaders = [
+                dict(self._users[login][2], rank=rank, value=-value)
+                for rank, (value, login) in enumerate(index[:limit], start=1)
+            ]
+            return len(index), leaders
+
+    def language_name(self, language):
+        return self._language_names.get(language.lower(), language)
+
+    def _add(self, record, keep_sorted=True):
+        login = record['login'].lower()
+        languages = record['languages']
+        self._users[login] = (record['values'], tuple(languages), record['card'], record['updated_at'])
+        self._language_names.update(languages)
+        for key, entry in self._keys(login, record['values'], languages):
+            index = self._indexes.setdefault(key, [])
+            if keep_sorted:
+                insort(index, entry)
+            else:
+                index.append(entry)
+
+    def _record(self, login, user):
+        values, languages, card, updated_at = user
+        return {
+            'login': card['login'],
+            'values': values,
+            'languages': {language: self._language_names.get(language, language) for language in languages},
+            'card': card,
+            'updated_at': updated_at,
+        }
+
+    def _remove(self, login):
+        previous = self._users.pop(login, None)
+        if previous is None:
+            return
+        for key, entry in self._keys(login, previous[0], previous[1]):
+            index = self._indexes[key]
+            del index[bisect_left(index, entry)]
+            if not index:
+                del self._indexes[key]
+        for language in previous[1]:
+            if (LEADERBOARD_METRICS[0], language) not in self._indexes:
+                self._language_names.pop(language, None)
+
+    @staticmethod
+    def _keys(login, values, languages):
+        for metric in LEADERBOARD_METRICS:
+            entry = (-values[metric], login)
+            yield (metric, None), entry
+            for language in languages:
+                yield (metric, language), entry
@@ -0,0 +1,240 @@
+"""Метрики в текстовом формате Prometheus и тайминги этапов запроса.
+
+Этапы (загрузка, агрегация, графики, вызовы GitHub) пишутся и в
+гистограммы процесса, и в ``Timings`` текущего запроса — из них
+собирается заголовок Server-Timing. Текущие тайминги хранятся в
+contextvar, поэтому в пулы потоков задачи нужно отправлять через
+``contextvars.copy_context().run``.
+"""
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from threading import Lock
+from time import perf_counter
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=(), collect=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._collect = collect
+        self._values = {}
+        self._lock = Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self):
+        """Пары ``(label_values, value)``; для метрик с ``collect`` — из колбэка."""
+        if self._collect is not None:
+            return list(self._collect())
+        with self._lock:
+            return list(self._values.items())
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        for values, value in self.samples():
+            lines.append(f'{self.name}{_format_labels(self.labelnames, values)} {_format_value(value)}')
+        return lines
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.get(key) or ([0] * len(self.buckets), 0.0)
+            counts[index] += 1
+            self._values[key] = (counts, total + value)
+
+    def samples(self):
+        with self._lock:
+            return [(key, (list(counts), total)) for key, (counts, total) in self._values.items()]
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        for values, (counts, total) in self.samples():
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, values, [('le', _format_value(bound))])
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = _format_labels(self.labelnames, values)
+            lines.append(f'{self.name}_sum{labels} {_format_value(total)}')
+            lines.append(f'{self.name}_count{labels} {cumulative}')
+        return lines
+
+
+class Registry:
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+GITHUB_REQUEST_SECONDS = REGISTRY.register(Histogram(
+    'ghstats_github_request_seconds',
+    'Latency of GitHub API calls',
+    ('resource', 'status')
+))
+GITHUB_CALLS_PER_LOAD = REGISTRY.register(Histogram(
+    'ghstats_github_calls_per_load',
+    'GitHub API calls made to build stats for one user',
+    buckets=(1, 2, 3, 5, 10, 20, 50, 100)
+))
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    'ghstats_stage_seconds',
+    'Time spent in each stage of building stats',
+    ('stage',)
+))
+CHART_BUILD_SECONDS = REGISTRY.register(Histogram(
+    'ghstats_chart_build_seconds',
+    'Time spent building and rendering one chart',
+    ('chart',)
+))
+HTTP_REQUEST_SECONDS = REGISTRY.register(Histogram(
+    'ghstats_http_request_seconds',
+    'Latency of requests served by the dashboard',
+    ('endpoint', 'status')
+))
+
+
+class Timings:
+    """Длительности этапов одного запроса (или одной загрузки статистики)."""
+
+    def __init__(self, parent=None):
+        self.parent = parent
+        self.stages = {}
+        self.calls = 0
+        self._lock = Lock()
+
+    def add(self, stage, seconds, calls=0):
+        with self._lock:
+            self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+            self.calls += calls
+        if self.parent is not None:
+            self.parent.add(stage, seconds, calls)
+
+    def server_timing(self):
+        with self._lock:
+            stages = list(self.stages.items())
+            calls = self.calls
+        parts = []
+        for stage, seconds in stages:
+            part = f'{stage};dur={seconds * 1000:.1f}'
+            if stage == 'github':
+                part += f';desc="{calls} calls"'
+            parts.append(part)
+        return ', '.join(parts)
+
+
+_current = ContextVar('ghstats_timings', default=None)
+
+
+def bind(timings):
+    """Делает ``timings`` текущими; возвращает токен для ``unbind``."""
+    return _current.set(timings)
+
+
+def unbind(token):
+    _current.reset(token)
+
+
+@contextmanager
+def track():
+    """Собирает тайминги вложенного кода; они же уходят во внешний ``track``."""
+    timings = Timings(parent=_current.get())
+    token = bind(timings)
+    try:
+        yield timings
+    finally:
+        unbind(token)
+
+
+def record(stage, seconds, calls=0):
+    timings = _current.get()
+    if timings is not None:
+        timings.add(stage, seconds, calls)
+
+
+@contextmanager
+def stage_timer(stage):
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, stage=stage)
+        record(stage, elapsed)
+
+
+@contextmanager
+def chart_timer(name):
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = perf_counter() - start
+        CHART_BUILD_SECONDS.observe(elapsed, chart=name)
+        record(f'chart-{name}', elapsed)
+
+
+def observe_github_call(resource, status, seconds):
+    GITHUB_REQUEST_SECONDS.observe(seconds, resource=resource, status=status)
+    record('github', seconds, calls=1)
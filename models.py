@@ -0,0 +1,119 @@
+import re
+from datetime import datetime, timezone
+from cache import estimate_size
+
+# Логин GitHub: буквы, цифры и дефисы, не с дефиса, не длиннее 39 символов
+LOGIN_RE = re.compile(r'[A-Za-z0-9][A-Za-z0-9-]{0,38}')
+
+
+def is_valid_login(login):
+    """Годится ли строка как логин GitHub (и как часть пути ``/users/<login>``)."""
+    return isinstance(login, str) and LOGIN_RE.fullmatch(login) is not None
+
+
+def parse_datetime(value):
+    if not value:
+        return None
+    return datetime.strptime(value, '%Y-%m-%dT%H:%M:%SZ').replace(tzinfo=timezone.utc)
+
+
+def _restore(cls, values):
+    record = cls.__new__(cls)
+    # Поля, добавленные после сохранения снимка в кэш, получают None
+    values = tuple(values) + (None,) * (len(cls.__slots__) - len(values))
+    for name, value in zip(cls.__slots__, values):
+        object.__setattr__(record, name, value)
+    return record
+
+
+class _Record:
+    """Неизменяемая запись со __slots__ — снимок данных одного запроса."""
+
+    __slots__ = ()
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            object.__setattr__(self, name, fields[name])
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f'{type(self).__name__} is read-only')
+
+    def __delattr__(self, name):
+        raise AttributeError(f'{type(self).__name__} is read-only')
+
+    def __sizeof__(self):
+        # Вместе с полями: иначе estimate_size видит только пустую запись
+        return object.__sizeof__(self) + sum(estimate_size(getattr(self, name)) for name in self.__slots__)
+
+    def __reduce__(self):
+        return _restore, (type(self), tuple(getattr(self, name) for name in self.__slots__))
+
+    def __repr__(self):
+        fields = ', '.join(f'{name}={getattr(self, name)!r}' for name in self.__slots__)
+        return f'{type(self).__name__}({fields})'
+
+
+class ProfileSnapshot(_Record):
+    __slots__ = (
+        'login', 'name', 'bio', 'avatar_url', 'html_url', 'public_repos',
+        'created_at', 'location', 'blog', 'is_organization', 'email',
+        'public_members', 'followers', 'following', 'public_gists', 'company',
+    )
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(
+            login=data['login'],
+            name=data.get('name'),
+            bio=data.get('bio'),
+            avatar_url=data.get('avatar_url'),
+            html_url=data.get('html_url'),
+            public_repos=data.get('public_repos', 0),
+            created_at=parse_datetime(data.get('created_at')),
+            location=data.get('location'),
+            blog=data.get('blog'),
+            is_organization=data.get('type') == 'Organization',
+            email=data.get('email'),
+            public_members=data.get('public_members_count', 0) or 0,
+            followers=data.get('followers', 0),
+            following=data.get('following', 0),
+            public_gists=data.get('public_gists', 0),
+            company=data.get('company'),
+        )
+
+
+class RepoSnapshot(_Record):
+    __slots__ = (
+        'name', 'description', 'stars', 'forks', 'watchers', 'language',
+        'html_url', 'fork', 'created_at', 'updated_at', 'pushed_at',
+    )
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(
+            name=data['name'],
+            description=data.get('description'),
+            stars=data.get('stargazers_count', 0),
+            forks=data.get('forks_count', 0),
+            watchers=data.get('watchers_count', 0),
+            language=data.get('language'),
+            html_url=data.get('html_url'),
+            fork=data.get('fork', False),
+            created_at=parse_datetime(data.get('created_at')),
+            updated_at=parse_datetime(data.get('updated_at')),
+            pushed_at=parse_datetime(data.get('pushed_at')),
+        )
+
+
+class UserSnapshot(_Record):
+    __slots__ = ('profile', 'repos')
+
+
+class FetchState(_Record):
+    """Снимок пользователя вместе с валидаторами (ETag / Last-Modified) ответов.
+
+    ``pages`` — кортеж ``(etag, last_modified, repo_count, last_page)`` для
+    каждой загруженной страницы списка репозиториев.
+    """
+
+    __slots__ = ('snapshot', 'user_validator', 'pages', 'not_modified')
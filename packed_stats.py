@@ -0,0 +1,86 @@
+import json
+import struct
+import sys
+import zlib
+
+# Заголовок: число секций, затем на каждую — длина имени, имя, флаги, длина данных
+_COUNT = struct.Struct('<H')
+_SECTION = struct.Struct('<BBI')
+_COMPRESSED = 1
+
+
+class PackedStats:
+    """Секции успешного результата статистики, упакованные в один ``bytes``.
+
+    Каждая секция (``profile``, ``repositories``, ``charts``, ...) хранится
+    отдельным JSON; крупные секции (HTML графиков) сжимаются zlib.
+    Заголовок со смещениями позволяет декодировать только нужные секции:
+    ответу из кэша с готовым телом не нужно ничего, batch без графиков
+    не распаковывает графики. Один объект ``bytes`` вместо дерева словарей
+    и строк занимает в разы меньше памяти и дешево пишется в pickle.
+    """
+
+    __slots__ = ('blob',)
+
+    def __init__(self, blob):
+        self.blob = blob
+
+    @classmethod
+    def pack(cls, data, compress_min_size=1024, level=6):
+        header = [_COUNT.pack(len(data))]
+        payloads = []
+        for name, value in data.items():
+            payload = json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode()
+            flags = 0
+            if len(payload) >= compress_min_size:
+                payload = zlib.compress(payload, level)
+                flags = _COMPRESSED
+            encoded_name = name.encode()
+            header.append(_SECTION.pack(len(encoded_name), flags, len(payload)) + encoded_name)
+            payloads.append(payload)
+        return cls(b''.join(header + payloads))
+
+    def names(self):
+        return [name for name, _, _, _ in self._index()]
+
+    def section(self, name):
+        for section_name, flags, offset, length in self._index():
+            if section_name == name:
+                return self._decode(flags, offset, length)
+        raise KeyError(name)
+
+    def sections(self, names=None):
+        """Словарь секций; ``names`` ограничивает, какие из них декодировать."""
+        wanted = None if names is None else set(names)
+        return {
+            name: self._decode(flags, offset, length)
+            for name, flags, offset, length in self._index()
+            if wanted is None or name in wanted
+        }
+
+    def _index(self):
+        blob = self.blob
+        count, = _COUNT.unpack_from(blob)
+        position = _COUNT.size
+        entries = []
+        for _ in range(count):
+            name_length, flags, length = _SECTION.unpack_from(blob, position)
+            position += _SECTION.size
+            entries.append([blob[position:position + name_length].decode(), flags, 0, length])
+            position += name_length
+        for entry in entries:
+            entry[2] = position
+            position += entry[3]
+        return entries
+
+    def _decode(self, flags, offset, length):
+        payload = memoryview(self.blob)[offset:offset + length]
+        if flags & _COMPRESSED:
+            payload = zlib.decompress(payload)
+        return json.loads(bytes(payload))
+
+    def __sizeof__(self):
+        return object.__sizeof__(self) + sys.getsizeof(self.blob)
+
+    def __reduce__(self):
+        return PackedStats, (self.blob,)
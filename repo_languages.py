@@ -0,0 +1,100 @@
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextvars import copy_context
+from threading import Lock
+import requests
+from github_client import GitHubAPIError
+
+
+class RepoLanguages:
+    """Побайтовая разбивка языков по всем репозиториям владельца.
+
+    ``/repos/{owner}/{repo}/languages`` запрашивается параллельно, не больше
+    ``workers`` запросов одновременно. Ответ кэшируется на репозиторий
+    вместе с его ``pushed_at``: пока в репозиторий не пушили, он больше не
+    запрашивается. ``cache`` отдельный от кэша статистики, чтобы записи
+    репозиториев не вытесняли пользователей. Если за ``budget`` секунд
+    ответили не все, возвращается частичный результат, а оставшиеся
+    запросы дописывают кэш в фоне.
+    """
+
+    def __init__(self, client, cache, workers=8, ttl=None):
+        self.client = client
+        self.cache = cache
+        self.ttl = ttl
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='repo-languages')
+        self._inflight = {}
+        self._lock = Lock()
+
+    def breakdown(self, owner, repos, budget=None):
+        totals = Counter()
+        analyzed = 0
+        futures = []
+        for repo in repos:
+            languages = self._cached(owner, repo)
+            if languages is None:
+                futures.append(self._submit(owner, repo))
+            else:
+                totals.update(languages)
+                analyzed += 1
+
+        if futures:
+            done, _ = wait(futures, timeout=budget)
+            for future in done:
+                languages = future.result()
+                if languages is not None:
+                    totals.update(languages)
+                    analyzed += 1
+
+        total_bytes = sum(totals.values())
+        return {
+            'total_bytes': total_bytes,
+            'total_languages': len(totals),
+            'languages': [{
+                'language': language,
+                'bytes': size,
+                'percentage': round(size / total_bytes * 100, 2)
+            } for language, size in totals.most_common()],
+            'repos_analyzed': analyzed,
+            'repos_total': len(repos),
+            'partial': analyzed < len(repos),
+        }
+
+    def _key(self, owner, repo):
+        return f'repo_languages_{owner.lower()}/{repo.name.lower()}'
+
+    def _cached(self, owner, repo):
+        if repo.pushed_at is None:
+            # В пустой репозиторий не пушили, языков в нем нет
+            return {}
+        entry = self.cache.get(self._key(owner, repo))
+        if entry and entry['pushed_at'] == repo.pushed_at:
+            return entry['languages']
+        return None
+
+    def _submit(self, owner, repo):
+        key = self._key(owner, repo)
+        with self._lock:
+            future = self._inflight.get(key)
+            submitted = future is None
+            if submitted:
+                # Контекст копируется, чтобы запросы попали в тайминги загрузки
+                future = self._pool.submit(copy_context().run, self._fetch, owner, repo, key)
+                self._inflight[key] = future
+        # Вне блокировки: у завершенного future колбэк вызывается сразу в этом потоке
+        if submitted:
+            future.add_done_callback(lambda _: self._done(key))
+        return future
+
+    def _done(self, key):
+        with self._lock:
+            self._inflight.pop(key, None)
+
+    def _fetch(self, owner, repo, key):
+        try:
+            languages = self.client.get(f'/repos/{owner}/{repo.name}/languages').data
+        except (GitHubAPIError, requests.RequestException):
+            # Репозиторий не попадет в разбивку, секция вернется частичной
+            return None
+        self.cache.set(key, {'pushed_at': repo.pushed_at, 'languages': languages}, ttl=self.ttl)
+        return languages
@@ -0,0 +1,139 @@
+import sqlite3
+from threading import local
+from time import time
+from models import RepoSnapshot, parse_datetime
+
+REPO_COLUMNS = (
+    'name', 'description', 'stars', 'forks', 'watchers', 'language',
+    'html_url', 'fork', 'created_at', 'updated_at', 'pushed_at',
+)
+
+# Порядок выборки, повторяющий параметр sort списка репозиториев GitHub
+ORDER_BY = {
+    'pushed': 'pushed_at DESC',
+    'updated': 'updated_at DESC',
+    'created': 'created_at DESC',
+    'full_name': 'name COLLATE NOCASE ASC',
+}
+
+
+def repo_row(item):
+    """Нормализованная запись репозитория из ответа REST API."""
+    return (
+        item['name'],
+        item.get('description'),
+        item.get('stargazers_count', 0),
+        item.get('forks_count', 0),
+        item.get('watchers_count', 0),
+        item.get('language'),
+        item.get('html_url'),
+        bool(item.get('fork', False)),
+        item.get('created_at'),
+        item.get('updated_at'),
+        item.get('pushed_at'),
+    )
+
+
+class RepoStore:
+    """Локальная копия репозиториев владельцев в SQLite.
+
+    Хранит нормализованные записи по каждому владельцу и состояние
+    последней синхронизации (время и ETag первой страницы списка,
+    отсортированного по ``updated``), чтобы обновлять только изменения.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = local()
+        with self._connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS owners ('
+                'owner TEXT PRIMARY KEY, synced_at REAL NOT NULL, head_etag TEXT)'
+            )
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS repos ('
+                'owner TEXT NOT NULL, name TEXT NOT NULL, description TEXT, '
+                'stars INTEGER NOT NULL, forks INTEGER NOT NULL, watchers INTEGER NOT NULL, '
+                'language TEXT, html_url TEXT, fork INTEGER NOT NULL, '
+                'created_at TEXT, updated_at TEXT, pushed_at TEXT, '
+                'PRIMARY KEY (owner, name))'
+            )
+
+    def sync_state(self, owner):
+        """``(synced_at, head_etag)`` последней синхронизации или None."""
+        return self._connect().execute(
+            'SELECT synced_at, head_etag FROM owners WHERE owner = ?', (owner.lower(),)
+        ).fetchone()
+
+    def updated_at(self, owner):
+        """Словарь ``имя -> updated_at`` сохраненных репозиториев владельца."""
+        return dict(self._connect().execute(
+            'SELECT name, updated_at FROM repos WHERE owner = ?', (owner.lower(),)
+        ))
+
+    def count(self, owner):
+        return self._connect().execute(
+            'SELECT COUNT(*) FROM repos WHERE owner = ?', (owner.lower(),)
+        ).fetchone()[0]
+
+    def merge(self, owner, rows, head_etag, replace=False, max_repos=None):
+        """Добавляет или обновляет записи; ``replace`` сначала удаляет все старые.
+
+        Если записей больше ``max_repos``, удаляются давно не обновлявшиеся.
+        """
+        owner = owner.lower()
+        placeholders = ', '.join('?' * (len(REPO_COLUMNS) + 1))
+        with self._connect() as conn:
+            if replace:
+                conn.execute('DELETE FROM repos WHERE owner = ?', (owner,))
+            conn.executemany(
+                f'INSERT OR REPLACE INTO repos (owner, {", ".join(REPO_COLUMNS)}) VALUES ({placeholders})',
+                [(owner,) + row for row in rows]
+            )
+            if max_repos is not None:
+                conn.execute(
+                    'DELETE FROM repos WHERE owner = ? AND name IN ('
+                    'SELECT name FROM repos WHERE owner = ? '
+                    'ORDER BY updated_at DESC LIMIT -1 OFFSET ?)',
+                    (owner, owner, max_repos)
+                )
+            conn.execute(
+                'INSERT OR REPLACE INTO owners (owner, synced_at, head_etag) VALUES (?, ?, ?)',
+                (owner, time(), head_etag)
+            )
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute('DELETE FROM repos')
+            conn.execute('DELETE FROM owners')
+
+    def load(self, owner, sort='pushed', limit=None):
+        """Репозитории владельца в порядке ``sort``, не больше ``limit``."""
+        order = ORDER_BY.get(sort, ORDER_BY['full_name'])
+        rows = self._connect().execute(
+            f'SELECT {", ".join(REPO_COLUMNS)} FROM repos WHERE owner = ? ORDER BY {order} LIMIT ?',
+            (owner.lower(), -1 if limit is None else limit)
+        )
+        return tuple(RepoSnapshot(
+            name=name,
+            description=description,
+            stars=stars,
+            forks=forks,
+            watchers=watchers,
+            language=language,
+            html_url=html_url,
+            fork=bool(fork),
+            created_at=parse_datetime(created_at),
+            updated_at=parse_datetime(updated_at),
+            pushed_at=parse_datetime(pushed_at),
+        ) for name, description, stars, forks, watchers, language, html_url, fork,
+            created_at, updated_at, pushed_at in rows)
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
@@ -5,9 +5,18 @@ GitHub Stats Dashboard - Launcher Script
 Скрипт для запуска приложения с проверкой зависимостей
 """
 
+import argparse
+import importlib.util
+import re
 import sys
 import subprocess
 import os
+from collections import Counter
+from time import perf_counter
+from models import LOGIN_RE, is_valid_login
+
+REQUIRED_MODULES = ('flask', 'requests', 'plotly', 'dotenv')
+STATS_PATH_RE = re.compile(rf'/api/stats/({LOGIN_RE.pattern})(?![A-Za-z0-9-])')
 
 def check_python_version():
     """Проверка версии Python"""
@@ -19,22 +28,22 @@ def check_python_version():
 
 def check_dependencies():
     """Проверка установленных зависимостей"""
-    try:
-        import flask
-        import github
-        import plotly
+    # find_spec только находит пакеты, не импортируя их: plotly и pandas
+    # загрузятся при первом построении графика
+    missing = [name for name in REQUIRED_MODULES if importlib.util.find_spec(name) is None]
+    if not missing:
         print("✅ Все зависимости установлены")
         return True
-    except ImportError as e:
-        print(f"❌ Не установлены зависимости: {e}")
-        print("\n🔧 Установка зависимостей...")
-        try:
-            subprocess.check_call([sys.executable, "-m", "pip", "install", "-r", "requirements.txt"])
-            print("✅ Зависимости успешно установлены")
-            return True
-        except subprocess.CalledProcessError:
-            print("❌ Ошибка установки зависимостей")
-            return False
+    
+    print(f"❌ Не установлены зависимости: {', '.join(missing)}")
+    print("\n🔧 Установка зависимостей...")
+    try:
+        subprocess.check_call([sys.executable, "-m", "pip", "install", "-r", "requirements.txt"])
+        print("✅ Зависимости успешно установлены")
+        return True
+    except subprocess.CalledProcessError:
+        print("❌ Ошибка установки зависимостей")
+        return False
 
 def check_env_file():
     """Проверка файла .env"""
@@ -45,7 +54,37 @@ def check_env_file():
     else:
         print("✅ Файл .env найден")
 
-def run_app():
+def read_prewarm_usernames(path, limit):
+    """Пользователи для прогрева: список логинов или access-лог.
+
+    Строка-логин берется как есть; в строках лога ищутся запросы
+    ``/api/stats/<username>``. Возвращает не больше ``limit`` самых
+    частых пользователей.
+    """
+    counts = Counter()
+    with open(path, encoding='utf-8', errors='replace') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            if is_valid_login(line):
+                counts[line.lower()] += 1
+            else:
+                counts.update(match.lower() for match in STATS_PATH_RE.findall(line) if match != 'batch')
+    return [username for username, _ in counts.most_common(limit)]
+
+def prewarm_cache(github_stats, usernames, workers):
+    """Загружает статистику пользователей в кэш не более чем в ``workers`` потоков"""
+    print(f"🔥 Прогрев кэша: {len(usernames)} пользователей, {workers} потоков")
+    start = perf_counter()
+    failed = 0
+    for username, result in github_stats.iter_many_stats(usernames, workers=workers, sections=()):
+        if not result['success']:
+            failed += 1
+            print(f"   ⚠️  {username}: {result['error']}")
+    print(f"✅ Кэш прогрет за {perf_counter() - start:.1f} с (ошибок: {failed})")
+
+def run_app(args):
     """Запуск приложения"""
     print("\n" + "="*60)
     print("🚀 Запуск GitHub Stats Dashboard...")
@@ -57,21 +96,46 @@ def run_app():
         
         print(f"📍 Приложение будет доступно по адресу: http://localhost:5000")
         print(f"🔧 Режим отладки: {'Включен' if Config.DEBUG else 'Выключен'}")
-        print(f"🔑 GitHub токен: {'Настроен' if Config.GITHUB_TOKEN else 'Не настроен'}")
+        print(f"🔑 GitHub токены: {len(Config.GITHUB_TOKENS) or 'Не настроены'}")
+        
+        if args.prewarm:
+            from app import github_stats
+            usernames = read_prewarm_usernames(args.prewarm, args.prewarm_limit)
+            prewarm_cache(github_stats, usernames, args.prewarm_workers)
+            if args.prewarm_only:
+                return
+        
         print("\n💡 Нажмите Ctrl+C для остановки\n")
         print("="*60 + "\n")
         
         app.run(
             host='0.0.0.0',
             port=5000,
-            debug=Config.DEBUG
+            debug=Config.DEBUG,
+            # Перезапуск в дочернем процессе потерял бы прогретый кэш в памяти
+            use_reloader=Config.DEBUG and not args.prewarm
         )
     except Exception as e:
         print(f"\n❌ Ошибка при запуске приложения: {e}")
         sys.exit(1)
 
+def parse_args():
+    """Аргументы командной строки"""
+    parser = argparse.ArgumentParser(description='GitHub Stats Dashboard')
+    parser.add_argument('--prewarm', metavar='FILE',
+                        help='прогреть кэш: файл с логинами по строке или access-лог')
+    parser.add_argument('--prewarm-limit', type=int, default=100,
+                        help='сколько самых частых пользователей прогреть (по умолчанию 100)')
+    parser.add_argument('--prewarm-workers', type=int, default=4,
+                        help='параллельных загрузок при прогреве (по умолчанию 4)')
+    parser.add_argument('--prewarm-only', action='store_true',
+                        help='только прогреть кэш (sqlite/redis) и выйти')
+    return parser.parse_args()
+
 def main():
     """Главная функция"""
+    args = parse_args()
+    
     print("\n" + "="*60)
     print("📊 GitHub Stats Dashboard - Проверка системы")
     print("="*60 + "\n")
@@ -85,7 +149,7 @@ def main():
     check_env_file()
     
     # Запуск
-    run_app()
+    run_app(args)
 
 if __name__ == '__main__':
     main()
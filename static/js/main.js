@@ -22,6 +22,21 @@ document.addEventListener('DOMContentLoaded', function() {
     const themeIcon = document.getElementById('themeIcon');
     const exportBtn = document.getElementById('exportBtn');
     
+    // Соответствие графиков элементам страницы: [контейнер, карточка]
+    const CHART_ELEMENTS = {
+        languages_pie: ['languagesChart', 'languagesChartCard'],
+        top_repos_bar: ['topReposChart', 'topReposChartCard'],
+        activity_timeline: ['activityChart', 'activityChartCard'],
+        stars_vs_forks: ['scatterChart', 'scatterChartCard'],
+        repos_by_year: ['reposByYearChart', 'reposByYearChartCard'],
+        stars_forks_grouped: ['groupedChart', 'groupedChartCard'],
+        weekly_activity: ['weeklyActivityChart', 'weeklyActivityChartCard'],
+        repo_types_pie: ['repoTypesChart', 'repoTypesChartCard']
+    };
+    const PLOTLY_CDN_URL = 'https://cdn.plot.ly/plotly-2.27.0.min.js';
+    const JOB_POLL_MAX_MS = 1000;
+    let plotlyLoader = null;
+    
     // Функция для вставки HTML с выполнением скриптов
     function setInnerHTMLWithScripts(element, html) {
         element.innerHTML = html;
@@ -137,18 +152,12 @@ document.addEventListener('DOMContentLoaded', function() {
         hideStats();
 
         try {
-            const response = await fetch(`/api/stats/${username}`);
-            const result = await response.json();
-
-            if (!response.ok || !result.success) {
-                throw new Error(result.error || 'Ошибка при получении данных');
-            }
+            const profile = window.EventSource
+                ? await streamUserStats(username)
+                : await loadUserStats(username);
 
-            // Отображаем статистику
-            displayStats(result.data);
-            
             // Добавляем в историю
-            addToHistory(username, result.data.profile.name, result.data.profile.avatar_url);
+            addToHistory(username, profile.name, profile.avatar_url);
             
         } catch (err) {
             showError(err.message || 'Произошла ошибка при загрузке данных');
@@ -158,140 +167,246 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     }
 
+    // Загрузка статистики одним ответом; дорогую загрузку сервер ставит в задачу (202)
+    async function loadUserStats(username) {
+        const response = await fetch(`/api/stats/${encodeURIComponent(username)}`);
+        const result = await response.json();
+
+        if (response.status === 202) {
+            return await pollJob(result.job);
+        }
+        if (!response.ok || !result.success) {
+            throw new Error(result.error || 'Ошибка при получении данных');
+        }
+
+        // Отображаем статистику
+        displayStats(result.data);
+        return result.data.profile;
+    }
+
+    // Потоковая загрузка: каждая секция отображается, как только пришла
+    function streamUserStats(username) {
+        return new Promise((resolve, reject) => {
+            const source = new EventSource(`/api/stats/${encodeURIComponent(username)}/stream`);
+            const parse = handler => event => handler(JSON.parse(event.data));
+            let profile = null;
+
+            source.addEventListener('profile', parse(data => {
+                profile = data;
+                resetCharts();
+                displayProfile(data);
+                hideLoading();
+                showStats();
+            }));
+            source.addEventListener('repositories', parse(displayRepositories));
+            source.addEventListener('languages', parse(displayLanguages));
+            source.addEventListener('chart', parse(data => {
+                displayChart(data.name, data.html);
+                hideEmptyChartRows();
+            }));
+            source.addEventListener('charts', parse(data => {
+                displayLazyCharts(profile.login, data.chart_names);
+                hideEmptyChartRows();
+            }));
+            // Дорогую загрузку сервер поставил в задачу вместо потока
+            source.addEventListener('job', parse(job => {
+                source.close();
+                pollJob(job).then(resolve, reject);
+            }));
+            source.addEventListener('done', () => {
+                source.close();
+                hideEmptyChartRows();
+                resolve(profile);
+            });
+            // Событие error приходит и от сервера (с data), и при обрыве соединения
+            source.addEventListener('error', event => {
+                source.close();
+                const message = event.data ? JSON.parse(event.data).error : 'Соединение с сервером прервано';
+                reject(new Error(message));
+            });
+        });
+    }
+
+    // Опрос фоновой задачи; готовые секции показываются, не дожидаясь графиков
+    async function pollJob(job) {
+        const shown = new Set();
+        for (let attempt = 1; ; attempt++) {
+            const sections = (job.progress && job.progress.sections) || {};
+            Object.entries(sections).forEach(([name, data]) => {
+                if (shown.has(name)) return;
+                shown.add(name);
+                if (name === 'profile') {
+                    resetCharts();
+                    displayProfile(data);
+                    hideLoading();
+                    showStats();
+                } else if (name === 'repositories') {
+                    displayRepositories(data);
+                } else if (name === 'languages') {
+                    displayLanguages(data);
+                }
+            });
+
+            if (job.status === 'done') {
+                if (!job.result.success) {
+                    throw new Error(job.result.error || 'Ошибка при получении данных');
+                }
+                displayStats(job.result.data);
+                return job.result.data.profile;
+            }
+            if (job.status === 'failed' || job.status === 'expired') {
+                throw new Error(job.error || 'Ошибка при получении данных');
+            }
+
+            await new Promise(resolve => setTimeout(resolve, Math.min(JOB_POLL_MAX_MS, 250 * attempt)));
+            const response = await fetch(`/api/jobs/${job.id}`);
+            const result = await response.json();
+            if (!response.ok || !result.success) {
+                throw new Error(result.error || 'Задача не найдена');
+            }
+            job = result.job;
+        }
+    }
+
     // Отображение статистики
     function displayStats(data) {
-        // Профиль
-        document.getElementById('avatar').src = data.profile.avatar_url;
-        document.getElementById('profileName').textContent = data.profile.name;
-        document.getElementById('profileLogin').textContent = '@' + data.profile.login;
-        document.getElementById('profileBio').textContent = data.profile.bio;
-        document.getElementById('profileLocation').textContent = data.profile.location;
-        document.getElementById('profileCompany').textContent = data.profile.company;
-        document.getElementById('profileCreated').textContent = 'С ' + data.profile.created_at;
+        displayProfile(data.profile);
+        displayRepositories(data.repositories);
+        displayLanguages(data.languages);
+
+        // Графики - показываем только если есть данные
+        resetCharts();
+        if (data.charts_mode === 'lazy') {
+            displayLazyCharts(data.profile.login, data.chart_names);
+        } else {
+            Object.entries(data.charts).forEach(([name, html]) => displayChart(name, html));
+        }
+
+        // Скрываем пустые ряды графиков
+        hideEmptyChartRows();
+
+        // Показываем секцию со статистикой
+        showStats();
+    }
+
+    // Профиль
+    function displayProfile(profile) {
+        document.getElementById('avatar').src = profile.avatar_url;
+        document.getElementById('profileName').textContent = profile.name;
+        document.getElementById('profileLogin').textContent = '@' + profile.login;
+        document.getElementById('profileBio').textContent = profile.bio;
+        document.getElementById('profileLocation').textContent = profile.location;
+        document.getElementById('profileCompany').textContent = profile.company;
+        document.getElementById('profileCreated').textContent = 'С ' + profile.created_at;
         
         const blogLink = document.getElementById('profileBlog');
-        if (data.profile.blog && data.profile.blog !== 'Нет') {
-            blogLink.href = data.profile.blog.startsWith('http') ? data.profile.blog : 'https://' + data.profile.blog;
-            blogLink.textContent = data.profile.blog;
+        if (profile.blog && profile.blog !== 'Нет') {
+            blogLink.href = profile.blog.startsWith('http') ? profile.blog : 'https://' + profile.blog;
+            blogLink.textContent = profile.blog;
             blogLink.style.display = 'inline';
         } else {
             blogLink.parentElement.style.display = 'none';
         }
 
         // Статистика профиля
-        if (data.profile.is_organization) {
-            document.getElementById('followers').textContent = formatNumber(data.profile.public_members || 0);
+        if (profile.is_organization) {
+            document.getElementById('followers').textContent = formatNumber(profile.public_members || 0);
             document.getElementById('following').textContent = '-';
             document.getElementById('gists').textContent = '-';
             document.querySelector('[for="followers"] .stat-label').textContent = 'Участники';
         } else {
-            document.getElementById('followers').textContent = formatNumber(data.profile.followers);
-            document.getElementById('following').textContent = formatNumber(data.profile.following);
-            document.getElementById('gists').textContent = formatNumber(data.profile.public_gists);
+            document.getElementById('followers').textContent = formatNumber(profile.followers);
+            document.getElementById('following').textContent = formatNumber(profile.following);
+            document.getElementById('gists').textContent = formatNumber(profile.public_gists);
         }
-        document.getElementById('repos').textContent = formatNumber(data.profile.public_repos);
-
-        // Статистика репозиториев
-        document.getElementById('totalStars').textContent = formatNumber(data.repositories.total_stars);
-        document.getElementById('totalForks').textContent = formatNumber(data.repositories.total_forks);
-        document.getElementById('totalWatchers').textContent = formatNumber(data.repositories.total_watchers);
-        document.getElementById('totalLanguages').textContent = formatNumber(data.languages.total_languages);
-
-        // Сначала скрываем все карточки
-        const allChartCards = ['languagesChartCard', 'topReposChartCard', 'activityChartCard', 
-                               'scatterChartCard', 'reposByYearChartCard', 'groupedChartCard',
-                               'weeklyActivityChartCard', 'repoTypesChartCard'];
-        allChartCards.forEach(cardId => {
+        document.getElementById('repos').textContent = formatNumber(profile.public_repos);
+    }
+
+    // Статистика репозиториев и топ репозитории
+    function displayRepositories(repositories) {
+        document.getElementById('totalStars').textContent = formatNumber(repositories.total_stars);
+        document.getElementById('totalForks').textContent = formatNumber(repositories.total_forks);
+        document.getElementById('totalWatchers').textContent = formatNumber(repositories.total_watchers);
+        displayTopRepos(repositories.top_repos);
+    }
+
+    // Число языков и таблица языков
+    function displayLanguages(languages) {
+        document.getElementById('totalLanguages').textContent = formatNumber(languages.total_languages);
+        displayLanguagesTable(languages.languages);
+    }
+
+    // Скрываем все карточки графиков перед новой загрузкой
+    function resetCharts() {
+        Object.values(CHART_ELEMENTS).forEach(([chartId, cardId]) => {
             const card = document.getElementById(cardId);
             if (card) card.style.display = 'none';
+            const elem = document.getElementById(chartId);
+            if (elem) elem.innerHTML = '';
         });
+    }
 
-        // Графики - показываем только если есть данные
-        console.log('Charts data:', Object.keys(data.charts));
-        
-        if (data.charts.languages_pie) {
-            const elem = document.getElementById('languagesChart');
-            if (elem) {
-                setInnerHTMLWithScripts(elem, data.charts.languages_pie);
-                document.getElementById('languagesChartCard').style.display = 'block';
-                console.log('Languages chart loaded');
-            }
-        }
-        
-        if (data.charts.top_repos_bar) {
-            const elem = document.getElementById('topReposChart');
-            if (elem) {
-                setInnerHTMLWithScripts(elem, data.charts.top_repos_bar);
-                document.getElementById('topReposChartCard').style.display = 'block';
-                console.log('Top repos chart loaded');
-            }
-        }
-        
-        if (data.charts.activity_timeline) {
-            const elem = document.getElementById('activityChart');
-            if (elem) {
-                setInnerHTMLWithScripts(elem, data.charts.activity_timeline);
-                document.getElementById('activityChartCard').style.display = 'block';
-                console.log('Activity chart loaded');
-            }
-        }
-        
-        if (data.charts.stars_vs_forks) {
-            const elem = document.getElementById('scatterChart');
-            if (elem) {
-                setInnerHTMLWithScripts(elem, data.charts.stars_vs_forks);
-                document.getElementById('scatterChartCard').style.display = 'block';
-                console.log('Scatter chart loaded');
-            }
-        }
-        
-        if (data.charts.repos_by_year) {
-            const elem = document.getElementById('reposByYearChart');
-            if (elem) {
-                setInnerHTMLWithScripts(elem, data.charts.repos_by_year);
-                document.getElementById('reposByYearChartCard').style.display = 'block';
-                console.log('Repos by year chart loaded');
-            }
-        }
-        
-        if (data.charts.stars_forks_grouped) {
-            const elem = document.getElementById('groupedChart');
-            if (elem) {
-                setInnerHTMLWithScripts(elem, data.charts.stars_forks_grouped);
-                document.getElementById('groupedChartCard').style.display = 'block';
-                console.log('Grouped chart loaded');
-            }
-        }
-        
-        if (data.charts.weekly_activity) {
-            const elem = document.getElementById('weeklyActivityChart');
-            if (elem) {
-                setInnerHTMLWithScripts(elem, data.charts.weekly_activity);
-                document.getElementById('weeklyActivityChartCard').style.display = 'block';
-                console.log('Weekly activity chart loaded');
-            }
-        }
-        
-        if (data.charts.repo_types_pie) {
-            const elem = document.getElementById('repoTypesChart');
-            if (elem) {
-                setInnerHTMLWithScripts(elem, data.charts.repo_types_pie);
-                document.getElementById('repoTypesChartCard').style.display = 'block';
-                console.log('Repo types chart loaded');
-            }
+    function displayChart(name, html) {
+        const [chartId, cardId] = CHART_ELEMENTS[name] || [];
+        const elem = chartId && document.getElementById(chartId);
+        if (elem && html) {
+            setInnerHTMLWithScripts(elem, html);
+            document.getElementById(cardId).style.display = 'block';
+            console.log(`Chart ${name} loaded`);
         }
+    }
 
-        // Топ репозитории
-        displayTopRepos(data.repositories.top_repos);
+    function displayLazyCharts(username, names) {
+        console.log('Lazy charts:', names);
+        names.forEach(name => showLazyChart(username, name));
+    }
 
-        // Таблица языков
-        displayLanguagesTable(data.languages.languages);
+    // Ленивая загрузка графика: JSON фигуры запрашивается, когда карточка видна
+    function showLazyChart(username, name) {
+        const [chartId, cardId] = CHART_ELEMENTS[name] || [];
+        const elem = chartId && document.getElementById(chartId);
+        if (!elem) return;
+
+        elem.innerHTML = '';
+        const card = document.getElementById(cardId);
+        card.style.display = 'block';
+
+        const chartObserver = new IntersectionObserver(entries => {
+            if (!entries.some(entry => entry.isIntersecting)) return;
+            chartObserver.disconnect();
+            renderLazyChart(elem, username, name);
+        }, { rootMargin: '200px 0px' });
+        chartObserver.observe(card);
+    }
 
-        // Скрываем пустые ряды графиков
-        hideEmptyChartRows();
+    async function renderLazyChart(elem, username, name) {
+        try {
+            const [response] = await Promise.all([
+                fetch(`/api/stats/${encodeURIComponent(username)}/charts/${name}`),
+                loadPlotly()
+            ]);
+            const figure = await response.json();
+            if (!response.ok) {
+                throw new Error(figure.error || 'Ошибка загрузки графика');
+            }
+            Plotly.newPlot(elem, figure.data, figure.layout, { responsive: true });
+            console.log(`Chart ${name} loaded`);
+        } catch (err) {
+            console.error('Chart error:', err);
+        }
+    }
 
-        // Показываем секцию со статистикой
-        showStats();
+    function loadPlotly() {
+        if (!plotlyLoader) {
+            plotlyLoader = window.Plotly ? Promise.resolve() : new Promise((resolve, reject) => {
+                const script = document.createElement('script');
+                script.src = PLOTLY_CDN_URL;
+                script.onload = resolve;
+                script.onerror = reject;
+                document.head.appendChild(script);
+            });
+        }
+        return plotlyLoader;
     }
 
     // Скрытие пустых рядов графиков
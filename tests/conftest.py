@@ -0,0 +1,54 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from benchmarks.fake_github import FakeGitHub
+from benchmarks.fixtures import synthetic_fixture, synthetic_fixtures
+
+# Пользователи для параллельных запросов: у каждого свое число репозиториев
+STRESS_USERS = {f'stress-{index}': index * 4 + 1 for index in range(20)}
+
+
+@pytest.fixture(scope='session')
+def fixtures():
+    fixtures = synthetic_fixtures()
+    fixtures.update({login: synthetic_fixture(login, count) for login, count in STRESS_USERS.items()})
+    return fixtures
+
+
+@pytest.fixture(scope='session')
+def fake(fixtures):
+    # Задержка, чтобы параллельные запросы гарантированно пересекались
+    fake = FakeGitHub(fixtures, latency=0.05).start()
+    yield fake
+    fake.stop()
+
+
+@pytest.fixture
+def stats(fake, monkeypatch):
+    """GitHubStats с пустым кэшем в памяти против фейкового GitHub."""
+    for name, value in {
+        'GITHUB_API_URL': fake.url,
+        'CACHE_BACKEND': 'memory',
+        'FETCH_BACKEND': 'rest',
+        'CHARTS_MODE': 'lazy',
+        'LANGUAGE_BYTES': False,
+        'HISTORY_PATH': '',
+    }.items():
+        monkeypatch.setattr(Config, name, value)
+    from github_api import GitHubStats
+    stats = GitHubStats(tokens=['test-token'])
+    fake.reset_calls()
+    return stats
+
+
+@pytest.fixture
+def client(stats, monkeypatch):
+    """Тестовый клиент Flask поверх ``stats``."""
+    import app
+    monkeypatch.setattr(app, 'github_stats', stats)
+    return app.app.test_client()
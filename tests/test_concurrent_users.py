@@ -0,0 +1,24 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from config import Config
+
+
+def test_concurrent_requests_for_different_users(fixtures, stats):
+    # Каждый пользователь запрашивается из нескольких потоков одновременно
+    usernames = [login for login in fixtures if login.startswith('stress-') for _ in range(3)]
+    barrier = threading.Barrier(len(usernames))
+
+    def load(username):
+        barrier.wait()
+        return stats.get_user_stats(username)
+
+    with ThreadPoolExecutor(max_workers=len(usernames)) as pool:
+        results = list(pool.map(load, usernames))
+
+    for username, result in zip(usernames, results):
+        assert result['success'], result.get('error')
+        data = result['data']
+        assert data['profile']['login'] == username
+        expected = min(len(fixtures[username]['repos']), Config.MAX_REPOS)
+        assert data['repositories']['total_repos'] == expected
@@ -0,0 +1,83 @@
+import pytest
+
+from benchmarks.fake_github import FakeGitHub
+from benchmarks.fixtures import synthetic_fixture
+from config import Config
+from fetchers import DeltaFetcher
+from github_client import GitHubClient
+from repo_store import RepoStore
+
+
+@pytest.fixture
+def fixture():
+    return synthetic_fixture('delta-user', 30)
+
+
+@pytest.fixture
+def fake(fixture):
+    # Своя копия фейкового GitHub: тесты меняют фикстуру
+    fake = FakeGitHub({'delta-user': fixture}).start()
+    yield fake
+    fake.stop()
+
+
+@pytest.fixture
+def fetcher(fake, tmp_path):
+    client = GitHubClient(tokens=['test-token'], base_url=fake.url)
+    return DeltaFetcher(client, RepoStore(str(tmp_path / 'repos.sqlite3')), max_repos=Config.MAX_REPOS, page_size=10)
+
+
+def _refresh(fetcher, fake, state):
+    fake.reset_calls()
+    state = fetcher.fetch('delta-user', state)
+    return state, fake.reset_calls()
+
+
+def test_refresh_after_full_sync_is_not_modified(fetcher, fake):
+    state, _ = _refresh(fetcher, fake, None)
+    assert not state.not_modified
+    assert len(state.snapshot.repos) == 30
+
+    for _ in range(2):
+        state, calls = _refresh(fetcher, fake, state)
+        assert state.not_modified
+        # Профиль и первая страница дельты: оба 304
+        assert calls == 2
+
+
+def test_changed_repo_is_merged(fetcher, fake, fixture):
+    state, _ = _refresh(fetcher, fake, None)
+    repo = fixture['repos'][5]
+    repo['stargazers_count'] += 1000
+    repo['updated_at'] = repo['pushed_at'] = '2099-01-01T00:00:00Z'
+
+    state, calls = _refresh(fetcher, fake, state)
+
+    assert not state.not_modified
+    stars = {r.name: r.stars for r in state.snapshot.repos}
+    assert stars[repo['name']] == repo['stargazers_count']
+    assert calls == 2
+
+
+def test_unlisted_repos_do_not_force_full_syncs(fetcher, fake, fixture):
+    # public_repos учитывает репозитории, которых нет в списке
+    fixture['user']['public_repos'] += 5
+    state, _ = _refresh(fetcher, fake, None)
+    state, _ = _refresh(fetcher, fake, state)
+
+    state, calls = _refresh(fetcher, fake, state)
+
+    assert state.not_modified
+    assert calls == 2
+
+
+def test_deleted_repo_triggers_full_sync(fetcher, fake, fixture):
+    state, _ = _refresh(fetcher, fake, None)
+    deleted = fixture['repos'].pop()
+    fixture['user']['public_repos'] -= 1
+
+    state, _ = _refresh(fetcher, fake, state)
+
+    assert not state.not_modified
+    assert deleted['name'] not in {r.name for r in state.snapshot.repos}
+    assert len(state.snapshot.repos) == 29
@@ -0,0 +1,112 @@
+import os
+from multiprocessing import get_context
+
+import pytest
+
+from history import DAY, HISTORY_METRICS, HistoryStore, _RECORD
+
+NOW = 1_700_000_000
+
+
+def _values(followers, stars=0):
+    return {'followers': followers, 'total_stars': stars}
+
+
+def test_append_and_query_range(tmp_path):
+    store = HistoryStore(str(tmp_path), min_interval=0)
+    for hour in range(5):
+        assert store.append('octocat', _values(hour, hour * 10), NOW + hour * 3600)
+
+    data = store.query('octocat')
+    assert list(data['timestamps']) == [NOW + hour * 3600 for hour in range(5)]
+    assert list(data['followers']) == [0, 1, 2, 3, 4]
+    assert list(data['total_stars']) == [0, 10, 20, 30, 40]
+    assert set(data) == {'timestamps', *HISTORY_METRICS}
+
+    # Границы включительные, логин без учета регистра
+    data = store.query('OctoCat', since=NOW + 3600, until=NOW + 3 * 3600, metrics=('followers',))
+    assert list(data['timestamps']) == [NOW + 3600, NOW + 2 * 3600, NOW + 3 * 3600]
+    assert set(data) == {'timestamps', 'followers'}
+
+
+def test_unknown_and_invalid_logins(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    assert store.query('nobody') is None
+    assert store.append('../etc', _values(1), NOW) is False
+    assert store.query('../etc') is None
+    assert os.listdir(tmp_path) == []
+
+
+def test_skips_identical_points_within_min_interval(tmp_path):
+    store = HistoryStore(str(tmp_path), min_interval=3600)
+    assert store.append('octocat', _values(1), NOW)
+    assert not store.append('octocat', _values(1), NOW + 60)
+    # Изменившиеся метрики пишутся сразу, одинаковые — после min_interval
+    assert store.append('octocat', _values(2), NOW + 120)
+    assert store.append('octocat', _values(2), NOW + 120 + 3600)
+    assert list(store.query('octocat')['followers']) == [1, 2, 2]
+
+
+def test_compaction_downsamples_old_points(tmp_path):
+    store = HistoryStore(str(tmp_path), raw_days=2, daily_days=30, min_interval=0, compact_every=10**6)
+    start = NOW - 60 * DAY
+    # Четыре точки в сутки за 60 дней
+    timestamps = [start + i * DAY // 4 for i in range(60 * 4)]
+    for i, timestamp in enumerate(timestamps):
+        store.append('octocat', _values(i), timestamp)
+
+    path = store._path('octocat')
+    store._compact(path, NOW)
+    kept = list(store.query('octocat')['timestamps'])
+
+    assert kept == sorted(kept)
+    assert kept[-1] == timestamps[-1]
+    # Последние raw_days дней — все точки
+    recent = [t for t in timestamps if NOW - t <= 2 * DAY]
+    assert [t for t in kept if NOW - t <= 2 * DAY] == recent
+    # До daily_days — не больше одной точки за день, дальше — за неделю
+    daily = [t for t in kept if 2 * DAY < NOW - t <= 30 * DAY]
+    assert len({t // DAY for t in daily}) == len(daily)
+    weekly = [t for t in kept if NOW - t > 30 * DAY]
+    assert len({t // (7 * DAY) for t in weekly}) == len(weekly)
+    assert len(kept) < len(timestamps)
+    assert os.path.getsize(path) == len(kept) * _RECORD.size
+
+
+def _worker_timestamp(worker, i):
+    # У каждого воркера своя неделя: прореживание не смешивает их точки
+    return NOW + worker * 14 * DAY + i
+
+
+def _append_many(directory, worker, count):
+    store = HistoryStore(directory, raw_days=0, daily_days=0, min_interval=0, compact_every=16)
+    for i in range(count):
+        store.append('octocat', _values(i), _worker_timestamp(worker, i))
+
+
+@pytest.mark.skipif(os.name != 'posix', reason='межпроцессная блокировка только с fcntl')
+def test_concurrent_compaction_across_processes(tmp_path):
+    workers, count = 4, 1000
+    context = get_context('fork')
+    processes = [
+        context.Process(target=_append_many, args=(str(tmp_path), worker, count))
+        for worker in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(60)
+        assert process.exitcode == 0
+
+    # Временные файлы прореживания не остаются, записи не рвутся
+    assert os.listdir(tmp_path) == ['octocat.bin']
+    path = os.path.join(tmp_path, 'octocat.bin')
+    assert os.path.getsize(path) % _RECORD.size == 0
+
+    data = HistoryStore(str(tmp_path)).query('octocat')
+    assert len(data['timestamps']) < workers * count
+    points = set(zip(data['timestamps'], data['followers']))
+    # Последняя точка каждого воркера не теряется, даже если файл заменили во время записи
+    for worker in range(workers):
+        assert (_worker_timestamp(worker, count - 1), count - 1) in points
+    assert all(value == (timestamp - NOW) % (14 * DAY) for timestamp, value in points)
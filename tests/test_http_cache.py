@@ -0,0 +1,24 @@
+import gzip
+import json
+
+
+def test_only_compressed_bodies_are_cached(stats, client):
+    plain = client.get('/api/stats/bench-medium', headers={'Accept-Encoding': 'identity'})
+    packed = client.get('/api/stats/bench-medium', headers={'Accept-Encoding': 'gzip'})
+
+    assert plain.status_code == packed.status_code == 200
+    assert packed.headers['Content-Encoding'] == 'gzip'
+    assert json.loads(gzip.decompress(packed.data)) == plain.get_json()
+    assert stats.cache.get('user_http_bench-medium_gzip') is not None
+    assert stats.cache.get('user_http_bench-medium_identity') is None
+    assert stats.cache.get('user_http_bench-medium_None') is None
+
+
+def test_identity_etag_revalidates(client):
+    first = client.get('/api/stats/bench-medium', headers={'Accept-Encoding': 'identity'})
+    again = client.get('/api/stats/bench-medium', headers={
+        'Accept-Encoding': 'identity',
+        'If-None-Match': first.headers['ETag'],
+    })
+
+    assert again.status_code == 304
@@ -0,0 +1,22 @@
+import pytest
+
+from config import Config
+
+
+@pytest.mark.parametrize('path', [
+    '/api/stats/bench-medium',
+    '/api/stats/bench-medium/full',
+    '/api/stats/bench-medium/stream',
+])
+def test_unreachable_github_while_estimating_repos(stats, client, monkeypatch, path):
+    # Порог ниже MAX_REPOS: решение о задаче требует запроса профиля
+    monkeypatch.setattr(Config, 'JOB_REPO_THRESHOLD', 10)
+    # Порт 1 закрыт: запрос профиля падает с ConnectionError
+    monkeypatch.setattr(stats.client, 'base_url', 'http://127.0.0.1:1')
+
+    response = client.get(path)
+    body = response.get_data(as_text=True)
+
+    assert response.status_code == 200
+    assert 'error' in body
+    assert 'Traceback' not in body
@@ -0,0 +1,108 @@
+from config import Config
+from github_api import GitHubStats
+from leaderboard import Leaderboard, leaderboard_record
+
+
+def _sections(login, stars, languages):
+    return {
+        'profile': {'login': login, 'followers': 1, 'public_repos': len(languages)},
+        'repositories': {'total_stars': stars, 'total_forks': 0},
+        'languages': {
+            'languages': [{'language': name} for name in languages[:10]],
+            'all_languages': languages,
+        },
+    }
+
+
+def _record(login, stars, languages=('Python',), updated_at=0):
+    return leaderboard_record(_sections(login, stars, list(languages)), updated_at)
+
+
+def _logins(leaderboard, metric='stars', language=None):
+    return [leader['login'] for leader in leaderboard.top(metric, language)[1]]
+
+
+def test_ranks_by_metric_and_language():
+    leaderboard = Leaderboard()
+    leaderboard.update(_record('a', 5, ['Python']))
+    leaderboard.update(_record('b', 9, ['Go']))
+    leaderboard.update(_record('c', 7, ['Python', 'Go']))
+
+    assert _logins(leaderboard) == ['b', 'c', 'a']
+    assert _logins(leaderboard, language='python') == ['c', 'a']
+    assert leaderboard.top('stars', 'go')[1][0] == dict(
+        login='b', name=None, avatar_url=None, type=None, rank=1, value=9
+    )
+
+
+def test_indexes_languages_beyond_top_ten():
+    languages = [f'Lang{i}' for i in range(15)]
+    leaderboard = Leaderboard()
+    leaderboard.update(_record('a', 1, languages))
+
+    assert _logins(leaderboard, language='lang14') == ['a']
+    assert leaderboard.language_name('LANG14') == 'Lang14'
+
+
+def test_new_snapshot_replaces_old_entries():
+    leaderboard = Leaderboard()
+    leaderboard.update(_record('a', 1, ['Rust']))
+    leaderboard.update(_record('a', 3, ['Go']))
+
+    assert leaderboard.top('stars') == (1, [dict(login='a', name=None, avatar_url=None, type=None, rank=1, value=3)])
+    assert leaderboard.top('stars', 'rust') == (0, [])
+    assert leaderboard.language_name('rust') == 'rust'
+
+
+def test_evicts_least_recently_updated_user():
+    leaderboard = Leaderboard(max_users=2)
+    leaderboard.update(_record('a', 1, ['Rare']))
+    leaderboard.update(_record('b', 2))
+    leaderboard.update(_record('a', 3, ['Rare']))
+    leaderboard.update(_record('c', 4))
+
+    assert len(leaderboard) == 2
+    assert 'b' not in leaderboard
+    assert _logins(leaderboard) == ['c', 'a']
+    assert _logins(leaderboard, language='rare') == ['a']
+
+
+def test_rebuild_replaces_content_and_keeps_newer_local_records():
+    leaderboard = Leaderboard(max_users=3)
+    leaderboard.update(_record('stale', 100, updated_at=1))
+    leaderboard.update(_record('local', 50, updated_at=20))
+
+    leaderboard.rebuild([
+        _record('x', 1, updated_at=5),
+        _record('y', 2, updated_at=6),
+        _record('y', 3, updated_at=7),
+        _record('z', 4, updated_at=8),
+    ], since=10)
+
+    # stale не в общем кэше и обновлялся до начала чтения; x вытеснен лимитом
+    assert _logins(leaderboard) == ['local', 'z', 'y']
+    assert leaderboard.top('stars')[1][2]['value'] == 3
+
+
+def test_rankings_are_shared_through_the_cache(fake, monkeypatch, tmp_path):
+    for name, value in {
+        'GITHUB_API_URL': fake.url,
+        'CACHE_BACKEND': 'sqlite',
+        'CACHE_PATH': str(tmp_path / 'cache.sqlite3'),
+        'CHARTS_MODE': 'lazy',
+        'LANGUAGE_BYTES': False,
+        'HISTORY_PATH': '',
+        'LEADERBOARD_SYNC_INTERVAL': 0,
+    }.items():
+        monkeypatch.setattr(Config, name, value)
+    worker, other = GitHubStats(tokens=['t']), GitHubStats(tokens=['t'])
+
+    worker.get_user_stats('bench-medium')
+    worker.get_user_stats('bench-small')
+    leaders = worker.get_leaderboard('stars')['data']['leaders']
+
+    assert other.get_leaderboard('stars')['data']['leaders'] == leaders
+    assert GitHubStats(tokens=['t']).get_leaderboard('stars')['data']['total'] == 2
+
+    other.cache.delete('leaderboard_bench-small')
+    assert [leader['login'] for leader in other.get_leaderboard('stars')['data']['leaders']] == ['bench-medium']
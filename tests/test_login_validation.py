@@ -0,0 +1,40 @@
+import pytest
+
+from models import is_valid_login
+
+BAD_LOGINS = ['../user', '../rate_limit', 'a/../../orgs/x', '-dash', 'a' * 40, 'name\n', '']
+
+
+@pytest.mark.parametrize('login', BAD_LOGINS + [None, 123, {}])
+def test_is_valid_login_rejects(login):
+    assert not is_valid_login(login)
+
+
+@pytest.mark.parametrize('login', ['octocat', 'A-b-9', 'a' * 39])
+def test_is_valid_login_accepts(login):
+    assert is_valid_login(login)
+
+
+def test_batch_rejects_non_logins(fake, client):
+    response = client.post('/api/stats/batch', json={
+        'usernames': ['bench-small', None, 123, {}, '../user', 'a/../../orgs/x']
+    })
+
+    assert response.status_code == 400
+    assert response.get_json()['invalid'] == [None, 123, {}, '../user', 'a/../../orgs/x']
+    assert fake.calls == 0
+
+
+def test_batch_accepts_logins(client):
+    response = client.post('/api/stats/batch', json={'usernames': [' bench-small ', 'bench-small']})
+
+    assert response.status_code == 200
+    assert response.get_data(as_text=True).count('"username": "bench-small"') == 1
+
+
+def test_compare_rejects_non_logins(fake, client):
+    response = client.get('/api/compare?users=bench-small,../rate_limit,a/../../orgs/x')
+
+    assert response.status_code == 400
+    assert response.get_json()['invalid'] == ['../rate_limit', 'a/../../orgs/x']
+    assert fake.calls == 0
@@ -0,0 +1,68 @@
+import pickle
+import sys
+
+import pytest
+
+from cache import SQLiteCache, estimate_size
+from packed_stats import PackedStats
+
+DATA = {
+    'profile': {'login': 'octocat', 'name': 'Октокот', 'followers': 42},
+    'repositories': {'total_stars': 7, 'top': [{'name': f'repo-{i}', 'stars': i} for i in range(5)]},
+    'charts': {'languages': '<div class="chart">' + 'x' * 5000 + '</div>'},
+    'empty': None,
+}
+
+
+def _flags(packed):
+    return {name: flags for name, flags, _, _ in packed._index()}
+
+
+def test_round_trip_with_compressed_and_plain_sections():
+    packed = PackedStats.pack(DATA, compress_min_size=1024)
+
+    # Крупная секция сжата, мелкие лежат как есть
+    assert _flags(packed) == {'profile': 0, 'repositories': 0, 'charts': 1, 'empty': 0}
+    assert packed.names() == list(DATA)
+    assert packed.sections() == DATA
+    assert len(packed.blob) < 1024
+
+
+def test_decodes_only_requested_sections():
+    packed = PackedStats.pack(DATA)
+
+    assert packed.sections(['profile', 'missing']) == {'profile': DATA['profile']}
+    assert packed.section('charts') == DATA['charts']
+    assert packed.section('empty') is None
+    with pytest.raises(KeyError):
+        packed.section('missing')
+
+
+def test_compression_threshold_and_empty_pack():
+    packed = PackedStats.pack(DATA, compress_min_size=sys.maxsize)
+    assert set(_flags(packed).values()) == {0}
+    assert packed.sections() == DATA
+
+    empty = PackedStats.pack({})
+    assert empty.names() == []
+    assert empty.sections() == {}
+
+
+def test_size_counts_blob():
+    packed = PackedStats.pack(DATA)
+    assert estimate_size(packed) >= len(packed.blob)
+
+
+def test_pickles_through_sqlite_cache(tmp_path):
+    packed = PackedStats.pack(DATA)
+    restored = pickle.loads(pickle.dumps(packed))
+    assert isinstance(restored, PackedStats)
+    assert restored.blob == packed.blob
+
+    cache = SQLiteCache(str(tmp_path / 'cache.sqlite3'))
+    cache.set('user_stats_octocat', {'result': packed, 'fetched_at': 1.0})
+    # Второй экземпляр на том же файле — как другой воркер
+    entry = SQLiteCache(str(tmp_path / 'cache.sqlite3')).get('user_stats_octocat')
+    assert isinstance(entry['result'], PackedStats)
+    assert entry['result'].sections() == DATA
+    assert entry['fetched_at'] == 1.0
@@ -0,0 +1,23 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+def _concurrently(usernames, load):
+    """Вызывает ``load`` для каждого логина в своем потоке, все одновременно."""
+    barrier = threading.Barrier(len(usernames))
+
+    def run(username):
+        barrier.wait()
+        return load(username)
+
+    with ThreadPoolExecutor(max_workers=len(usernames)) as pool:
+        return list(pool.map(run, usernames))
+
+
+def test_concurrent_cold_requests_share_one_load(fake, stats):
+    results = _concurrently(['bench-medium'] * 50, stats.get_user_stats)
+
+    assert all(result['success'] for result in results)
+    # Один /users/bench-medium и одна страница /users/bench-medium/repos
+    assert fake.calls == 2
+
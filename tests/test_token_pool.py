@@ -0,0 +1,108 @@
+import threading
+from time import monotonic, time
+
+import pytest
+
+from github_client import RateLimitExceeded, TokenPool
+
+
+def _headers(remaining, reset_at, limit=5000, resource='core'):
+    return {
+        'X-RateLimit-Remaining': str(remaining),
+        'X-RateLimit-Limit': str(limit),
+        'X-RateLimit-Reset': str(reset_at),
+        'X-RateLimit-Resource': resource,
+    }
+
+
+def test_picks_token_with_largest_budget():
+    pool = TokenPool(['token-a', 'token-b'])
+    a, b = pool._slots
+    reset_at = time() + 3600
+    pool.update(a, _headers(10, reset_at))
+    pool.update(b, _headers(3, reset_at))
+
+    assert pool.acquire() is a
+    # Остаток списывается при выдаче, без ожидания ответа
+    assert a.budget('core', time()) == 9
+
+    pool.update(a, _headers(2, reset_at))
+    assert pool.acquire() is b
+
+
+def test_fails_over_to_next_token_when_exhausted():
+    pool = TokenPool(['token-a', 'token-b'])
+    a, b = pool._slots
+    reset_at = time() + 3600
+    pool.update(a, _headers(0, reset_at))
+    pool.update(b, _headers(2, reset_at))
+
+    assert [pool.acquire(), pool.acquire()] == [b, b]
+    with pytest.raises(RateLimitExceeded) as error:
+        pool.acquire()
+    assert error.value.status == 429
+    assert error.value.reset_at == reset_at
+
+
+def test_budgets_are_per_resource():
+    pool = TokenPool(['token-a'])
+    slot, = pool._slots
+    pool.update(slot, _headers(0, time() + 3600, resource='graphql'))
+
+    assert pool.acquire('core') is slot
+    with pytest.raises(RateLimitExceeded):
+        pool.acquire('graphql')
+
+
+def test_budget_restored_after_reset():
+    pool = TokenPool(['token-a'])
+    slot, = pool._slots
+    pool.update(slot, _headers(0, time() - 1, limit=30))
+
+    assert pool.acquire() is slot
+    assert slot.budget('core', time()) == 29
+
+
+def test_waits_for_reset_up_to_max_wait():
+    pool = TokenPool(['token-a'], max_wait=0.3)
+    slot, = pool._slots
+    pool.update(slot, _headers(0, time() + 0.1))
+
+    start = monotonic()
+    assert pool.acquire() is slot
+    assert 0.05 <= monotonic() - start < 0.3
+
+
+def test_wait_gives_up_after_max_wait():
+    pool = TokenPool(['token-a'], max_wait=0.1)
+    slot, = pool._slots
+    pool.update(slot, _headers(0, time() + 3600))
+
+    start = monotonic()
+    with pytest.raises(RateLimitExceeded):
+        pool.acquire()
+    assert 0.1 <= monotonic() - start < 1
+
+
+def test_update_wakes_waiting_acquire():
+    pool = TokenPool(['token-a'], max_wait=5)
+    slot, = pool._slots
+    pool.update(slot, _headers(0, time() + 3600))
+
+    timer = threading.Timer(0.1, pool.update, (slot, _headers(100, time() + 3600)))
+    timer.start()
+    start = monotonic()
+    try:
+        assert pool.acquire() is slot
+    finally:
+        timer.cancel()
+    assert monotonic() - start < 2
+
+
+def test_ignores_responses_without_rate_limit_headers():
+    pool = TokenPool([])
+    slot, = pool._slots
+    pool.update(slot, {})
+
+    assert slot.label == 'anonymous'
+    assert slot.budget('core', time()) == 60